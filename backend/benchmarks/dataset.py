@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset Generator
+Generates a reproducible club database of any size (1,000 to 1,000,000
+members) with the field distributions of the real one: numeric member numbers
+with family suffixes (10, 10A, 10B), a few prefixed numbers (M-1234,
+LIFE-56), households sharing an address and often an email, email/SMS
+opt-ins, lapsed and current expiry dates, life members, vehicles in every
+status, archived vehicles, and the default plus custom vehicle options.
+
+The same --seed and --as-of always produce the same data. Dates are spread
+around --as-of (default today) so expiry reports and the dashboard see a
+realistic mix of current, expiring and lapsed members.
+
+Two outputs:
+    --load  bulk-inserts into a scratch database (SYNTHETIC_DB, default
+            dragclub_synthetic), builds the indexes, and rebuilds the contact
+            lists. Vehicle summaries are written with the members. DB_NAME
+            from .env is never touched.
+    --csv   writes members.csv and vehicles.csv in the format of the bulk
+            upload endpoints. vehicles.csv refers to the generated member_ids,
+            which the member upload does not keep, so upload it against a
+            database filled with --load. Archived vehicles cannot be uploaded
+            and are left out.
+
+Usage:
+    python3 benchmarks/dataset.py --load --members 100000
+    python3 benchmarks/dataset.py --load --members 1000000 --drop
+    python3 benchmarks/dataset.py --csv /tmp/synthetic --members 5000 --as-of 2025-07-01
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import asyncio
+import argparse
+from typing import Iterator, List, Tuple
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+
+import server
+from indexes import apply_indexes
+
+SYNTHETIC_DB = os.environ.get('SYNTHETIC_DB', 'dragclub_synthetic')
+BATCH_SIZE = 5000
+
+FIRST_NAMES = [
+    "James", "John", "Robert", "Michael", "David", "Peter", "Mark", "Paul", "Steven", "Andrew",
+    "Daniel", "Matthew", "Scott", "Craig", "Jason", "Brett", "Shane", "Wayne", "Darren", "Luke",
+    "Jack", "Liam", "Noah", "Ethan", "Riley", "Cooper", "Mason", "Lachlan", "Tyler", "Jordan",
+    "Sarah", "Michelle", "Lisa", "Karen", "Jessica", "Emma", "Olivia", "Chloe", "Kylie", "Megan",
+]
+SURNAMES = [
+    "Smith", "Jones", "Williams", "Brown", "Wilson", "Taylor", "Johnson", "White", "Martin", "Anderson",
+    "Thompson", "Nguyen", "Thomas", "Walker", "Harris", "Lee", "Ryan", "Robinson", "Kelly", "King",
+    "Campbell", "Clarke", "Mitchell", "Young", "Hughes", "Murphy", "O'Brien", "Cooper", "Ward", "Hall",
+]
+STREETS = ["Main Road", "Maitland Road", "Hunter Street", "Lake Road", "Pacific Highway", "Brunker Road",
+           "Glebe Road", "Victoria Street", "Church Street", "Tudor Street", "Park Avenue", "Ocean Street"]
+# (suburb, postcode, state); weighted towards the Hunter like the real membership
+SUBURBS = [
+    ("Newcastle", "2300", "NSW"), ("Mayfield", "2304", "NSW"), ("Wallsend", "2287", "NSW"),
+    ("Adamstown", "2289", "NSW"), ("Merewether", "2291", "NSW"), ("Charlestown", "2290", "NSW"),
+    ("Cardiff", "2285", "NSW"), ("Maitland", "2320", "NSW"), ("Cessnock", "2325", "NSW"),
+    ("Raymond Terrace", "2324", "NSW"), ("Toronto", "2283", "NSW"), ("Belmont", "2280", "NSW"),
+    ("Kurri Kurri", "2327", "NSW"), ("Singleton", "2330", "NSW"), ("Muswellbrook", "2333", "NSW"),
+    ("Gosford", "2250", "NSW"), ("Parramatta", "2150", "NSW"), ("Penrith", "2750", "NSW"),
+    ("Brisbane", "4000", "QLD"), ("Geelong", "3220", "VIC"),
+]
+SUBURB_WEIGHTS = [12, 6, 6, 5, 4, 5, 4, 6, 4, 4, 3, 3, 3, 2, 2, 2, 1, 1, 1, 1]
+EMAIL_DOMAINS = ["gmail.com", "bigpond.com", "hotmail.com", "outlook.com", "yahoo.com.au", "icloud.com"]
+# (make, model, body_style)
+VEHICLES = [
+    ("Holden", "Commodore", "Sedan"), ("Holden", "Monaro", "Coupe"), ("Holden", "Torana", "Sedan"),
+    ("Holden", "Kingswood", "Station Wagon"), ("Holden", "HQ One Tonner", "Utility"),
+    ("Ford", "Falcon", "Sedan"), ("Ford", "Falcon XB", "Coupe"), ("Ford", "Mustang", "Coupe"),
+    ("Ford", "F100", "Truck"), ("Ford", "Transit", "Van"), ("Chevrolet", "Camaro", "Coupe"),
+    ("Chevrolet", "Bel Air", "Sedan"), ("Dodge", "Charger", "Coupe"), ("Chrysler", "Valiant", "Sedan"),
+    ("Nissan", "Skyline", "Coupe"), ("Toyota", "Supra", "Coupe"), ("Mazda", "RX-7", "Coupe"),
+    ("Harley-Davidson", "Sportster", "Solo"), ("Suzuki", "Hayabusa", "Solo"), ("Custom", "Altered", "ICV"),
+]
+
+# What init_default_options and /vehicle-options/init-defaults create, plus
+# values clubs typically add themselves
+OPTION_VALUES = {
+    "status": ["Active", "Cancelled", "Inactive"],
+    "reason": ["Blank", "Sold Vehicle", "No Longer Financial", "Lost Log Book", "Written Off", "Unregistered"],
+    "body_style": ["Coupe", "ICV", "Sedan", "Solo", "Station Wagon", "Truck", "Utility", "Van"],
+}
+
+MEMBER_CSV_FIELDS = [
+    "member_number", "name", "address", "suburb", "postcode", "state", "phone1", "phone2",
+    "email1", "email2", "life_member", "financial", "inactive", "membership_type", "family_members",
+    "interest", "date_paid", "expiry_date", "comments", "receive_emails", "receive_sms",
+]
+VEHICLE_CSV_FIELDS = [
+    "member_id", "log_book_number", "entry_date", "expiry_date", "make", "body_style",
+    "model", "year", "registration", "status", "reason",
+]
+
+
+def registration(n: int) -> str:
+    """Unique plate for vehicle n, e.g. ABC123"""
+    letters = ""
+    rest = n // 1000
+    for _ in range(3):
+        rest, digit = divmod(rest, 26)
+        letters = chr(ord("A") + digit) + letters
+    return f"{letters}{n % 1000:03d}"
+
+
+def _member_number(rng: random.Random, n: int, life_member: bool) -> str:
+    roll = rng.random()
+    if life_member and roll < 0.3:
+        return f"LIFE-{n}"
+    if roll < 0.03:
+        return f"M-{n}"
+    return str(n)
+
+
+def _vehicles(rng: random.Random, member_id: str, counter: List[int], as_of: datetime) -> List[dict]:
+    count = rng.choices([0, 1, 2, 3, 4, 5], weights=[45, 35, 13, 5, 1.5, 0.5])[0]
+    archived = rng.choices([0, 1, 2], weights=[85, 12, 3])[0]
+    vehicles = []
+    for i in range(count + archived):
+        is_archived = i >= count
+        counter[0] += 1
+        n = counter[0]
+        make, model, body_style = rng.choice(VEHICLES)
+        entry = as_of - timedelta(days=rng.randint(0, 3650))
+        if is_archived:
+            status = "Cancelled"
+            reason = rng.choices(["Sold Vehicle", "Written Off", "Unregistered"], weights=[80, 10, 10])[0]
+        else:
+            status = rng.choices(["Active", "Inactive", "Cancelled"], weights=[85, 8, 7])[0]
+            reason = "" if status == "Active" else rng.choice(OPTION_VALUES["reason"][1:])
+        vehicles.append({
+            "vehicle_id": f"vehicle_{n:012x}",
+            "member_id": member_id,
+            "log_book_number": f"LB{n:07d}",
+            "entry_date": entry.isoformat(),
+            "expiry_date": (as_of + timedelta(days=rng.randint(-300, 365))).isoformat(),
+            "make": make,
+            "body_style": body_style,
+            "model": model,
+            "year": rng.randint(1955, as_of.year),
+            "registration": registration(n),
+            "status": status,
+            "reason": reason,
+            "archived": is_archived,
+            "created_at": entry.isoformat(),
+            "updated_at": as_of.isoformat(),
+        })
+    return vehicles
+
+
+def generate(members: int, seed: int = 1, as_of: datetime = None) -> Iterator[Tuple[dict, List[dict]]]:
+    """
+    Yield (member, vehicles) in member number order, members in the stored
+    format including their vehicle summary. Households of 2-4 share a
+    number (10, 10A, 10B), an address and often one email address.
+    """
+    rng = random.Random(seed)
+    as_of = as_of or datetime.now(timezone.utc)
+    vehicle_counter = [0]
+    generated = 0
+    number = 0
+    while generated < members:
+        number += 1
+        size = min(rng.choices([1, 2, 3, 4], weights=[82, 10, 6, 2])[0], members - generated)
+        surname = rng.choice(SURNAMES)
+        suburb, postcode, state = rng.choices(SUBURBS, weights=SUBURB_WEIGHTS)[0]
+        address = f"{rng.randint(1, 250)} {rng.choice(STREETS)}"
+        household_email = f"{surname.lower().replace(chr(39), '')}{rng.randint(1, 9999)}@{rng.choice(EMAIL_DOMAINS)}"
+        shared_email = size > 1 and rng.random() < 0.5
+        names = [f"{rng.choice(FIRST_NAMES)} {surname}" for _ in range(size)]
+        interest = rng.choices(["Drag Racing", "Car Enthusiast", "Both"], weights=[45, 25, 30])[0]
+        paid_days_ago = rng.randint(0, 540)
+
+        for k in range(size):
+            generated += 1
+            life_member = rng.random() < 0.04
+            if size == 1:
+                member_number = _member_number(rng, number, life_member)
+                membership_type = "Junior" if rng.random() < 0.08 else "Full"
+            else:
+                member_number = f"{number}{'' if k == 0 else chr(ord('A') + k - 1)}"
+                membership_type = "Family" if k == 0 or rng.random() < 0.7 else "Junior"
+
+            if life_member:
+                date_paid = expiry_date = None
+            elif rng.random() < 0.05:
+                # Imported from the old system without payment dates
+                date_paid = expiry_date = None
+            else:
+                # Family members mostly renew together
+                days = paid_days_ago if k and rng.random() < 0.8 else rng.randint(0, 540)
+                date_paid = as_of - timedelta(days=days)
+                expiry_date = date_paid + timedelta(days=365)
+            current = life_member or (expiry_date is not None and expiry_date >= as_of)
+            financial = current if rng.random() > 0.03 else not current
+            inactive = rng.random() < (0.25 if expiry_date and expiry_date < as_of - timedelta(days=180) else 0.03)
+
+            first = names[k].split()[0].lower()
+            if shared_email:
+                email1 = household_email
+            elif rng.random() < 0.88:
+                email1 = f"{first}.{surname.lower().replace(chr(39), '')}{number}@{rng.choice(EMAIL_DOMAINS)}"
+            else:
+                email1 = None
+            created = as_of - timedelta(days=rng.randint(0, 5475))
+            member_id = f"member_{generated:012x}"
+            member = {
+                "member_id": member_id,
+                "member_number": member_number,
+                **server.member_number_sort_fields(member_number),
+                "name": names[k],
+                "address": address,
+                "suburb": suburb,
+                "postcode": postcode,
+                "state": state,
+                "phone1": f"04{rng.randint(10000000, 99999999)}" if rng.random() < 0.93 else None,
+                "phone2": f"02{rng.randint(40000000, 49999999)}" if rng.random() < 0.15 else None,
+                "email1": email1,
+                "email2": f"{first}{rng.randint(1, 999)}@{rng.choice(EMAIL_DOMAINS)}" if email1 and rng.random() < 0.1 else None,
+                "life_member": life_member,
+                "financial": financial,
+                "inactive": inactive,
+                "membership_type": membership_type,
+                "family_members": [n for i, n in enumerate(names) if i != k] if size > 1 and k == 0 else None,
+                "interest": interest if rng.random() < 0.8 else rng.choice(["Drag Racing", "Car Enthusiast", "Both"]),
+                "date_paid": date_paid.isoformat() if date_paid else None,
+                "expiry_date": expiry_date.isoformat() if expiry_date else None,
+                "comments": rng.choice(["Committee member", "Prefers SMS", "Track volunteer", "Renewed at the gate"])
+                            if rng.random() < 0.05 else None,
+                "receive_emails": rng.random() < 0.92,
+                "receive_sms": rng.random() < 0.78,
+                "created_at": created.isoformat(),
+                "updated_at": max(created, as_of - timedelta(days=rng.randint(0, 365))).isoformat(),
+            }
+            vehicles = _vehicles(rng, member_id, vehicle_counter, as_of)
+            member.update(server.vehicle_summary([v for v in vehicles if not v["archived"]]))
+            yield member, vehicles
+
+
+def vehicle_options(as_of: datetime = None) -> List[dict]:
+    created = (as_of or datetime.now(timezone.utc)).isoformat()
+    options = []
+    for option_type, values in OPTION_VALUES.items():
+        for value in values:
+            options.append({
+                "option_id": f"option_{len(options) + 1:012x}",
+                "type": option_type,
+                "value": value,
+                "created_at": created,
+            })
+    return options
+
+
+def _batches(members: int, seed: int, as_of: datetime, batch_size: int = BATCH_SIZE):
+    member_batch, vehicle_batch = [], []
+    for member, vehicles in generate(members, seed, as_of):
+        member_batch.append(member)
+        vehicle_batch.extend(vehicles)
+        if len(member_batch) >= batch_size:
+            yield member_batch, vehicle_batch
+            member_batch, vehicle_batch = [], []
+    if member_batch:
+        yield member_batch, vehicle_batch
+
+
+async def load(db, members: int, seed: int = 1, as_of: datetime = None, progress: bool = False) -> dict:
+    """
+    Bulk-insert the dataset into db (expected empty), then build the indexes
+    and the contact lists, and stamp the documents for delta sync. Points
+    server.db at db for the rebuild helpers.
+    """
+    server.db = db
+    counts = {"members": 0, "vehicles": 0, "vehicle_options": 0}
+    started = time.perf_counter()
+    for member_batch, vehicle_batch in _batches(members, seed, as_of):
+        await db.members.insert_many(member_batch, ordered=False)
+        if vehicle_batch:
+            await db.vehicles.insert_many(vehicle_batch, ordered=False)
+        counts["members"] += len(member_batch)
+        counts["vehicles"] += len(vehicle_batch)
+        if progress:
+            print(f"   {counts['members']:,} members, {counts['vehicles']:,} vehicles "
+                  f"({time.perf_counter() - started:.0f}s)")
+    options = vehicle_options(as_of)
+    await db.vehicle_options.insert_many(options)
+    counts["vehicle_options"] = len(options)
+
+    # Indexes are cheaper to build once than to maintain during the inserts
+    await apply_indexes(db)
+    counts["contact_list_entries"] = await server.rebuild_contact_lists()
+    await server.backfill_sync_stamps()
+    await server.data_changed("members", "vehicles")
+    await server.vehicle_options_changed()
+    await server.suburb_index.changed()
+    return counts
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ";".join(value)
+    if value is None:
+        return ""
+    return value
+
+
+def _csv_date(value):
+    return value[:10] if value else ""
+
+
+def member_csv_row(member: dict) -> dict:
+    row = {f: _csv_value(member[f]) for f in MEMBER_CSV_FIELDS}
+    row["date_paid"] = _csv_date(member["date_paid"])
+    row["expiry_date"] = _csv_date(member["expiry_date"])
+    return row
+
+
+def vehicle_csv_row(vehicle: dict) -> dict:
+    row = {f: _csv_value(vehicle[f]) for f in VEHICLE_CSV_FIELDS}
+    row["entry_date"] = _csv_date(vehicle["entry_date"])
+    row["expiry_date"] = _csv_date(vehicle["expiry_date"])
+    return row
+
+
+def write_csv(directory: str, members: int, seed: int = 1, as_of: datetime = None) -> dict:
+    """Write members.csv and vehicles.csv for the bulk upload endpoints"""
+    os.makedirs(directory, exist_ok=True)
+    counts = {"members": 0, "vehicles": 0}
+    with open(os.path.join(directory, "members.csv"), "w", newline="", encoding="utf-8") as mf, \
+            open(os.path.join(directory, "vehicles.csv"), "w", newline="", encoding="utf-8") as vf:
+        member_writer = csv.DictWriter(mf, fieldnames=MEMBER_CSV_FIELDS)
+        vehicle_writer = csv.DictWriter(vf, fieldnames=VEHICLE_CSV_FIELDS)
+        member_writer.writeheader()
+        vehicle_writer.writeheader()
+        for member, vehicles in generate(members, seed, as_of):
+            member_writer.writerow(member_csv_row(member))
+            counts["members"] += 1
+            for v in vehicles:
+                if not v["archived"]:
+                    vehicle_writer.writerow(vehicle_csv_row(v))
+                    counts["vehicles"] += 1
+    return counts
+
+
+def parse_as_of(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+async def load_database(args, as_of: datetime) -> bool:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'], serverSelectionTimeoutMS=5000)
+    try:
+        await client.admin.command('ping')
+    except Exception as e:
+        print(f"ERROR: MongoDB connection failed: {e}")
+        return False
+    db = client[args.db]
+    existing = await db.members.estimated_document_count()
+    if existing and not args.drop:
+        print(f"ERROR: '{args.db}' already has {existing} members. Use --drop to replace it.")
+        return False
+    if args.drop:
+        await client.drop_database(args.db)
+
+    print(f"Loading {args.members:,} members into '{args.db}' (seed {args.seed}, as of {as_of.date()})")
+    started = time.perf_counter()
+    counts = await load(db, args.members, args.seed, as_of, progress=True)
+    print(f"Done in {time.perf_counter() - started:.1f}s: " + ", ".join(f"{v:,} {k}" for k, v in counts.items()))
+    client.close()
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible synthetic club dataset")
+    parser.add_argument("--members", type=int, default=1000, help="members to generate (default 1000)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default 1)")
+    parser.add_argument("--as-of", type=parse_as_of, default=None,
+                        help="date the data is generated around, YYYY-MM-DD (default today)")
+    parser.add_argument("--load", action="store_true", help="bulk-insert into the scratch database")
+    parser.add_argument("--db", default=SYNTHETIC_DB, help=f"database for --load (default {SYNTHETIC_DB})")
+    parser.add_argument("--drop", action="store_true", help="replace the database if it already has data")
+    parser.add_argument("--csv", metavar="DIR", help="write members.csv and vehicles.csv to DIR")
+    args = parser.parse_args()
+
+    if not args.load and not args.csv:
+        parser.error("choose --load and/or --csv DIR")
+    if args.load and args.db == os.environ.get('DB_NAME'):
+        parser.error(f"refusing to load into DB_NAME ('{args.db}'); pick another --db")
+    as_of = args.as_of or datetime.now(timezone.utc)
+
+    if args.csv:
+        started = time.perf_counter()
+        counts = write_csv(args.csv, args.members, args.seed, as_of)
+        print(f"Wrote {counts['members']:,} members and {counts['vehicles']:,} vehicles to {args.csv} "
+              f"in {time.perf_counter() - started:.1f}s")
+    if args.load and not asyncio.run(load_database(args, as_of)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,545 @@
+#!/usr/bin/env python3
+"""
+Endpoint Load Benchmark
+Seeds a scratch database on a local mongod with the synthetic dataset
+(benchmarks/dataset.py), starts the API under uvicorn against it, and replays
+a weighted mix of what the frontend does with concurrent virtual users:
+
+    members_page   MembersPage load: members, vehicles, vehicle options, suburbs
+    search         member search by name, or lookup by member number
+    member_view    one member and their vehicles
+    member_edit    load a member, then save a change to it
+    dashboard      the dashboard stats
+    report         a member report with a random filter
+    export         a filtered CSV export
+    bulk_upload    a 50-member CSV upload
+
+Each virtual user runs scenarios back to back, so the offered load is as much
+as the server can take at --concurrency. Samples from the --warmup period are
+dropped. Throughput and p50/p95/p99 latency per endpoint are written as JSON in
+the style of test_reports/ (test_reports/load_<timestamp>.json by default).
+
+The results are compared with the stored baseline (benchmarks/load_baseline.json).
+An endpoint regresses when its p95 is more than --tolerance above the
+baseline's and at least --min-delta-ms slower, or when it starts failing.
+Overall throughput regresses when it drops by more than --tolerance. Any
+regression exits with status 1. --save-baseline stores this run as the new
+baseline. Compare runs made with the same --members, --concurrency, --workers
+and --mix on the same machine.
+
+--url and --token point the benchmark at a server that is already running;
+nothing is seeded or started then, and the bulk upload and edit scenarios write
+to whatever database that server uses.
+
+Usage:
+    python3 benchmarks/load.py                              # 10,000 members, 8 users, 60s
+    python3 benchmarks/load.py --members 100000 --concurrency 32 --duration 120
+    python3 benchmarks/load.py --mix search=5,dashboard=1   # only these scenarios
+    python3 benchmarks/load.py --save-baseline
+"""
+
+import os
+import io
+import sys
+import csv
+import json
+import time
+import logging
+import random
+import signal
+import socket
+import asyncio
+import platform
+import argparse
+import subprocess
+from datetime import datetime, timezone, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Point the server module at the scratch database before it connects
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ['DB_NAME'] = os.environ.get('LOAD_BENCH_DB', 'load_benchmark')
+
+import dataset
+
+# Importing the server sets up INFO logging; one line per request would drown the results
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'load_baseline.json')
+REPORTS_DIR = os.path.join(REPO_DIR, 'test_reports')
+BENCH_SESSION_TOKEN = "load_benchmark_session"
+
+DEFAULT_MIX = {
+    "members_page": 20,
+    "search": 25,
+    "member_view": 15,
+    "member_edit": 10,
+    "dashboard": 15,
+    "report": 8,
+    "export": 5,
+    "bulk_upload": 2,
+}
+REPORT_FILTERS = ["all", "unfinancial", "with_vehicle", "unfinancial_with_vehicle", "expiring_soon",
+                  "vehicles_expiring_soon", "expired_vehicles"]
+EXPORT_FILTERS = [{}, {"receive_emails": True}, {"receive_sms": True}, {"interest": "Drag Racing"},
+                  {"receive_emails": True, "interest": "Both"}]
+BULK_UPLOAD_SIZE = 50
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(-(-q * len(sorted_values) // 100)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latencies and failures per endpoint label, ignoring anything before measuring starts"""
+
+    def __init__(self):
+        self.measuring = False
+        self.latencies = {}
+        self.errors = {}
+        self.error_samples = {}
+
+    def record(self, label: str, seconds: float, error: str = None):
+        if not self.measuring:
+            return
+        self.latencies.setdefault(label, []).append(seconds)
+        if error:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            self.error_samples.setdefault(label, error)
+
+    def summary(self, duration: float) -> dict:
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[label] = {
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "throughput_rps": round(len(values) / duration, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 2),
+                "p95_ms": round(percentile(values, 95) * 1000, 2),
+                "p99_ms": round(percentile(values, 99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        return endpoints
+
+
+class Workload:
+    """The scenarios; each issues the requests the matching frontend page does"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, sample: list, user: int, seed: int):
+        self.client = client
+        self.recorder = recorder
+        self.sample = sample
+        self.user = user
+        self.rng = random.Random(seed * 1000 + user)
+        self.run_id = f"{int(time.time()) % 100000}"
+        self.uploads = 0
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            await response.aread()
+        except httpx.HTTPError as e:
+            self.recorder.record(label, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+            return None
+        error = None if response.status_code < 400 else f"HTTP {response.status_code}: {response.text[:200]}"
+        self.recorder.record(label, time.perf_counter() - started, error)
+        return response
+
+    def member(self) -> dict:
+        return self.rng.choice(self.sample)
+
+    async def members_page(self):
+        await asyncio.gather(
+            self.request("GET /api/members", "GET", "/api/members"),
+            self.request("GET /api/vehicles", "GET", "/api/vehicles"),
+            self.request("GET /api/vehicle-options", "GET", "/api/vehicle-options"),
+            self.request("GET /api/members/suburbs/list", "GET", "/api/members/suburbs/list"),
+        )
+
+    async def search(self):
+        member = self.member()
+        if self.rng.random() < 0.3:
+            await self.request("GET /api/members?member_number", "GET", "/api/members",
+                               params={"member_number": member["member_number"]})
+        else:
+            # Surname, or the first few letters of it as typed
+            term = member["name"].split()[-1]
+            if self.rng.random() < 0.5:
+                term = term[:self.rng.randint(3, max(len(term), 3))]
+            await self.request("GET /api/members?search", "GET", "/api/members", params={"search": term})
+
+    async def member_view(self):
+        member_id = self.member()["member_id"]
+        await asyncio.gather(
+            self.request("GET /api/members/{member_id}", "GET", f"/api/members/{member_id}"),
+            self.request("GET /api/vehicles?member_id", "GET", "/api/vehicles", params={"member_id": member_id}),
+        )
+
+    async def member_edit(self):
+        member_id = self.member()["member_id"]
+        response = await self.request("GET /api/members/{member_id}", "GET", f"/api/members/{member_id}")
+        if response is None or response.status_code != 200:
+            return
+        await self.request("PUT /api/members/{member_id}", "PUT", f"/api/members/{member_id}",
+                           json={"comments": f"Load benchmark edit {self.rng.randint(1, 1_000_000)}",
+                                 "receive_sms": self.rng.random() < 0.78})
+
+    async def dashboard(self):
+        await self.request("GET /api/stats/dashboard", "GET", "/api/stats/dashboard")
+
+    async def report(self):
+        await self.request("GET /api/reports/members", "GET", "/api/reports/members",
+                           params={"filter_type": self.rng.choice(REPORT_FILTERS)})
+
+    async def export(self):
+        await self.request("POST /api/members/export", "POST", "/api/members/export",
+                           json=self.rng.choice(EXPORT_FILTERS))
+
+    async def bulk_upload(self):
+        self.uploads += 1
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=dataset.MEMBER_CSV_FIELDS)
+        writer.writeheader()
+        for i, (member, _) in enumerate(dataset.generate(BULK_UPLOAD_SIZE, seed=self.rng.randint(1, 10 ** 9))):
+            row = dataset.member_csv_row(member)
+            # Numbers nobody else uses, so the upload never skips rows as duplicates
+            row["member_number"] = f"LOAD-{self.run_id}-{self.user}-{self.uploads}-{i}"
+            writer.writerow(row)
+        await self.request("POST /api/members/bulk-upload", "POST", "/api/members/bulk-upload",
+                           files={"file": ("load_benchmark.csv", output.getvalue().encode(), "text/csv")})
+
+
+async def virtual_user(workload: Workload, mix: dict, stop_at: float):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < stop_at:
+        await getattr(workload, workload.rng.choices(names, weights)[0])()
+
+
+async def member_sample(client: httpx.AsyncClient, size: int = 2000) -> list:
+    response = await client.get("/api/members", params={"fields": "member_number,name", "limit": 10000})
+    response.raise_for_status()
+    members = response.json()
+    if not members:
+        raise RuntimeError("the server has no members to benchmark against")
+    return random.Random(0).sample(members, min(size, len(members)))
+
+
+async def run_load(base_url: str, token: str, mix: dict, concurrency: int, duration: float,
+                   warmup: float, seed: int) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=concurrency * 4, max_keepalive_connections=concurrency * 4)
+    async with httpx.AsyncClient(base_url=base_url, headers={"Authorization": f"Bearer {token}"},
+                                 timeout=120, limits=limits) as client:
+        sample = await member_sample(client)
+        workloads = [Workload(client, recorder, sample, i, seed) for i in range(concurrency)]
+        started = time.perf_counter()
+        stop_at = started + warmup + duration
+        users = [asyncio.create_task(virtual_user(w, mix, stop_at)) for w in workloads]
+        await asyncio.sleep(warmup)
+        recorder.measuring = True
+        measured_from = time.perf_counter()
+        await asyncio.sleep(max(stop_at - measured_from, 0))
+        # Requests still in flight at the end are not counted
+        recorder.measuring = False
+        measured = time.perf_counter() - measured_from
+        await asyncio.gather(*users)
+    endpoints = recorder.summary(measured)
+    total = sum(e["requests"] for e in endpoints.values())
+    return {
+        "duration_s": round(measured, 2),
+        "endpoints": endpoints,
+        "totals": {
+            "requests": total,
+            "errors": sum(e["errors"] for e in endpoints.values()),
+            "throughput_rps": round(total / measured, 2) if measured else 0,
+        },
+        "error_samples": recorder.error_samples,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float):
+    """(regressions, passed) comparing results with a stored baseline"""
+    regressions, passed = [], []
+    base_endpoints = baseline.get("endpoints", {})
+    for label, current in results["endpoints"].items():
+        base = base_endpoints.get(label)
+        if base is None:
+            passed.append(f"{label}: p95 {current['p95_ms']}ms (not in baseline)")
+            continue
+        limit = base["p95_ms"] * (1 + tolerance)
+        if current["p95_ms"] > limit and current["p95_ms"] - base["p95_ms"] >= min_delta_ms:
+            regressions.append({
+                "endpoint": label,
+                "issue": f"p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms (limit {limit:.2f}ms)",
+                "impact": f"p50 {base['p50_ms']} -> {current['p50_ms']}ms, p99 {base['p99_ms']} -> {current['p99_ms']}ms",
+                "fix_priority": "HIGH",
+                "status": "REGRESSION",
+            })
+        elif current["errors"] and not base.get("errors"):
+            regressions.append({
+                "endpoint": label,
+                "issue": f"{current['errors']} of {current['requests']} requests failed; none did in the baseline",
+                "impact": results["error_samples"].get(label, ""),
+                "fix_priority": "HIGH",
+                "status": "REGRESSION",
+            })
+        else:
+            passed.append(f"{label}: p95 {current['p95_ms']}ms within baseline {base['p95_ms']}ms +{tolerance:.0%}")
+
+    base_rps = baseline.get("totals", {}).get("throughput_rps")
+    if base_rps:
+        current_rps = results["totals"]["throughput_rps"]
+        if current_rps < base_rps * (1 - tolerance):
+            regressions.append({
+                "endpoint": "all",
+                "issue": f"throughput {current_rps} req/s vs baseline {base_rps} req/s",
+                "impact": "the server handles less load at the same concurrency",
+                "fix_priority": "HIGH",
+                "status": "REGRESSION",
+            })
+        else:
+            passed.append(f"throughput {current_rps} req/s within baseline {base_rps} req/s -{tolerance:.0%}")
+    return regressions, passed
+
+
+def comparable(environment: dict, baseline: dict) -> list:
+    """Settings that differ between this run and the baseline"""
+    base_env = baseline.get("environment", {})
+    return [
+        f"{key}: {base_env.get(key)} in the baseline, {environment.get(key)} now"
+        for key in ("members", "concurrency", "workers", "mix")
+        if base_env.get(key) != environment.get(key)
+    ]
+
+
+def build_report(results: dict, environment: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> dict:
+    minor_issues = [{
+        "endpoint": label,
+        "issue": f"{results['endpoints'][label]['errors']} failed requests",
+        "impact": sample,
+        "fix_priority": "MEDIUM",
+        "status": "FAILING",
+    } for label, sample in results["error_samples"].items()]
+
+    if baseline is None:
+        regressions, passed = [], [f"{label}: p95 {e['p95_ms']}ms (no baseline)" for label, e in results["endpoints"].items()]
+        verdict = "no baseline stored; nothing compared"
+    else:
+        regressions, passed = compare(results, baseline, tolerance, min_delta_ms)
+        for difference in comparable(environment, baseline):
+            minor_issues.append({
+                "endpoint": "all",
+                "issue": f"run settings differ from the baseline ({difference})",
+                "impact": "latencies are not directly comparable",
+                "fix_priority": "LOW",
+                "status": "CHECK SETTINGS",
+            })
+        verdict = f"{len(regressions)} regressions against the baseline of {baseline.get('created_at', 'unknown date')}"
+
+    totals = results["totals"]
+    checks = len(passed) + len(regressions)
+    return {
+        "summary": (
+            f"Load benchmark: {totals['requests']:,} requests in {results['duration_s']}s at concurrency "
+            f"{environment['concurrency']} ({totals['throughput_rps']} req/s, {totals['errors']} errors) "
+            f"against {environment['members'] or 'existing'} members; {verdict}."
+        ),
+        "created_at": environment["started_at"],
+        "environment": environment,
+        "totals": totals,
+        "endpoints": results["endpoints"],
+        "backend_issues": {"critical_bugs": regressions, "minor_issues": minor_issues},
+        "passed_tests": passed,
+        "success_percentage": f"{round(100 * len(passed) / checks) if checks else 100}%",
+    }
+
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"unknown scenario '{name}' (choose from {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def mongod_available(url: str) -> bool:
+    from pymongo import MongoClient
+    try:
+        MongoClient(url, serverSelectionTimeoutMS=2000).admin.command("ping")
+        return True
+    except Exception:
+        return False
+
+
+async def seed_database(members: int, seed: int) -> dict:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    await client.drop_database(os.environ['DB_NAME'])
+    db = client[os.environ['DB_NAME']]
+    counts = await dataset.load(db, members, seed)
+    now = datetime.now(timezone.utc)
+    await db.users.insert_one({
+        "user_id": "user_load_benchmark", "email": "load-benchmark@example.com",
+        "name": "Load Benchmark", "role": "admin", "created_at": now.isoformat(),
+    })
+    await db.user_sessions.insert_one({
+        "user_id": "user_load_benchmark", "session_token": BENCH_SESSION_TOKEN,
+        "expires_at": (now + timedelta(days=1)).isoformat(), "created_at": now.isoformat(),
+    })
+    client.close()
+    return counts
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=os.environ.copy())
+
+
+def wait_for_server(base_url: str, process: subprocess.Popen, timeout: float = 60) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            httpx.get(f"{base_url}/api/vehicle-options", timeout=2)
+            return True
+        except httpx.HTTPError:
+            time.sleep(0.5)
+    return False
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the API with a realistic request mix")
+    parser.add_argument("--members", type=int, default=10000, help="members to seed (default 10000)")
+    parser.add_argument("--seed", type=int, default=1, help="dataset and workload seed (default 1)")
+    parser.add_argument("--concurrency", type=int, default=8, help="virtual users (default 8)")
+    parser.add_argument("--duration", type=float, default=60, help="measured seconds (default 60)")
+    parser.add_argument("--warmup", type=float, default=10, help="seconds run before measuring (default 10)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (default 1)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="scenario weights, e.g. search=5,dashboard=1 (default: the full mix)")
+    parser.add_argument("--url", help="benchmark this running server instead of starting one")
+    parser.add_argument("--token", help="session token for --url")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file (default benchmarks/load_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%% (default)")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0,
+                        help="ignore p95 increases smaller than this (default 5ms)")
+    parser.add_argument("--report", help="report path (default test_reports/load_<timestamp>.json)")
+    args = parser.parse_args()
+
+    if args.url and not args.token:
+        parser.error("--url needs --token (a session token of an admin)")
+
+    environment = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "members": None if args.url else args.members,
+        "seed": args.seed,
+        "concurrency": args.concurrency,
+        "workers": None if args.url else args.workers,
+        "warmup_s": args.warmup,
+        "mix": args.mix,
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+    process = None
+    if args.url:
+        base_url, token = args.url.rstrip("/"), args.token
+    else:
+        if not mongod_available(os.environ['MONGO_URL']):
+            print(f"ERROR: no mongod at {os.environ['MONGO_URL']}")
+            sys.exit(2)
+        print(f"Seeding '{os.environ['DB_NAME']}' with {args.members:,} members...")
+        started = time.perf_counter()
+        counts = asyncio.run(seed_database(args.members, args.seed))
+        print(f"   {', '.join(f'{v:,} {k}' for k, v in counts.items())} in {time.perf_counter() - started:.1f}s")
+        port = free_port()
+        base_url, token = f"http://127.0.0.1:{port}", BENCH_SESSION_TOKEN
+        process = start_server(port, args.workers)
+        if not wait_for_server(base_url, process):
+            stop_server(process)
+            print("ERROR: the server did not start")
+            sys.exit(2)
+
+    try:
+        print(f"Running {args.concurrency} users for {args.warmup:g}s warmup + {args.duration:g}s...")
+        results = asyncio.run(run_load(base_url, token, args.mix, args.concurrency, args.duration,
+                                       args.warmup, args.seed))
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    report = build_report(results, environment, baseline, args.tolerance, args.min_delta_ms)
+
+    report_path = args.report or os.path.join(
+        REPORTS_DIR, f"load_{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("")
+    print(f"{'endpoint':<36} {'req':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+    for label, e in report["endpoints"].items():
+        print(f"{label:<36} {e['requests']:>7} {e['throughput_rps']:>8} {e['p50_ms']:>8} "
+              f"{e['p95_ms']:>8} {e['p99_ms']:>8} {e['errors']:>5}")
+    print("")
+    print(report["summary"])
+    for issue in report["backend_issues"]["critical_bugs"]:
+        print(f"REGRESSION {issue['endpoint']}: {issue['issue']}")
+    print(f"Report: {report_path}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({key: report[key] for key in ("created_at", "environment", "totals", "endpoints")}, f, indent=2)
+        print(f"Saved baseline: {args.baseline}")
+    elif report["backend_issues"]["critical_bugs"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
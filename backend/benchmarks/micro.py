@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the pure hot-path helpers
+Times the inner loops of the member endpoints on synthetic data
+(benchmarks/dataset.py), with no database or server, so a refactor of one of
+them can be measured on its own:
+
+    sort_member_number_key     sorting members by number (10 < 10A < 10B < 11)
+    member_document_from_row   the bulk upload CSV row -> member document transform
+    report_row                 member report rows (phone/email joins, expiry date)
+    contact_list_changes       contact list dedup over a bulk upload's members
+    hash_password              one PBKDF2 hash
+    verify_password            one PBKDF2 verification
+
+Each benchmark runs its batch repeatedly and keeps the best time per batch.
+Results are compared with the stored baseline (benchmarks/micro_baseline.json):
+a benchmark regresses when it is more than its threshold slower (--tolerance,
+default 25%; password hashing 10%). Password hashing is also flagged when it
+takes less than half the baseline time, which means the work factor dropped. Any
+regression exits with status 1. --save-baseline stores this run as the
+baseline. Compare runs on the same, otherwise idle machine; on a shared
+single-core VM run-to-run noise alone can exceed 25%.
+
+Usage:
+    python3 benchmarks/micro.py
+    python3 benchmarks/micro.py --only report_row --members 50000
+    python3 benchmarks/micro.py --save-baseline
+    python3 benchmarks/micro.py --json
+"""
+
+import os
+import sys
+import csv
+import gc
+import io
+import json
+import time
+import platform
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import server
+import dataset
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'micro_baseline.json')
+DEFAULT_TOLERANCE = 0.25
+# Hashing is a fixed amount of C work; anything outside this band is a change in work factor
+HASH_TOLERANCE = 0.10
+HASH_MIN_RATIO = 0.5
+AS_OF = datetime(2025, 7, 1, tzinfo=timezone.utc)
+
+
+def csv_rows(members: list) -> list:
+    """Upload rows as csv.DictReader hands them to bulk_upload_members: every value a string"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=dataset.MEMBER_CSV_FIELDS)
+    writer.writeheader()
+    for member in members:
+        writer.writerow(dataset.member_csv_row(member))
+    return list(csv.DictReader(io.StringIO(output.getvalue())))
+
+
+def benchmarks(count: int) -> dict:
+    """name -> (function running one batch, items per batch, tolerance, min ratio)"""
+    members = [m for m, _ in dataset.generate(count, seed=1, as_of=AS_OF)]
+    rows = csv_rows(members)
+    now = datetime.now(timezone.utc)
+    stored_hash = server.hash_password("correct horse battery staple")
+
+    def sort_members():
+        sorted(members, key=server.sort_member_number_key)
+
+    def transform_rows():
+        for i, row in enumerate(rows):
+            server.member_document_from_row(row, f"member_{i:012x}", row["member_number"], now)
+
+    def build_report():
+        for m in members:
+            server.report_row(m)
+
+    def dedup_contacts():
+        changes = {}
+        for m in members:
+            server.contact_list_changes(None, m, changes)
+
+    return {
+        "sort_member_number_key": (sort_members, count, DEFAULT_TOLERANCE, None),
+        "member_document_from_row": (transform_rows, count, DEFAULT_TOLERANCE, None),
+        "report_row": (build_report, count, DEFAULT_TOLERANCE, None),
+        "contact_list_changes": (dedup_contacts, count, DEFAULT_TOLERANCE, None),
+        "hash_password": (lambda: server.hash_password("correct horse battery staple"), 1, HASH_TOLERANCE, HASH_MIN_RATIO),
+        "verify_password": (lambda: server.verify_password("correct horse battery staple", stored_hash), 1,
+                            HASH_TOLERANCE, HASH_MIN_RATIO),
+    }
+
+
+def best_of(fn, repeat: int, min_seconds: float) -> float:
+    """Best seconds per call, each sample running fn enough times to last min_seconds"""
+    start = time.perf_counter()
+    fn()
+    loops = max(1, int(min_seconds / max(time.perf_counter() - start, 1e-9)))
+    best = float("inf")
+    # As timeit does: a collection landing in one sample would swamp the difference being measured
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            best = min(best, (time.perf_counter() - start) / loops)
+    finally:
+        gc.enable()
+    return best
+
+
+def compare(results: dict, baseline: dict, tolerance: float = None) -> list:
+    """Regression messages for results against a stored baseline"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("benchmarks", {}).get(name)
+        if not base:
+            continue
+        ratio = result["ns_per_item"] / base["ns_per_item"]
+        allowed = tolerance if tolerance is not None else result["tolerance"]
+        if ratio > 1 + allowed:
+            regressions.append(f"{name}: {ratio:.2f}x the baseline ({base['ns_per_item']:,.0f} -> "
+                               f"{result['ns_per_item']:,.0f} ns per item, threshold +{allowed:.0%})")
+        elif result["min_ratio"] and ratio < result["min_ratio"]:
+            regressions.append(f"{name}: {ratio:.2f}x the baseline, much faster than expected; "
+                               f"check that the work factor was not lowered")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark the pure hot-path helpers")
+    parser.add_argument("--members", type=int, default=10000, help="members per batch (default 10000)")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per benchmark, best kept (default 5)")
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="minimum length of a sample (default 0.2)")
+    parser.add_argument("--only", action="append", help="run only this benchmark (repeatable)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file (default benchmarks/micro_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help=f"allowed slowdown for every benchmark (default {DEFAULT_TOLERANCE * 100:.0f}%%, "
+                             f"hashing {HASH_TOLERANCE * 100:.0f}%%)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    suite = benchmarks(args.members)
+    unknown = set(args.only or []) - set(suite)
+    if unknown:
+        parser.error(f"unknown benchmark {', '.join(sorted(unknown))} (choose from {', '.join(suite)})")
+
+    results = {}
+    for name, (fn, items, tolerance, min_ratio) in suite.items():
+        if args.only and name not in args.only:
+            continue
+        seconds = best_of(fn, args.repeat, args.min_seconds)
+        results[name] = {
+            "items": items,
+            "ms_per_batch": round(seconds * 1000, 3),
+            "ns_per_item": round(seconds / items * 1e9, 1),
+            "tolerance": tolerance,
+            "min_ratio": min_ratio,
+        }
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance) if baseline else []
+
+    if args.json:
+        print(json.dumps({"benchmarks": results, "regressions": regressions}, indent=2))
+    else:
+        print("=" * 72)
+        print(f"Micro-benchmarks - {args.members} members per batch, best of {args.repeat}")
+        print("=" * 72)
+        for name, r in results.items():
+            base = (baseline or {}).get("benchmarks", {}).get(name)
+            change = f"{r['ns_per_item'] / base['ns_per_item']:6.2f}x baseline" if base else "    (no baseline)"
+            print(f"   {name:<26} {r['ms_per_batch']:10.2f} ms {r['ns_per_item']:12,.0f} ns/item  {change}")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "members": args.members,
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "benchmarks": {**(baseline or {}).get("benchmarks", {}), **results},
+            }, f, indent=2)
+        print(f"Saved baseline: {args.baseline}")
+    elif regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Query Plan Check
+Seeds a scratch database on a local mongod, applies the index spec, and runs
+every query shape the API issues through explain("executionStats"). A shape
+fails when its plan contains a COLLSCAN, or when it examines more documents
+per document returned than its threshold allows.
+
+The scratch database (QUERY_PLAN_DB, default query_plan_check) is opened on
+its own client and dropped afterwards unless --keep is given. The check
+refuses to run when QUERY_PLAN_DB names the server's database (DB_NAME, from
+the environment or .env).
+tests/test_query_plans.py runs the same checks under pytest.
+
+Usage:
+    python3 benchmarks/query_plans.py                  # 2,000 members
+    python3 benchmarks/query_plans.py --members 20000
+    python3 benchmarks/query_plans.py --json           # machine-readable results
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+QUERY_PLAN_DB = os.environ.get('QUERY_PLAN_DB', 'query_plan_check')
+
+from dotenv import dotenv_values
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import server
+from indexes import apply_indexes
+from serialization import make_members
+
+DEFAULT_MAX_RATIO = 2.0
+
+# Seeded values the lookups use; make_members numbers member_ids from 1
+SAMPLE_MEMBER_ID = f"member_{7:012x}"
+SAMPLE_REGISTRATION = "REG00007"
+SAMPLE_SESSION_TOKEN = "session_token_0007"
+SAMPLE_USER_ID = "user_0007"
+
+
+def query_shapes() -> list:
+    """
+    Every query the API issues, as (collection, filter, sort, limit) or an
+    aggregation pipeline. allow_collscan marks the few shapes no index can
+    serve, with the reason.
+    """
+    today = datetime.now(timezone.utc)
+    ahead = today + timedelta(days=60)
+    active = {"$ne": True}
+    member_sort = server.MEMBER_NUMBER_SORT
+    member_sort_desc = server.MEMBER_NUMBER_SORT_DESC
+    return [
+        # Member search (GET /api/members and member lookups)
+        {"name": "member_list", "collection": "members", "filter": {}, "sort": member_sort_desc, "limit": 1000},
+        {"name": "member_list_by_name", "collection": "members", "filter": {},
+         "sort": [("name", 1), *member_sort], "limit": 1000},
+        {"name": "member_list_by_expiry", "collection": "members", "filter": {},
+         "sort": [("expiry_date", -1), *member_sort_desc], "limit": 1000},
+        {"name": "member_list_financial", "collection": "members",
+         "filter": {"financial": True, "inactive": active}, "sort": member_sort_desc, "limit": 1000},
+        {"name": "member_list_membership_type", "collection": "members",
+         "filter": {"membership_type": "Family"}, "sort": member_sort_desc, "limit": 1000},
+        {"name": "member_list_interest", "collection": "members",
+         "filter": {"interest": "Both"}, "sort": member_sort_desc, "limit": 1000},
+        {"name": "member_by_number", "collection": "members", "filter": {"member_number": "7"}},
+        {"name": "member_by_id", "collection": "members", "filter": {"member_id": SAMPLE_MEMBER_ID}},
+        {"name": "member_next_number", "collection": "members",
+         "filter": {"member_number_suffix": "", "member_number_num": {"$lt": server.MEMBER_NUMBER_FALLBACK_NUM}},
+         "sort": member_sort_desc, "limit": 1},
+        {"name": "member_search_text", "collection": "members",
+         "filter": {"$or": [{f: {"$regex": "smith", "$options": "i"}} for f in ("name", "email1", "email2")]},
+         "sort": member_sort_desc, "limit": 1000,
+         "allow_collscan": "unanchored case-insensitive regex over three fields"},
+        {"name": "mark_expired", "collection": "members", "filter": {"financial": True}},
+        # Report filters (GET /api/reports/members)
+        {"name": "report_all", "collection": "members", "filter": {}, "sort": member_sort},
+        {"name": "report_unfinancial", "collection": "members",
+         "filter": {"inactive": active, "financial": active}, "sort": member_sort},
+        {"name": "report_with_vehicle", "collection": "members",
+         "filter": {"inactive": active, "vehicle_count": {"$gt": 0}}, "sort": member_sort},
+        {"name": "report_vehicles_expiring_soon", "collection": "members",
+         "filter": {"inactive": active, "active_vehicle_expiries": {"$elemMatch": {
+             "$gte": today.isoformat(timespec="seconds"), "$lte": ahead.isoformat(timespec="seconds")}}},
+         "sort": member_sort},
+        {"name": "report_expired_vehicles", "collection": "members",
+         "filter": {"inactive": active, "next_vehicle_expiry": {"$lt": today.isoformat(timespec="seconds")}},
+         "sort": member_sort},
+        # Contact lists (GET /api/contact-lists and their maintenance)
+        {"name": "contact_list_read", "collection": "contact_list_entries",
+         "filter": {"list": server.contact_list_key("email")}, "sort": server.CONTACT_LIST_ORDER},
+        {"name": "contact_list_interest_read", "collection": "contact_list_entries",
+         "filter": {"list": server.contact_list_key("sms", "Both")}, "sort": server.CONTACT_LIST_ORDER},
+        {"name": "contact_list_prune", "collection": "contact_list_entries", "filter": {"refs": {"$lte": 0}}},
+        {"name": "contact_list_rebuild", "collection": "members",
+         "pipeline": server.contact_list_pipeline(
+             {"inactive": active, "receive_emails": True, "interest": "Both"}, server.CONTACT_FIELDS[True])},
+        # Vehicle lookups
+        {"name": "vehicles_of_member", "collection": "vehicles",
+         "filter": {"member_id": SAMPLE_MEMBER_ID, "archived": False}},
+        {"name": "vehicles_active", "collection": "vehicles", "filter": {"archived": False}, "limit": 1000},
+        {"name": "vehicle_by_id", "collection": "vehicles", "filter": {"vehicle_id": "vehicle_000007"}},
+        {"name": "vehicle_registration_duplicate", "collection": "vehicles",
+         "filter": {"registration": SAMPLE_REGISTRATION, "archived": False}},
+        {"name": "vehicle_registration_search", "collection": "vehicles",
+         "filter": {"registration": {"$regex": "REG0000", "$options": "i"}, "archived": False}},
+        {"name": "vehicle_summary_refresh", "collection": "vehicles",
+         "filter": {"member_id": {"$in": [f"member_{i:012x}" for i in range(1, 51)]}, "archived": False}},
+        {"name": "dashboard_active_vehicles", "collection": "vehicles", "count": True,
+         "filter": {"archived": False, "status": "Active"}},
+        # Delta sync (GET /api/sync); the settle cutoff is in the future so every seeded change counts
+        *({"name": f"sync_settled_{collection}", "collection": collection,
+           "filter": {"sync_at": {"$lte": ahead.isoformat()}}, "sort": [("sync_seq", -1)], "limit": 1}
+          for collection in server.SYNC_COLLECTIONS),
+        {"name": "sync_settled_tombstones", "collection": "sync_tombstones",
+         "filter": {"deleted_at": {"$lte": ahead.isoformat()}}, "sort": [("seq", -1)], "limit": 1},
+        *({"name": f"sync_{collection}", "collection": collection,
+           "filter": {"sync_seq": {"$gt": 100, "$lte": 100000}}, "sort": [("sync_seq", 1)], "limit": 1001}
+          for collection in server.SYNC_COLLECTIONS),
+        {"name": "sync_tombstones", "collection": "sync_tombstones",
+         "filter": {"seq": {"$gt": 10, "$lte": 100000}}, "sort": [("seq", 1)], "limit": 1001},
+        {"name": "sync_reset_check", "collection": "sync_tombstones", "filter": {"collection": server.SYNC_RESET}},
+        {"name": "sync_backfill", "collection": "members", "filter": {"sync_seq": {"$exists": False}}},
+        # Session lookups (every authenticated request)
+        {"name": "session_by_token", "collection": "user_sessions", "filter": {"session_token": SAMPLE_SESSION_TOKEN}},
+        {"name": "user_by_id", "collection": "users", "filter": {"user_id": SAMPLE_USER_ID}},
+        {"name": "user_by_email", "collection": "users", "filter": {"email": "user7@example.com"}},
+    ]
+
+
+def refuse_server_database(name: str):
+    """Seeding drops every collection: never do it to the database the server uses"""
+    protected = {server.db_name, dotenv_values(server.ROOT_DIR / '.env').get('DB_NAME')}
+    if name in protected:
+        raise RuntimeError(f"refusing to seed or drop {name!r}: it is the server's database (set QUERY_PLAN_DB)")
+
+
+async def seed(db, members: int, seed_value: int = 1):
+    """
+    Members in the stored format, ~0.7 vehicles each, and one user/session per
+    20 members. Drops everything in db first; server.db must point at db.
+    """
+    refuse_server_database(db.name)
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    for name in await db.list_collection_names():
+        await db[name].drop()
+    await apply_indexes(db)
+
+    docs = make_members(members, seed_value)
+    await db.members.insert_many(docs)
+
+    vehicles = []
+    for i, m in enumerate(docs, start=1):
+        for _ in range(rng.choice([0, 0, 1, 1, 1, 2])):
+            n = len(vehicles) + 1
+            vehicles.append({
+                "vehicle_id": f"vehicle_{n:06d}",
+                "member_id": m["member_id"],
+                "log_book_number": f"LB{n:05d}",
+                "entry_date": (now - timedelta(days=rng.randint(0, 700))).isoformat(),
+                "expiry_date": (now + timedelta(days=rng.randint(-365, 365))).isoformat(),
+                "make": "Holden", "body_style": "Sedan", "model": "Commodore", "year": 1990,
+                "registration": f"REG{n:05d}",
+                "status": rng.choice(["Active", "Active", "Active", "Cancelled"]),
+                "reason": "",
+                "archived": rng.random() < 0.1,
+                "created_at": now.isoformat(), "updated_at": now.isoformat(),
+            })
+    if vehicles:
+        await db.vehicles.insert_many(vehicles)
+
+    users = [{
+        "user_id": f"user_{i:04d}", "email": f"user{i}@example.com", "name": f"User {i}",
+        "role": rng.choice(["admin", "full_editor", "member_editor"]), "created_at": now.isoformat(),
+    } for i in range(1, max(members // 20, 10) + 1)]
+    await db.users.insert_many(users)
+    await db.user_sessions.insert_many([{
+        "user_id": u["user_id"], "session_token": f"session_token_{i:04d}",
+        "expires_at": (now + timedelta(days=7)).isoformat(), "created_at": now.isoformat(),
+    } for i, u in enumerate(users, start=1)])
+
+    await server.rebuild_vehicle_summaries()
+    await server.rebuild_contact_lists()
+    await server.backfill_sync_stamps()
+    await server.record_tombstones("vehicles", [f"vehicle_deleted_{i:04d}" for i in range(1, 51)])
+
+
+def _walk(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _walk(value)
+
+
+def plan_summary(explain: dict) -> dict:
+    """Stages, index names and examined/returned counts from any explain() output shape"""
+    planner = [n["queryPlanner"] for n in _walk(explain) if "queryPlanner" in n]
+    stages, index_names = [], []
+    for plan in planner:
+        for n in _walk(plan.get("winningPlan", {})):
+            if "stage" in n:
+                stages.append(n["stage"])
+            if "indexName" in n:
+                index_names.append(n["indexName"])
+    stats = next((n["executionStats"] for n in _walk(explain) if "executionStats" in n), {})
+    examined = stats.get("totalDocsExamined", 0)
+    returned = stats.get("nReturned", 0)
+    return {
+        "stages": stages,
+        "indexes": sorted(set(index_names)),
+        "docs_examined": examined,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "returned": returned,
+        "ratio": round(examined / max(returned, 1), 2),
+    }
+
+
+async def explain_shape(db, shape: dict) -> dict:
+    collection = shape["collection"]
+    if "pipeline" in shape:
+        command = {"aggregate": collection, "pipeline": shape["pipeline"], "cursor": {}}
+    elif shape.get("count"):
+        command = {"count": collection, "query": shape["filter"]}
+    else:
+        command = {"find": collection, "filter": shape["filter"]}
+        if shape.get("sort"):
+            command["sort"] = dict(shape["sort"])
+        if shape.get("limit"):
+            command["limit"] = shape["limit"]
+    return await db.command({"explain": command, "verbosity": "executionStats"})
+
+
+def plan_problems(shape: dict, summary: dict, max_ratio: float) -> list:
+    problems = []
+    if "COLLSCAN" in summary["stages"] and not shape.get("allow_collscan"):
+        problems.append("COLLSCAN")
+    limit = shape.get("max_ratio", max_ratio)
+    if not shape.get("allow_collscan") and summary["ratio"] > limit:
+        problems.append(f"examined/returned {summary['ratio']} > {limit}")
+    return problems
+
+
+async def check_all(members: int = 2000, max_ratio: float = DEFAULT_MAX_RATIO, keep: bool = False) -> dict:
+    """Seed, explain every shape, and return {shape name: summary with its problems}"""
+    refuse_server_database(QUERY_PLAN_DB)
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[QUERY_PLAN_DB]
+    # The seeding helpers (vehicle summaries, contact lists, sync stamps) write through server.db
+    previous = server.db
+    server.db = db
+    try:
+        await seed(db, members)
+        results = {}
+        for shape in query_shapes():
+            summary = plan_summary(await explain_shape(db, shape))
+            summary["problems"] = plan_problems(shape, summary, max_ratio)
+            if shape.get("allow_collscan"):
+                summary["allowed"] = shape["allow_collscan"]
+            results[shape["name"]] = summary
+        return results
+    finally:
+        server.db = previous
+        if not keep:
+            await client.drop_database(db.name)
+        client.close()
+
+
+def mongod_available() -> bool:
+    from pymongo import MongoClient
+    client = MongoClient(os.environ['MONGO_URL'], serverSelectionTimeoutMS=2000)
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the query plan of every API query shape")
+    parser.add_argument("--members", type=int, default=2000, help="members to seed (default 2000)")
+    parser.add_argument("--max-ratio", type=float, default=DEFAULT_MAX_RATIO,
+                        help=f"documents examined per document returned (default {DEFAULT_MAX_RATIO})")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database afterwards")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if not mongod_available():
+        print(f"ERROR: no mongod at {os.environ['MONGO_URL']}")
+        sys.exit(2)
+
+    results = asyncio.run(check_all(args.members, args.max_ratio, args.keep))
+    failed = [name for name, r in results.items() if r["problems"]]
+
+    if args.json:
+        print(json.dumps({"members": args.members, "failed": failed, "results": results}, indent=2))
+    else:
+        print(f"{'shape':34} {'examined':>9} {'returned':>9} {'ratio':>7}  plan")
+        for name, r in results.items():
+            status = "FAIL " + ", ".join(r["problems"]) if r["problems"] else ("allowed: " + r["allowed"] if "allowed" in r else "ok")
+            print(f"{name:34} {r['docs_examined']:>9} {r['returned']:>9} {r['ratio']:>7}  "
+                  f"{'>'.join(r['stages'])} [{', '.join(r['indexes'])}] {status}")
+        print("")
+        print(f"{len(failed)} of {len(results)} query shapes failed" if failed else f"All {len(results)} query shapes ok")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Serialization Benchmark for the member list response
+Compares the old response_model path of GET /api/members (parse every date
+string, validate List[Member], serialize) with the trusted-document fast path.
+No database is needed; documents are generated in the stored format.
+
+Usage:
+    python3 benchmarks/serialization.py             # 10,000 members
+    python3 benchmarks/serialization.py --count 50000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import List
+from datetime import datetime, timezone, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+import server
+from server import Member
+
+def make_members(count: int, seed: int = 1) -> List[dict]:
+    """Member documents as create_member/bulk_upload_members store them"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    members = []
+    for i in range(1, count + 1):
+        number = f"{i}{rng.choice(['', '', '', 'A', 'B'])}"
+        paid = now - timedelta(days=rng.randint(0, 400))
+        members.append({
+            "member_id": f"member_{i:012x}",
+            "member_number": number,
+            **server.member_number_sort_fields(number),
+            "name": f"Member {i}",
+            "address": f"{rng.randint(1, 200)} Main Road",
+            "suburb": rng.choice(["Newcastle", "Adamstown", "Merewether", "Wallsend"]),
+            "postcode": str(rng.randint(2280, 2310)),
+            "state": "NSW",
+            "phone1": f"04{rng.randint(10000000, 99999999)}",
+            "phone2": None,
+            "email1": f"member{i}@example.com",
+            "email2": None,
+            "life_member": rng.random() < 0.05,
+            "financial": rng.random() < 0.7,
+            "inactive": rng.random() < 0.1,
+            "membership_type": rng.choice(["Full", "Family", "Junior"]),
+            "family_members": None,
+            "interest": rng.choice(["Drag Racing", "Car Enthusiast", "Both"]),
+            "date_paid": paid.isoformat(),
+            "expiry_date": (paid + timedelta(days=365)).isoformat(),
+            "comments": None,
+            "receive_emails": True,
+            "receive_sms": rng.random() < 0.8,
+            "created_at": paid.isoformat(),
+            "updated_at": now.isoformat(),
+        })
+    return members
+
+member_list = TypeAdapter(List[Member])
+
+def response_model_path(docs: List[dict]) -> bytes:
+    """What get_members did before: parse dates by hand, then FastAPI validates and serializes"""
+    for m in docs:
+        for field in ['created_at', 'updated_at', 'date_paid', 'expiry_date']:
+            if field in m and isinstance(m[field], str):
+                m[field] = datetime.fromisoformat(m[field])
+    content = member_list.dump_python(member_list.validate_python(docs), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+def fast_path(docs: List[dict]) -> bytes:
+    return server.json_bytes(server.response_documents(docs, Member))
+
+def validated_fast_path(docs: List[dict]) -> bytes:
+    server.VALIDATE_RESPONSES = True
+    try:
+        return server.json_bytes(server.response_documents(docs, Member))
+    finally:
+        server.VALIDATE_RESPONSES = False
+
+def best_of(fn, source: List[dict], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        docs = [dict(d) for d in source]  # fresh copies, as from a new query
+        start = time.perf_counter()
+        fn(docs)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print(f"Member list serialization - {args.count} members, best of {args.repeat}")
+    print(f"orjson: {'installed' if server.orjson else 'not installed (json fallback)'}")
+    print("=" * 60)
+    
+    source = make_members(args.count)
+    baseline = best_of(response_model_path, source, args.repeat)
+    results = [
+        ("response_model (old)", baseline),
+        ("fast path", best_of(fast_path, source, args.repeat)),
+        ("fast path + TypeAdapter", best_of(validated_fast_path, source, args.repeat)),
+    ]
+    for name, seconds in results:
+        print(f"   {name:<26} {seconds * 1000:9.1f} ms   {baseline / seconds:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Response compression middleware.
+
+Compresses JSON, CSV and other text responses with brotli when the client
+accepts it and the brotli package is installed, otherwise with gzip.
+Works with streamed responses (CSV exports) as well as buffered ones.
+A route opts out by setting its own Content-Encoding (e.g. "identity"),
+or by being listed in COMPRESSION_EXCLUDE_PATHS.
+
+Settings (environment):
+    COMPRESSION_MINIMUM_SIZE   Smallest body in bytes worth compressing (default 1024)
+    COMPRESSION_GZIP_LEVEL     gzip level 1-9 (default 6)
+    COMPRESSION_BROTLI_QUALITY brotli quality 0-11 (default 5)
+    COMPRESSION_EXCLUDE_PATHS  Comma-separated path prefixes never compressed
+"""
+
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "text/",
+)
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """Pick 'br', 'gzip' or '' from an Accept-Encoding header, honouring q=0"""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    wildcard = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return ""
+
+
+class StreamCompressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 16+ writes a gzip header and trailer
+            self.compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.flush()
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(data) + self.compressor.finish()
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = None,
+        gzip_level: int = None,
+        brotli_quality: int = None,
+        exclude_paths=None,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.environ.get('COMPRESSION_MINIMUM_SIZE', '1024'))
+        self.gzip_level = gzip_level if gzip_level is not None else int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+        self.brotli_quality = brotli_quality if brotli_quality is not None else int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+        if exclude_paths is None:
+            exclude_paths = [p.strip() for p in os.environ.get('COMPRESSION_EXCLUDE_PATHS', '').split(',') if p.strip()]
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (self.exclude_paths and scope["path"].startswith(self.exclude_paths)):
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        responder = CompressionResponder(self.app, self, encoding)
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    def __init__(self, app: ASGIApp, settings: CompressionMiddleware, encoding: str) -> None:
+        self.app = app
+        self.settings = settings
+        self.encoding = encoding
+        self.send = None
+        self.initial_message = None
+        self.compressor = None
+        self.passthrough = False
+        self.started = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_compress(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if self.initial_message["status"] < 200 or self.initial_message["status"] in (204, 304):
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _start_compressed(self, streaming: bool) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # A weak ETag still identifies the same content after encoding; make strong ones weak
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        if streaming:
+            del headers["Content-Length"]
+        self.compressor = StreamCompressor(self.encoding, self.settings.gzip_level, self.settings.brotli_quality)
+        return headers
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # Hold the start message until the first body chunk shows whether to compress
+            self.initial_message = message
+            self.passthrough = not self._should_compress(Headers(raw=message["headers"]))
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.passthrough:
+            if not self.started:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        if not self.started:
+            self.started = True
+            if not more_body:
+                if len(body) < self.settings.minimum_size:
+                    await self.send(self.initial_message)
+                    await self.send(message)
+                    return
+                headers = self._start_compressed(streaming=False)
+                body = self.compressor.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.initial_message)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            self._start_compressed(streaming=True)
+            await self.send(self.initial_message)
+
+        if more_body:
+            chunk = self.compressor.compress(body)
+        else:
+            chunk = self.compressor.finish(body)
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,161 @@
+"""
+Declarative MongoDB index spec.
+
+INDEXES lists, per collection, every index the API's queries rely on. The
+server applies it on startup, so a fresh install never runs on collection
+scans; creating an index that already exists is a no-op. init_database.py
+--init applies the same spec.
+
+index_report() compares the spec with the database:
+    missing  declared but not present (e.g. creation failed on duplicate data)
+    extra    present but not declared (left over from an older spec, or made by hand)
+    unused   present but never used since the server started ($indexStats);
+             _id and unique indexes are left out because they enforce constraints
+
+Settings (environment):
+    INDEX_APPLY_ON_STARTUP  Create missing indexes when the server starts (default true)
+"""
+
+import logging
+import os
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_APPLY_ON_STARTUP = os.environ.get('INDEX_APPLY_ON_STARTUP', 'true').lower() in ('1', 'true', 'yes')
+
+
+def index(*keys, **options) -> dict:
+    """One index: field names (ascending) or (field, direction) pairs, plus create_index options"""
+    key = [(k, 1) if isinstance(k, str) else tuple(k) for k in keys]
+    return {"key": key, "options": options}
+
+
+# Member number order (see member_number_sort_fields in server.py)
+MEMBER_NUMBER = ["member_number_num", "member_number_suffix"]
+
+INDEXES = {
+    "users": [
+        index("user_id", unique=True),
+        index("email", unique=True),
+        index("role"),
+    ],
+    "user_sessions": [
+        index("session_token", unique=True),
+        index("user_id"),
+        index("expires_at"),
+    ],
+    "members": [
+        index("member_id", unique=True),
+        index("member_number"),
+        index("email1"),
+        # Member list: the default sort, the other sorts (member number breaks ties),
+        # then each filter followed by the sort
+        index(*MEMBER_NUMBER),
+        index("name", *MEMBER_NUMBER),
+        index("expiry_date", *MEMBER_NUMBER),
+        index("inactive", "financial", *MEMBER_NUMBER),
+        index("membership_type", *MEMBER_NUMBER),
+        index("interest", *MEMBER_NUMBER),
+        # Mark expired
+        index("financial"),
+        # Report filters on the vehicle summary
+        index("vehicle_count", *MEMBER_NUMBER),
+        index("next_vehicle_expiry"),
+        index("active_vehicle_expiries"),
+        # Contact list rebuild: the filter fields, then everything contact_list_pipeline
+        # reads, so the aggregation's query stage is answered from the index
+        index("inactive", "receive_emails", "interest", *MEMBER_NUMBER, "email1", "email2", "member_id"),
+        index("inactive", "receive_sms", "interest", *MEMBER_NUMBER, "phone1", "phone2", "member_id"),
+        # Delta sync
+        index("sync_seq"),
+    ],
+    "vehicles": [
+        index("vehicle_id", unique=True),
+        # Vehicles of a member, and vehicle summary refreshes
+        index("member_id", "archived"),
+        # Registration search and the bulk upload duplicate check
+        index("registration", "archived"),
+        index("log_book_number"),
+        # Dashboard vehicle counts
+        index("archived", "status"),
+        index("sync_seq"),
+    ],
+    "vehicle_options": [
+        index("option_id", unique=True),
+        index("type"),
+        index("sync_seq"),
+    ],
+    "contact_list_entries": [
+        index("list", "contact", unique=True),
+        index("list", "n", "s", "slot"),
+        # Removing entries whose last reference went away
+        index("refs"),
+    ],
+    "sync_tombstones": [
+        index("seq", unique=True),
+        # The clear-all-data reset marker
+        index("collection", "seq"),
+    ],
+}
+
+
+def _key(key) -> tuple:
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in key)
+
+
+def _name(key) -> str:
+    """MongoDB's default name for an index on key"""
+    return "_".join(f"{field}_{direction}" for field, direction in key)
+
+
+async def apply_indexes(db, spec: dict = None) -> dict:
+    """Create every declared index that does not exist yet; returns {collection: [names created]}"""
+    spec = INDEXES if spec is None else spec
+    created = {}
+    for collection, indexes in spec.items():
+        existing = {_key(info["key"]) for info in (await db[collection].index_information()).values()}
+        for ix in indexes:
+            if _key(ix["key"]) in existing:
+                continue
+            try:
+                name = await db[collection].create_index(ix["key"], **ix["options"])
+            except OperationFailure as e:
+                # e.g. a unique index over duplicate data; index_report() lists it as missing
+                logger.error(f"Could not create index {ix['key']} on {collection}: {e}")
+                continue
+            created.setdefault(collection, []).append(name)
+    return created
+
+
+async def index_usage(db, collection: str) -> dict:
+    """{index name: operations since the server started}, or None where $indexStats is unavailable"""
+    try:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+    except Exception:
+        return None
+    return {s["name"]: s.get("accesses", {}).get("ops", 0) for s in stats}
+
+
+async def index_report(db, spec: dict = None) -> dict:
+    spec = INDEXES if spec is None else spec
+    report = {}
+    for collection, indexes in spec.items():
+        info = await db[collection].index_information()
+        existing = {_key(i["key"]): name for name, i in info.items()}
+        declared = [_key(ix["key"]) for ix in indexes]
+        usage = await index_usage(db, collection)
+        unused = None
+        if usage is not None:
+            unused = sorted(
+                name for name, ops in usage.items()
+                if ops == 0 and name != "_id_" and name in info and not info[name].get("unique")
+            )
+        report[collection] = {
+            "missing": [_name(key) for key in declared if key not in existing],
+            "extra": sorted(name for key, name in existing.items() if key not in declared and name != "_id_"),
+            "unused": unused,
+        }
+    return report
@@ -7,6 +7,11 @@ Usage:
     python3 init_database.py --check    # Check connection and collections
     python3 init_database.py --init     # Initialize collections and indexes
     python3 init_database.py --env      # Show what env vars are being used
+    python3 init_database.py --rebuild-summaries  # Recompute member vehicle summaries
+    python3 init_database.py --migrate-to-sqlite  # Copy the MongoDB data into the SQLite file
+
+With DB_BACKEND=sqlite in .env, --check and --init work on the SQLite file
+(SQLITE_DIR/DB_NAME.sqlite3) instead of MongoDB.
 """
 
 import os
@@ -21,6 +26,19 @@ try:
 except ImportError:
     print("Note: python-dotenv not installed, using system environment variables")
 
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def sqlite_dir():
+    return os.environ.get('SQLITE_DIR', os.path.join(BACKEND_DIR, 'data'))
+
+def open_client(mongo_url):
+    """A client for the configured backend: MongoDB, or the SQLite file with DB_BACKEND=sqlite"""
+    if os.environ.get('DB_BACKEND', 'mongo').lower() == 'sqlite':
+        import sqlite_store
+        return sqlite_store.SQLiteClient(sqlite_dir())
+    from motor.motor_asyncio import AsyncIOMotorClient
+    return AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+
 async def check_connection():
     """Check if MongoDB is accessible"""
     try:
@@ -39,15 +57,17 @@ async def check_connection():
     else:
         print(f"   MONGO_URL: {mongo_url}")
     print(f"   DB_NAME: {db_name}")
+    if os.environ.get('DB_BACKEND', 'mongo').lower() == 'sqlite':
+        print(f"   DB_BACKEND: sqlite ({os.path.join(sqlite_dir(), db_name + '.sqlite3')})")
     
     try:
         print("")
-        print("Attempting to connect to MongoDB...")
-        client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        print("Attempting to connect to the database...")
+        client = open_client(mongo_url)
         
         # Test connection
         await client.admin.command('ping')
-        print("SUCCESS: MongoDB connection successful!")
+        print("SUCCESS: Database connection successful!")
         
         db = client[db_name]
         
@@ -66,7 +86,7 @@ async def check_connection():
         return True
         
     except Exception as e:
-        print(f"ERROR: MongoDB connection failed: {e}")
+        print(f"ERROR: Database connection failed: {e}")
         return False
 
 async def init_database():
@@ -84,13 +104,13 @@ async def init_database():
     print(f"Initializing database '{db_name}'...")
     
     try:
-        client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        client = open_client(mongo_url)
         await client.admin.command('ping')
         
         db = client[db_name]
         
         # Create collections if they don't exist
-        collections_to_create = ['users', 'members', 'vehicles', 'user_sessions', 'vehicle_options']
+        collections_to_create = ['users', 'members', 'vehicles', 'user_sessions', 'vehicle_options', 'contact_list_entries']
         existing = await db.list_collection_names()
         
         for col_name in collections_to_create:
@@ -100,39 +120,22 @@ async def init_database():
             else:
                 print(f"   Collection exists: {col_name}")
         
-        # Create indexes
+        # Create indexes from the same declarative spec the server applies on startup
         print("")
         print("Creating indexes...")
+        from indexes import apply_indexes, index_report
+        created = await apply_indexes(db)
+        for col_name, names in created.items():
+            print(f"   {col_name}: created {', '.join(names)}")
+        if not created:
+            print("   All indexes already exist")
         
-        # Users indexes
-        await db.users.create_index("user_id", unique=True)
-        await db.users.create_index("email", unique=True)
-        print("   users indexes created")
-        
-        # Members indexes
-        await db.members.create_index("member_id", unique=True)
-        await db.members.create_index("member_number")
-        await db.members.create_index("name")
-        await db.members.create_index("email1")
-        print("   members indexes created")
-        
-        # Vehicles indexes
-        await db.vehicles.create_index("vehicle_id", unique=True)
-        await db.vehicles.create_index("member_id")
-        await db.vehicles.create_index("registration")
-        await db.vehicles.create_index("log_book_number")
-        print("   vehicles indexes created")
-        
-        # Sessions indexes
-        await db.user_sessions.create_index("session_token", unique=True)
-        await db.user_sessions.create_index("user_id")
-        await db.user_sessions.create_index("expires_at")
-        print("   user_sessions indexes created")
-        
-        # Vehicle options indexes
-        await db.vehicle_options.create_index("option_id", unique=True)
-        await db.vehicle_options.create_index("type")
-        print("   vehicle_options indexes created")
+        report = await index_report(db)
+        for col_name, drift in report.items():
+            if drift["missing"]:
+                print(f"   WARNING {col_name}: could not create {', '.join(drift['missing'])}")
+            if drift["extra"]:
+                print(f"   {col_name}: undeclared indexes {', '.join(drift['extra'])}")
         
         # Add default vehicle options if empty
         options_count = await db.vehicle_options.count_documents({})
@@ -163,6 +166,69 @@ async def init_database():
         print(f"ERROR: Database initialization failed: {e}")
         return False
 
+async def rebuild_summaries():
+    """Recompute vehicle_count / active_vehicle_count / next_vehicle_expiry on every member"""
+    print("")
+    print("Rebuilding member vehicle summaries...")
+    try:
+        # Same code path as the server's startup and admin rebuild
+        import server
+        updated = await server.rebuild_vehicle_summaries()
+        await server.bump_data_version("vehicles")
+        server.client.close()
+        print(f"   {updated} members updated")
+        return True
+    except Exception as e:
+        print(f"ERROR: Rebuild failed: {e}")
+        return False
+
+async def migrate_to_sqlite():
+    """Copy every collection of the MongoDB database into SQLITE_DIR/DB_NAME.sqlite3"""
+    try:
+        from motor.motor_asyncio import AsyncIOMotorClient
+    except ImportError:
+        print("ERROR: motor not installed. Run: pip install motor")
+        return False
+    import sqlite_store
+    from indexes import apply_indexes
+    
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    db_name = os.environ.get('DB_NAME', 'dragclub_db')
+    target = sqlite_store.SQLiteClient(sqlite_dir())
+    
+    print("")
+    print(f"Copying MongoDB '{db_name}' to {os.path.join(sqlite_dir(), db_name + '.sqlite3')}...")
+    if db_name in await target.list_database_names():
+        print("ERROR: The SQLite file already exists; move it away first")
+        return False
+    
+    try:
+        source_client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        source = source_client[db_name]
+        destination = target[db_name]
+        for col_name in sorted(await source.list_collection_names()):
+            copied = 0
+            batch = []
+            async for doc in source[col_name].find({}):
+                batch.append(doc)
+                if len(batch) >= 1000:
+                    await destination[col_name].insert_many(batch)
+                    copied += len(batch)
+                    batch = []
+            if batch:
+                await destination[col_name].insert_many(batch)
+                copied += len(batch)
+            print(f"   {col_name}: {copied} documents")
+        await apply_indexes(destination)
+        source_client.close()
+        target.close()
+        print("")
+        print("Copy complete. Set DB_BACKEND=sqlite in .env and restart the server.")
+        return True
+    except Exception as e:
+        print(f"ERROR: Copy failed: {e}")
+        return False
+
 def show_env():
     """Show environment variable status"""
     print("")
@@ -226,6 +292,8 @@ async def main():
         print("  python3 init_database.py --init     Initialize database")
         print("  python3 init_database.py --env      Show environment")
         print("  python3 init_database.py --all      Run all checks and init")
+        print("  python3 init_database.py --rebuild-summaries  Recompute member vehicle summaries")
+        print("  python3 init_database.py --migrate-to-sqlite  Copy the MongoDB data into the SQLite file")
         return
     
     arg = sys.argv[1]
@@ -239,6 +307,12 @@ async def main():
     if arg == '--init' or arg == '--all':
         await init_database()
     
+    if arg == '--rebuild-summaries':
+        await rebuild_summaries()
+    
+    if arg == '--migrate-to-sqlite':
+        await migrate_to_sqlite()
+    
     print("")
     print("=" * 60)
 
@@ -0,0 +1,144 @@
+"""
+Per-request MongoDB command instrumentation.
+
+CommandTimer is a pymongo CommandListener registered on the Motor client.
+Every command it sees is attributed to the request that issued it through the
+request_stats context variable, which ServerTimingMiddleware sets for each HTTP
+request. Motor copies the context into the executor thread that runs the
+command, so the listener finds the right request even with concurrent requests.
+
+Each response gets a Server-Timing header, e.g.
+    Server-Timing: db;dur=12.4;desc="7 commands", app;dur=31.0
+which browser dev tools show under the request's Timing tab.
+
+Commands slower than SLOW_QUERY_MS are logged with the route that issued them
+and the shape of their filter (values replaced by "?"), never the values.
+
+Settings (environment):
+    SLOW_QUERY_MS  Log commands slower than this many milliseconds (default 100, 0 disables)
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("slow_query")
+
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', '100'))
+
+# Command document fields that hold a query, per command
+QUERY_FIELDS = ("filter", "query", "q", "pipeline", "updates", "deletes", "sort")
+
+
+class RequestStats:
+    """Mongo commands issued while serving one request"""
+
+    def __init__(self, scope: Scope = None):
+        self.scope = scope
+        self.commands = 0
+        self.db_seconds = 0.0
+        self.by_command = {}
+        self.lock = threading.Lock()
+
+    @property
+    def route(self) -> str:
+        if not self.scope:
+            return "-"
+        route = self.scope.get("route")
+        path = getattr(route, "path", None) or self.scope.get("path", "")
+        return f"{self.scope.get('method', '')} {path}"
+
+    def record(self, command_name: str, seconds: float):
+        with self.lock:
+            self.commands += 1
+            self.db_seconds += seconds
+            self.by_command[command_name] = self.by_command.get(command_name, 0) + 1
+
+
+request_stats: contextvars.ContextVar = contextvars.ContextVar("request_stats", default=None)
+
+
+def query_shape(value):
+    """The structure of a query with every literal replaced by "?" """
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = []
+        for v in value:
+            shape = query_shape(v)
+            if shape not in shapes:
+                shapes.append(shape)
+        return shapes
+    return "?"
+
+
+def command_shape(command: dict) -> dict:
+    return {f: query_shape(command[f]) for f in QUERY_FIELDS if f in command}
+
+
+class CommandTimer(monitoring.CommandListener):
+    def __init__(self, slow_query_ms: float = None):
+        self.slow_query_ms = SLOW_QUERY_MS if slow_query_ms is None else slow_query_ms
+        # Started commands, kept only so a slow one can be logged with its filter
+        self.pending = {}
+
+    def _key(self, event):
+        return (event.connection_id, event.request_id)
+
+    def started(self, event):
+        if self.slow_query_ms > 0:
+            self.pending[self._key(event)] = (event.database_name, event.command)
+
+    def _finished(self, event):
+        started = self.pending.pop(self._key(event), None)
+        seconds = event.duration_micros / 1e6
+        stats = request_stats.get()
+        if stats is not None:
+            stats.record(event.command_name, seconds)
+        if self.slow_query_ms > 0 and seconds * 1000 >= self.slow_query_ms and started:
+            database, command = started
+            collection = command.get(event.command_name)
+            logger.warning(
+                f"{seconds * 1000:.1f}ms {event.command_name} {database}.{collection} "
+                f"from {stats.route if stats else '-'}: {command_shape(command)}"
+            )
+
+    def succeeded(self, event):
+        self._finished(event)
+
+    def failed(self, event):
+        self._finished(event)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.commands} commands", app;dur={total_ms:.1f}'
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
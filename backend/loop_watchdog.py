@@ -0,0 +1,106 @@
+"""
+Event-loop blocking watchdog (opt-in).
+
+A heartbeat task on the event loop records the time every few milliseconds.
+A separate thread watches the heartbeat; when it stops for longer than
+LOOP_WATCHDOG_MS, something is running on the loop without awaiting (PBKDF2,
+CSV parsing, report building...). The thread then captures the loop thread's
+stack and the route of the request whose task is running, logs both once for
+that stall, and counts it in event_loop_blocked_total{route} on /api/metrics.
+
+Settings (environment):
+    LOOP_WATCHDOG_MS  Report stalls longer than this many milliseconds (default 0, off)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+
+logger = logging.getLogger("loop_watchdog")
+
+LOOP_WATCHDOG_MS = float(os.environ.get('LOOP_WATCHDOG_MS', '0'))
+
+
+def _running_task(loop):
+    # asyncio keeps the task each loop is running in a module-level dict; reading it
+    # from another thread is safe under the GIL and is the only way to ask
+    current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+    return current_tasks.get(loop) if current_tasks is not None else None
+
+
+class LoopWatchdog:
+    def __init__(self, threshold_ms: float):
+        self.threshold = threshold_ms / 1000
+        self.interval = max(self.threshold / 4, 0.01)
+        self.beat = time.monotonic()
+        self.reported_beat = None
+        self.loop = None
+        self.loop_thread_id = None
+        self.heartbeat_task = None
+        self.stopped = threading.Event()
+        # Running request task -> ASGI scope, filled in by WatchdogMiddleware
+        self.requests = {}
+
+    def start(self):
+        """Call from the event loop (a startup handler)"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat_task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.heartbeat_task:
+            self.heartbeat_task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            self.beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _watch(self):
+        while not self.stopped.wait(self.interval):
+            beat = self.beat
+            # The heartbeat itself sleeps for one interval between beats
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == self.reported_beat:
+                continue
+            self.reported_beat = beat
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "(stack unavailable)\n"
+            route = self.running_route()
+            metrics.loop_blocked.inc(route)
+            logger.warning(f"Event loop blocked for over {blocked * 1000:.0f}ms in {route}\n{stack.rstrip()}")
+
+    def running_route(self) -> str:
+        scope = self.requests.get(_running_task(self.loop))
+        if scope is not None:
+            return f"{scope.get('method', '')} {metrics.route_label(scope)}"
+        # Not a request task (background work, or a streamed body); name what is in flight
+        in_flight = sorted({f"{s.get('method', '')} {metrics.route_label(s)}" for s in list(self.requests.values())})
+        return f"a non-request task (in flight: {', '.join(in_flight) or 'none'})"
+
+
+class WatchdogMiddleware:
+    def __init__(self, app: ASGIApp, watchdog: LoopWatchdog) -> None:
+        self.app = app
+        self.watchdog = watchdog
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.watchdog.requests[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.watchdog.requests.pop(task, None)
@@ -0,0 +1,193 @@
+"""
+Memory instrumentation (opt-in).
+
+MEMORY_TRACKING=1 adds MemoryMiddleware, which reads the process RSS before
+and after every request. Per route it keeps the largest RSS growth seen and
+how often a request pushed the process to a new peak RSS (ru_maxrss). Those
+requests are the ones to look at on a 2 GB board. A request that raises the
+peak by more than MEMORY_LOG_MB is logged. Concurrent requests share one
+process, so a route's numbers include whatever ran alongside it.
+
+TRACEMALLOC_FRAMES=<n> starts tracemalloc with n frames per allocation. It
+slows Python down noticeably, so only turn it on while investigating. Admins
+can then list the top allocation sites and take snapshots to diff (see the
+/api/admin/memory endpoints). Snapshots are kept in this process only; the
+newest MEMORY_SNAPSHOT_RETENTION are kept.
+
+The process RSS and peak RSS are always exported on /api/metrics.
+
+Settings (environment):
+    MEMORY_TRACKING            Per-request RSS accounting (default 0)
+    MEMORY_LOG_MB              Log requests raising the peak RSS by more than this (default 20)
+    TRACEMALLOC_FRAMES         Start tracemalloc with this many frames (default 0, off)
+    MEMORY_SNAPSHOT_RETENTION  tracemalloc snapshots kept (default 5)
+"""
+
+import logging
+import os
+import resource
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+
+logger = logging.getLogger("memory")
+
+MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', '0').lower() in ('1', 'true', 'yes')
+MEMORY_LOG_MB = float(os.environ.get('MEMORY_LOG_MB', '20'))
+TRACEMALLOC_FRAMES = int(os.environ.get('TRACEMALLOC_FRAMES', '0'))
+MEMORY_SNAPSHOT_RETENTION = int(os.environ.get('MEMORY_SNAPSHOT_RETENTION', '5'))
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Allocations made by tracemalloc itself and by the import system are noise
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def rss_bytes() -> int:
+    """Current resident set size; falls back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return max_rss_bytes()
+
+
+def max_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# route -> {"requests", "max_rss_growth", "peak_raises", "peak_raised_bytes"}
+route_memory = {}
+
+
+def record_request(route: str, rss_growth: int, peak_raise: int):
+    stats = route_memory.setdefault(route, {"requests": 0, "max_rss_growth": 0, "peak_raises": 0, "peak_raised_bytes": 0})
+    stats["requests"] += 1
+    stats["max_rss_growth"] = max(stats["max_rss_growth"], rss_growth)
+    if peak_raise > 0:
+        stats["peak_raises"] += 1
+        stats["peak_raised_bytes"] += peak_raise
+
+
+class MemoryMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rss_before, peak_before = rss_bytes(), max_rss_bytes()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rss_growth = rss_bytes() - rss_before
+            peak_raise = max_rss_bytes() - peak_before
+            route = f"{scope['method']} {metrics.route_label(scope)}"
+            record_request(route, rss_growth, peak_raise)
+            if peak_raise > MEMORY_LOG_MB * 1024 * 1024:
+                logger.warning(f"{route} raised peak RSS by {peak_raise / 1048576:.1f}MB to {max_rss_bytes() / 1048576:.1f}MB")
+
+
+def process_metrics():
+    rss = metrics.Gauge("process_resident_memory_bytes", "Resident set size")
+    rss.set(rss_bytes())
+    peak = metrics.Gauge("process_max_resident_memory_bytes", "Peak resident set size since the process started")
+    peak.set(max_rss_bytes())
+    raises = metrics.Counter("http_request_peak_rss_raises_total",
+                             "Requests that raised the process peak RSS (MEMORY_TRACKING)", ("route",))
+    for route, stats in route_memory.items():
+        raises.inc(route, amount=stats["peak_raises"])
+    for metric in (rss, peak, raises):
+        yield from metric.render()
+
+
+metrics.register_collector(process_metrics)
+
+
+# tracemalloc snapshots: id -> {"id", "taken_at", "traced_bytes", "snapshot"}
+snapshots = {}
+_next_snapshot_id = 1
+
+
+def start_tracemalloc():
+    if TRACEMALLOC_FRAMES > 0 and not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        logger.info(f"tracemalloc started with {TRACEMALLOC_FRAMES} frames")
+
+
+def _stat(stat, key_type: str) -> dict:
+    frames = stat.traceback if key_type == "traceback" else stat.traceback[:1]
+    return {
+        "site": [f"{f.filename}:{f.lineno}" for f in frames],
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+
+
+def _diff_stat(stat, key_type: str) -> dict:
+    return {**_stat(stat, key_type), "size_diff_bytes": stat.size_diff, "count_diff": stat.count_diff}
+
+
+def take_snapshot() -> dict:
+    """Take and keep a snapshot; returns its description"""
+    global _next_snapshot_id
+    snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    entry = {
+        "id": _next_snapshot_id,
+        "taken_at": datetime.now(timezone.utc).isoformat(),
+        "traced_bytes": tracemalloc.get_traced_memory()[0],
+        "rss_bytes": rss_bytes(),
+        "snapshot": snapshot,
+    }
+    _next_snapshot_id += 1
+    snapshots[entry["id"]] = entry
+    for old in sorted(snapshots)[:-MEMORY_SNAPSHOT_RETENTION]:
+        del snapshots[old]
+    return describe_snapshot(entry)
+
+
+def describe_snapshot(entry: dict) -> dict:
+    return {k: v for k, v in entry.items() if k != "snapshot"}
+
+
+def top_allocations(key_type: str = "lineno", limit: int = 25) -> list:
+    snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+    return [_stat(s, key_type) for s in snapshot.statistics(key_type)[:limit]]
+
+
+def diff_snapshots(snapshot_id: int, base_id: int, key_type: str = "lineno", limit: int = 25) -> list:
+    """Allocation sites that grew the most from base_id to snapshot_id; None if either is gone"""
+    if snapshot_id not in snapshots or base_id not in snapshots:
+        return None
+    diff = snapshots[snapshot_id]["snapshot"].compare_to(snapshots[base_id]["snapshot"], key_type)
+    return [_diff_stat(s, key_type) for s in diff[:limit]]
+
+
+def memory_status() -> dict:
+    traced, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": rss_bytes(),
+        "max_rss_bytes": max_rss_bytes(),
+        "tracking": MEMORY_TRACKING,
+        "routes": dict(sorted(route_memory.items(), key=lambda item: -item[1]["max_rss_growth"])),
+        "tracemalloc": {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+            "traced_bytes": traced,
+            "peak_traced_bytes": peak,
+        },
+        "snapshots": [describe_snapshot(s) for s in snapshots.values()],
+    }
@@ -0,0 +1,251 @@
+"""
+In-process metrics in the Prometheus text format.
+
+MetricsMiddleware records, per route template (e.g. /api/members/{member_id}):
+    http_request_duration_seconds   latency histogram, by method and route
+    http_requests_total             requests, by method, route and status
+    http_request_errors_total       5xx responses and unhandled exceptions
+    http_requests_in_flight         requests being served right now
+    http_conditional_requests_total If-None-Match requests, and how many got a 304
+
+PoolTimer, a pymongo ConnectionPoolListener, records how long requests wait to
+check a connection out of the Mongo pool. monitor_event_loop() samples how late
+the event loop wakes up from a sleep, which is how long something blocked it.
+Caches report lookups and loads through register_cache(); the hit ratio is
+1 - loads / lookups.
+
+Everything is kept per process: with several uvicorn workers each scrape sees
+the worker that answered it (the pid label tells them apart).
+
+GET /api/metrics needs an admin session, or METRICS_TOKEN for a scraper.
+
+Settings (environment):
+    METRICS_TOKEN   If set, "Authorization: Bearer <token>" is also accepted
+    METRICS_PUBLIC  true: serve /api/metrics without authentication (default false)
+"""
+
+import asyncio
+import bisect
+import os
+import threading
+import time
+
+from pymongo import monitoring
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+METRICS_PUBLIC = os.environ.get('METRICS_PUBLIC', '').lower() in ['true', 'yes', '1']
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self, kind: str = "counter"):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {kind}"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {value}"
+
+
+class Gauge(Counter):
+    def set(self, value: float, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def render(self, kind: str = "gauge"):
+        return super().render(kind)
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # Per-bucket counts (plus +Inf), sum, count
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self.lock:
+            series = sorted((labels, [list(s[0]), s[1], s[2]]) for labels, s in self.series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, n in zip((*self.buckets, "+Inf"), counts):
+                cumulative += n
+                yield f"{self.name}_bucket{_labels((*self.label_names, 'le'), (*labels, bound))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {count}"
+
+
+request_duration = Histogram("http_request_duration_seconds", "Time to serve a request, including streaming the body",
+                             ("method", "route"))
+requests_total = Counter("http_requests_total", "Requests served", ("method", "route", "status"))
+errors_total = Counter("http_request_errors_total", "Requests that failed with a 5xx or an exception", ("method", "route"))
+in_flight = Gauge("http_requests_in_flight", "Requests being served")
+conditional_total = Counter("http_conditional_requests_total", "Requests with If-None-Match, by whether they got a 304",
+                            ("route", "not_modified"))
+pool_checkout_wait = Histogram("mongo_pool_checkout_wait_seconds", "Time waiting to check a connection out of the Mongo pool",
+                               buckets=WAIT_BUCKETS)
+pool_checkout_failures = Counter("mongo_pool_checkout_failures_total", "Connection checkouts that failed", ("reason",))
+pool_checked_out = Gauge("mongo_pool_connections_checked_out", "Mongo connections currently checked out")
+loop_lag = Histogram("event_loop_lag_seconds", "How late the event loop woke from a timed sleep", buckets=LAG_BUCKETS)
+loop_lag_last = Gauge("event_loop_lag_last_seconds", "Most recent event loop lag sample")
+loop_blocked = Counter("event_loop_blocked_total", "Event loop stalls reported by the watchdog (LOOP_WATCHDOG_MS)", ("route",))
+
+in_flight.set(0)
+pool_checked_out.set(0)
+
+# name -> callable returning (lookups, loads)
+caches = {}
+
+# Callables yielding extra exposition lines, e.g. gauges computed at scrape time
+collectors = []
+
+
+def register_collector(collect):
+    collectors.append(collect)
+
+
+def register_cache(name: str, stats):
+    """stats() returns (lookups, loads): requests served, and how many of them had to load data"""
+    caches[name] = stats
+
+
+def render_caches():
+    lookups = Counter("cache_lookups_total", "Cache lookups", ("cache",))
+    loads = Counter("cache_loads_total", "Cache lookups that had to load from the database", ("cache",))
+    ratio = Gauge("cache_hit_ratio", "Share of lookups served without loading", ("cache",))
+    for name, stats in caches.items():
+        n, misses = stats()
+        lookups.inc(name, amount=n)
+        loads.inc(name, amount=misses)
+        ratio.set(round(1 - misses / n, 4) if n else 0, name)
+    for metric in (lookups, loads, ratio):
+        yield from metric.render()
+
+
+def render() -> str:
+    lines = []
+    pid = Gauge("process_pid", "Process id of the worker that answered this scrape")
+    pid.set(os.getpid())
+    for metric in (pid, request_duration, requests_total, errors_total, in_flight, conditional_total,
+                   pool_checkout_wait, pool_checkout_failures, pool_checked_out, loop_lag, loop_lag_last,
+                   loop_blocked):
+        lines.extend(metric.render())
+    lines.extend(render_caches())
+    for collect in collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+def route_label(scope: Scope) -> str:
+    # Route templates keep the label set small; unmatched paths share one label
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        conditional = "if-none-match" in Headers(scope=scope)
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception:
+            status = 500
+            raise
+        finally:
+            in_flight.inc(amount=-1)
+            method, route = scope["method"], route_label(scope)
+            request_duration.observe(time.perf_counter() - started, method, route)
+            requests_total.inc(method, route, str(status))
+            if status >= 500:
+                errors_total.inc(method, route)
+            if conditional:
+                conditional_total.inc(route, str(status == 304).lower())
+
+
+class PoolTimer(monitoring.ConnectionPoolListener):
+    """Checkout waits; started and checked-out events arrive on the same thread"""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self.local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self.local, "started", None)
+        if started is not None:
+            pool_checkout_wait.observe(time.perf_counter() - started)
+            self.local.started = None
+        pool_checked_out.inc()
+
+    def connection_check_out_failed(self, event):
+        self.local.started = None
+        pool_checkout_failures.inc(str(event.reason))
+
+    def connection_checked_in(self, event):
+        pool_checked_out.inc(amount=-1)
+
+    # The remaining pool events are not measured
+    def pool_created(self, event): pass
+    def pool_ready(self, event): pass
+    def pool_cleared(self, event): pass
+    def pool_closed(self, event): pass
+    def connection_created(self, event): pass
+    def connection_ready(self, event): pass
+    def connection_closed(self, event): pass
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Run as a background task; samples event loop lag every interval seconds"""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(time.perf_counter() - started - interval, 0.0)
+        loop_lag.observe(lag)
+        loop_lag_last.set(lag)
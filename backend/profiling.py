@@ -0,0 +1,147 @@
+"""
+On-demand request profiling for admins.
+
+An admin adds the header "X-Profile: 1" (or the query parameter profile=1) to
+any API request. That request runs under cProfile and the result is written
+to PROFILE_DIR as <id>.prof (pstats format, opens in snakeviz) next to
+<id>.json describing the request. The response carries X-Profile-Id: <id>,
+and the profile is served by the /api/admin/profiles endpoints. Only the
+newest PROFILE_RETENTION profiles are kept.
+
+cProfile sees everything on the event loop thread while the request runs,
+so other requests served at the same moment show up too. Time spent waiting
+on MongoDB appears as time awaiting the Motor executor (see Server-Timing
+for the database share). One request is profiled at a time; a second one
+asking meanwhile runs unprofiled with "X-Profile: busy".
+
+Settings (environment):
+    PROFILE_DIR        Where profiles are stored (default backend/profiles)
+    PROFILE_RETENTION  Profiles kept, oldest removed first (default 20)
+"""
+
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', str(Path(__file__).parent / 'profiles')))
+PROFILE_RETENTION = int(os.environ.get('PROFILE_RETENTION', '20'))
+
+PROFILE_ID = re.compile(r"^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$")
+
+
+def profile_requested(scope: Scope) -> bool:
+    if Headers(scope=scope).get("x-profile") == "1":
+        return True
+    return QueryParams(scope.get("query_string", b"")).get("profile") == "1"
+
+
+def profile_path(profile_id: str, suffix: str) -> Path:
+    """Path of a stored profile file; None for anything that is not a profile id"""
+    if not PROFILE_ID.match(profile_id or ""):
+        return None
+    return PROFILE_DIR / f"{profile_id}{suffix}"
+
+
+def list_profiles() -> list:
+    """Metadata of the stored profiles, newest first"""
+    if not PROFILE_DIR.is_dir():
+        return []
+    profiles = []
+    for path in sorted(PROFILE_DIR.glob("*.json"), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_summary(profile_id: str, sort: str = "cumulative", limit: int = 50) -> str:
+    """pstats text report of a stored profile, or None if there is none"""
+    path = profile_path(profile_id, ".prof")
+    if path is None or not path.exists():
+        return None
+    out = io.StringIO()
+    stats = pstats.Stats(str(path), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _prune():
+    for path in sorted(PROFILE_DIR.glob("*.prof"), reverse=True)[PROFILE_RETENTION:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".json").unlink(missing_ok=True)
+
+
+def _save(profiler: cProfile.Profile, meta: dict):
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(PROFILE_DIR / f"{meta['id']}.prof"))
+    (PROFILE_DIR / f"{meta['id']}.json").write_text(json.dumps(meta, indent=2))
+    _prune()
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: ASGIApp, authorize) -> None:
+        """authorize(request) -> bool decides whether the caller may profile"""
+        self.app = app
+        self.authorize = authorize
+        self.lock = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profile_requested(scope) or not await self.authorize(Request(scope)):
+            await self.app(scope, receive, send)
+            return
+        if self.lock.locked():
+            await self.app(scope, receive, self._with_headers(send, {"X-Profile": "busy"}))
+            return
+
+        async with self.lock:
+            now = datetime.now(timezone.utc)
+            profile_id = f"{now.strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}"
+            status = None
+
+            async def send_profiled(message: Message) -> None:
+                nonlocal status
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                await send(message)
+
+            profiler = cProfile.Profile()
+            started = time.perf_counter()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, self._with_headers(send_profiled, {"X-Profile-Id": profile_id}))
+            finally:
+                profiler.disable()
+                meta = {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope.get("query_string", b"").decode("latin-1"),
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "created_at": now.isoformat(),
+                }
+                # Writing a few hundred KB should not hold up the loop
+                await asyncio.get_running_loop().run_in_executor(None, _save, profiler, meta)
+
+    @staticmethod
+    def _with_headers(send: Send, extra: dict) -> Send:
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                for name, value in extra.items():
+                    headers[name] = value
+            await send(message)
+        return send_with_headers
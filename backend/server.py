@@ -1,19 +1,32 @@
 from fastapi import FastAPI, APIRouter, HTTPException, Cookie, Response, UploadFile, File, Query, Depends, Header, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse
 from dotenv import load_dotenv
+from starlette.background import BackgroundTask
 from starlette.middleware.cors import CORSMiddleware
+from compression import CompressionMiddleware
+from indexes import INDEX_APPLY_ON_STARTUP, apply_indexes, index_report
+from instrumentation import CommandTimer, ServerTimingMiddleware
+import metrics
+from loop_watchdog import LOOP_WATCHDOG_MS, LoopWatchdog, WatchdogMiddleware
+import profiling
+import memory
+import sqlite_store
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
 import os
 import logging
 import hashlib
 import secrets
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter
+from typing import List, Optional, Literal, Dict, Union, get_args
 import uuid
 from datetime import datetime, timezone, timedelta
 import csv
 import io
+import json
+import time
+import asyncio
 import httpx
 
 ROOT_DIR = Path(__file__).parent
@@ -21,12 +34,226 @@ load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 db_name = os.environ.get('DB_NAME', 'dragclub_db')
-client = AsyncIOMotorClient(mongo_url)
+# mongo, or sqlite for small installs without a database service (see sqlite_store.py)
+DB_BACKEND = os.environ.get('DB_BACKEND', 'mongo').lower()
+if DB_BACKEND == 'sqlite':
+    client = sqlite_store.SQLiteClient(os.environ.get('SQLITE_DIR', str(ROOT_DIR / 'data')))
+else:
+    # Attributes every Mongo command to the request that issued it (Server-Timing, slow-query log)
+    command_timer = CommandTimer()
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[command_timer, metrics.PoolTimer()])
 db = client[db_name]
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
+# Data version counters
+# Each cached collection has a counter document in db.data_versions that every
+# write path bumps. Workers compare it against the version their cache was
+# built from, so a write in one uvicorn worker invalidates the others.
+async def get_data_version(name: str) -> int:
+    doc = await db.data_versions.find_one({"_id": name})
+    return doc.get("version", 0) if doc else 0
+
+async def bump_data_version(name: str, amount: int = 1) -> int:
+    doc = await db.data_versions.find_one_and_update(
+        {"_id": name}, {"$inc": {"version": amount}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return doc["version"]
+
+async def get_data_versions(names) -> dict:
+    docs = await db.data_versions.find({"_id": {"$in": list(names)}}).to_list(None)
+    found = {d["_id"]: d.get("version", 0) for d in docs}
+    return {name: found.get(name, 0) for name in names}
+
+async def data_changed(*names: str) -> None:
+    """Call after a write to the members/vehicles collections, once the write has completed"""
+    for name in names:
+        await bump_data_version(name)
+
+# Conditional GET
+# List and stats responses are tagged with a weak ETag built from the path, the
+# query string and the versions of the collections they read. A matching
+# If-None-Match is answered with 304 before the endpoint runs its query.
+async def data_etag(request: Request, names, extra: str = "") -> str:
+    versions = await get_data_versions(names)
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}|{sorted(versions.items())}|{extra}"
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:16]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+# Single-flight for expensive reads
+# Concurrent identical requests share one in-flight computation. Callers key it
+# with the request's ETag, which already covers the path, parameters and data
+# versions. Results are shared between callers and must not be mutated.
+class SingleFlight:
+    def __init__(self):
+        self.in_flight = {}
+        self.stats = {}
+
+    async def do(self, name: str, key: str, compute):
+        stats = self.stats.setdefault(name, {"calls": 0, "computed": 0, "coalesced": 0})
+        stats["calls"] += 1
+        flight_key = (name, key)
+        task = self.in_flight.get(flight_key)
+        if task is None:
+            stats["computed"] += 1
+            task = asyncio.ensure_future(compute())
+            self.in_flight[flight_key] = task
+            task.add_done_callback(lambda t: self._landed(flight_key, t))
+        else:
+            stats["coalesced"] += 1
+        # Shielded so one caller disconnecting does not cancel the others' result
+        return await asyncio.shield(task)
+
+    def _landed(self, flight_key, task):
+        if self.in_flight.get(flight_key) is task:
+            del self.in_flight[flight_key]
+
+single_flight = SingleFlight()
+
+def single_flight_cache_stats(name: str):
+    # A coalesced call is a hit: it got a result without computing it
+    stats = single_flight.stats.get(name, {})
+    return stats.get("calls", 0), stats.get("computed", 0)
+
+# Admission control for heavy endpoints
+# Bulk uploads, exports, reports and maintenance jobs each get a concurrency
+# limit and a bounded wait queue so they cannot starve interactive requests.
+# When the queue is full, or a request waits longer than the class timeout,
+# the caller gets 503 with Retry-After. Override a class with
+# ADMISSION_<CLASS>=limit:queue, e.g. ADMISSION_BULK=1:2.
+# FastAPI runs a dependency's exit before a StreamingResponse body is sent, so
+# an endpoint that streams hands its slot to the body with admitted.hold().
+ADMISSION_DEFAULTS = {
+    # class: (concurrent, queued, wait timeout seconds, retry after seconds)
+    "bulk": (1, 2, 60.0, 30),
+    "export": (2, 4, 30.0, 10),
+    "report": (3, 12, 15.0, 5),
+    "maintenance": (1, 0, 0.0, 30),
+}
+
+class AdmissionSlot:
+    def __init__(self, gate: "AdmissionGate"):
+        self.gate = gate
+        self.held_by_body = False
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.gate.active -= 1
+            self.gate.semaphore.release()
+
+    def hold(self, response: StreamingResponse) -> StreamingResponse:
+        """Keep the slot until the response body has been sent (or the client went away)"""
+        self.held_by_body = True
+        body = response.body_iterator
+
+        async def held_body():
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                self.release()
+
+        response.body_iterator = held_body()
+        # Also runs when the client disconnects while the body generator is suspended
+        response.background = BackgroundTask(self.release)
+        return response
+
+class AdmissionGate:
+    def __init__(self, name: str, limit: int, max_queue: int, timeout: float, retry_after: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"Server busy ({self.name} {reason}), please retry shortly",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    async def __call__(self):
+        """FastAPI dependency: holds a slot until the endpoint returns, or its body is sent if handed to it"""
+        start = time.monotonic()
+        if not self.semaphore.locked():
+            # A free slot is taken without suspending, so the next caller sees it as taken
+            await self.semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self._reject("queue full")
+            self.waiting += 1
+            try:
+                if self.timeout:
+                    await asyncio.wait_for(self.semaphore.acquire(), timeout=self.timeout)
+                else:
+                    await self.semaphore.acquire()
+            except asyncio.TimeoutError:
+                self._reject("wait timed out")
+            finally:
+                self.waiting -= 1
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+        self.active += 1
+        slot = AdmissionSlot(self)
+        try:
+            yield slot
+        finally:
+            if not slot.held_by_body:
+                slot.release()
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds_total": round(self.wait_seconds_total, 3),
+            "wait_seconds_max": round(self.wait_seconds_max, 3),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.admitted, 3) if self.admitted else 0.0,
+        }
+
+def _admission_gate(name: str) -> AdmissionGate:
+    limit, max_queue, timeout, retry_after = ADMISSION_DEFAULTS[name]
+    override = os.environ.get(f'ADMISSION_{name.upper()}')
+    if override:
+        limit_str, _, queue_str = override.partition(':')
+        limit = int(limit_str)
+        max_queue = int(queue_str) if queue_str else max_queue
+    return AdmissionGate(name, limit, max_queue, timeout, retry_after)
+
+admission = {name: _admission_gate(name) for name in ADMISSION_DEFAULTS}
+
 # Password hashing functions
 def hash_password(password: str) -> str:
     """Hash a password with a random salt"""
@@ -205,6 +432,72 @@ class ExportFilters(BaseModel):
     receive_sms: Optional[bool] = None
     interest: Optional[Literal['Drag Racing', 'Car Enthusiast', 'Both']] = None
 
+class MemberFacets(BaseModel):
+    total: int
+    financial: Dict[str, int]
+    membership_type: Dict[str, int]
+    interest: Dict[str, int]
+
+class MemberListWithFacets(BaseModel):
+    members: List[Member]
+    facets: MemberFacets
+
+# Fast JSON responses
+# List endpoints return documents written by this API, so by default they are
+# shaped to the model's fields and serialized directly (with orjson when it is
+# installed) instead of being re-validated through response_model.
+# VALIDATE_RESPONSES=1 validates them with a precompiled TypeAdapter instead.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+VALIDATE_RESPONSES = os.environ.get('VALIDATE_RESPONSES', '').lower() in ['true', 'yes', '1']
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def json_bytes(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_json_default).encode()
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return json_bytes(content)
+
+_response_shapes = {}
+_response_adapters = {}
+
+def _response_shape(model):
+    shape = _response_shapes.get(model)
+    if shape is None:
+        fields = [(name, None if f.is_required() else f.default) for name, f in model.model_fields.items()]
+        date_fields = [name for name, f in model.model_fields.items() if datetime in (f.annotation, *get_args(f.annotation))]
+        shape = _response_shapes[model] = (fields, date_fields)
+    return shape
+
+def response_documents(docs: list, model) -> list:
+    """Shape stored documents the way List[model] would serialize them"""
+    fields, date_fields = _response_shape(model)
+    shaped = []
+    for doc in docs:
+        out = {name: doc.get(name, default) for name, default in fields}
+        for name in date_fields:
+            if out[name] == '':
+                out[name] = None
+        shaped.append(out)
+    if VALIDATE_RESPONSES:
+        adapter = _response_adapters.get(model)
+        if adapter is None:
+            adapter = _response_adapters[model] = TypeAdapter(List[model])
+        return adapter.dump_python(adapter.validate_python(shaped), mode="json")
+    return shaped
+
 async def get_current_user(request: Request, session_token: Optional[str] = Cookie(None)) -> User:
     token = session_token
     
@@ -245,6 +538,17 @@ async def get_current_user(request: Request, session_token: Optional[str] = Cook
     
     return User(**user_doc)
 
+# Field projection for list endpoints
+def parse_fields(fields: Optional[str], allowed, always: tuple = ()) -> Optional[List[str]]:
+    """Parse a comma-separated fields= parameter. Returns None when no projection was asked for."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys([*always, *requested]))
+
 # Username/Password Authentication
 @api_router.post("/auth/register")
 async def register_first_admin(user_data: FirstAdminRegister, response: Response, request: Request):
@@ -538,12 +842,36 @@ async def delete_user(user_id: str, current_user: User = Depends(get_current_use
         raise HTTPException(status_code=404, detail="User not found")
     return {"message": "User deleted"}
 
-@api_router.get("/members", response_model=List[Member])
+@api_router.get("/members", response_model=Union[List[Member], MemberListWithFacets])
 async def get_members(
+    request: Request,
     search: Optional[str] = None,
     member_number: Optional[str] = None,
+    financial: Optional[bool] = None,
+    inactive: Optional[bool] = None,
+    life_member: Optional[bool] = None,
+    membership_type: Optional[Literal['Full', 'Family', 'Junior']] = None,
+    interest: Optional[Literal['Drag Racing', 'Car Enthusiast', 'Both']] = None,
+    sort: Literal['member_number', '-member_number', 'name', '-name', 'expiry_date', '-expiry_date'] = '-member_number',
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    facets: bool = False,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
+    """
+    List members, filtered and sorted in MongoDB.
+    With facets=true, returns {"members": [...], "facets": {...}} where facets holds
+    financial/membership_type/interest counts over every member matching the filters.
+    fields=member_number,name returns only those fields (plus member_id) as stored.
+    """
+    
+    etag = await data_etag(request, ["members"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    field_list = parse_fields(fields, Member.model_fields, always=("member_id",))
+    projection = {"_id": 0, **{f: 1 for f in field_list}} if field_list else {"_id": 0}
     
     query = {}
     if member_number:
@@ -555,44 +883,227 @@ async def get_members(
             {"email2": {"$regex": search, "$options": "i"}}
         ]
     
-    members = await db.members.find(query, {"_id": 0}).sort("member_number", -1).to_list(1000)
-    for m in members:
-        for field in ['created_at', 'updated_at', 'date_paid', 'expiry_date']:
-            if field in m and isinstance(m[field], str):
-                m[field] = datetime.fromisoformat(m[field])
-    return members
+    # Older records may not have the boolean flags at all, so False means "not True"
+    for field, value in (("financial", financial), ("inactive", inactive), ("life_member", life_member)):
+        if value is not None:
+            query[field] = True if value else {"$ne": True}
+    if membership_type:
+        query["membership_type"] = membership_type
+    if interest:
+        query["interest"] = interest
+    
+    # Member number breaks ties for the other sort fields
+    direction = -1 if sort.startswith('-') else 1
+    sort_field = sort.lstrip('-')
+    sort_spec = [(field, direction) for field, _ in MEMBER_NUMBER_SORT]
+    if sort_field != "member_number":
+        sort_spec.insert(0, (sort_field, direction))
+    
+    if facets:
+        result = await db.members.aggregate([
+            {"$match": query},
+            {"$facet": {
+                "members": [{"$sort": dict(sort_spec)}, {"$skip": skip}, {"$limit": limit}, {"$project": projection}],
+                "total": [{"$count": "count"}],
+                "financial": [{"$group": {"_id": {"$eq": ["$financial", True]}, "count": {"$sum": 1}}}],
+                "membership_type": [{"$group": {"_id": "$membership_type", "count": {"$sum": 1}}}],
+                "interest": [{"$group": {"_id": "$interest", "count": {"$sum": 1}}}],
+            }}
+        ]).to_list(1)
+        result = result[0]
+        members = result["members"]
+    else:
+        members = await db.members.find(query, projection).sort(sort_spec).skip(skip).limit(limit).to_list(limit)
+    
+    # Projected documents are returned as stored; full ones are shaped like Member
+    if not field_list:
+        members = response_documents(members, Member)
+    
+    if not facets:
+        return FastJSONResponse(members, headers=etag_headers(etag))
+    return FastJSONResponse({"members": members, "facets": member_facets(result)}, headers=etag_headers(etag))
+
+def member_facets(result: dict) -> dict:
+    """Shape the $facet group results from get_members"""
+    financial_counts = {"financial": 0, "unfinancial": 0}
+    for g in result["financial"]:
+        financial_counts["financial" if g["_id"] else "unfinancial"] += g["count"]
+    return {
+        "total": result["total"][0]["count"] if result["total"] else 0,
+        "financial": financial_counts,
+        "membership_type": {g["_id"]: g["count"] for g in result["membership_type"] if g["_id"]},
+        "interest": {g["_id"]: g["count"] for g in result["interest"] if g["_id"]},
+    }
+
+# Suburb autocomplete index
+# Suburb -> postcode pairs are aggregated from members once and held in a prefix
+# trie. New members are added in place; edits and deletes that may remove a
+# suburb mark the index for a rebuild. SUBURB_DATASET can point at an offline
+# CSV (suburb,postcode columns) used to fill in suburbs no member lives in yet.
+SUBURB_DATASET = os.environ.get('SUBURB_DATASET')
+SUBURB_VERSION_CHECK_SECONDS = float(os.environ.get('SUBURB_VERSION_CHECK_SECONDS', '5'))
+
+class SuburbTrieNode:
+    __slots__ = ("children", "entry")
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None
+
+class SuburbIndex:
+    def __init__(self):
+        self.root = None
+        self.count = 0
+        self.version = None
+        self.checked_at = 0.0
+        self.generation = 0
+        self.lock = asyncio.Lock()
+        self.dataset = None
+        self.lookups = 0
+        self.loads = 0
+
+    def _insert(self, suburb: str, postcode: str) -> bool:
+        """Insert a suburb unless it is already present (first postcode wins)"""
+        suburb = (suburb or "").strip()
+        if not suburb:
+            return False
+        node = self.root
+        for ch in suburb.lower():
+            node = node.children.setdefault(ch, SuburbTrieNode())
+        if node.entry is not None:
+            return False
+        node.entry = {"suburb": suburb, "postcode": (postcode or "").strip()}
+        self.count += 1
+        return True
+
+    def _is_fresh(self) -> bool:
+        return self.root is not None and time.monotonic() - self.checked_at < SUBURB_VERSION_CHECK_SECONDS
+
+    async def ensure_loaded(self):
+        self.lookups += 1
+        if not self._is_fresh():
+            async with self.lock:
+                if not self._is_fresh():
+                    await self._refresh()
+
+    async def _refresh(self):
+        generation = self.generation
+        version = await get_data_version("suburbs")
+        if self.root is None or version != self.version:
+            self.loads += 1
+            pairs = await db.members.aggregate([
+                {"$match": {"suburb": {"$type": "string", "$ne": ""}}},
+                {"$group": {"_id": "$suburb", "postcode": {"$first": "$postcode"}}},
+            ]).to_list(None)
+            self.root = SuburbTrieNode()
+            self.count = 0
+            for p in pairs:
+                postcode = p.get("postcode")
+                self._insert(p["_id"], postcode if isinstance(postcode, str) else "")
+            for suburb, postcode in self._load_dataset():
+                self._insert(suburb, postcode)
+            self.version = version
+        self.checked_at = time.monotonic() if generation == self.generation else 0.0
+
+    def _load_dataset(self):
+        if self.dataset is None:
+            self.dataset = []
+            if SUBURB_DATASET:
+                try:
+                    with open(SUBURB_DATASET, newline='', encoding='utf-8-sig') as f:
+                        for row in csv.DictReader(f):
+                            self.dataset.append((row.get('suburb', ''), row.get('postcode', '')))
+                except OSError as e:
+                    logging.error(f"Could not load suburb dataset {SUBURB_DATASET}: {e}")
+        return self.dataset
+
+    def _walk(self, node, results, limit):
+        if node.entry is not None:
+            results.append(node.entry)
+        for ch in sorted(node.children):
+            if limit is not None and len(results) >= limit:
+                return
+            self._walk(node.children[ch], results, limit)
+
+    async def suggest(self, prefix: str, limit: Optional[int] = None) -> List[dict]:
+        """Return suburbs starting with prefix (case-insensitive), alphabetically"""
+        await self.ensure_loaded()
+        node = self.root
+        for ch in prefix.strip().lower():
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        results = []
+        self._walk(node, results, limit)
+        return results[:limit] if limit is not None else results
+
+    async def add(self, suburb: Optional[str], postcode: Optional[str]):
+        """Record a member write that may introduce a new suburb"""
+        if self.root is None or not self._insert(suburb, postcode):
+            return
+        previous = self.version
+        version = await bump_data_version("suburbs")
+        # Stay current only if no other worker changed suburbs in between
+        if previous is not None and version == previous + 1:
+            self.version = version
+        else:
+            self.invalidate()
+
+    async def changed(self):
+        """Record a member write that may have removed or renamed a suburb"""
+        await bump_data_version("suburbs")
+        self.invalidate()
+
+    def invalidate(self):
+        self.root = None
+        self.checked_at = 0.0
+        self.generation += 1
+
+suburb_index = SuburbIndex()
+metrics.register_cache("suburbs", lambda: (suburb_index.lookups, suburb_index.loads))
 
 @api_router.get("/members/suburbs/list")
 async def get_suburbs_list(current_user: User = Depends(get_current_user)):
     """Get unique suburb/postcode combinations from existing members for autocomplete"""
-    members = await db.members.find({}, {"_id": 0, "suburb": 1, "postcode": 1}).to_list(10000)
-    
-    # Create a dict of suburb -> postcode (use first found postcode for each suburb)
-    suburb_map = {}
-    for m in members:
-        suburb = m.get("suburb", "").strip()
-        postcode = m.get("postcode", "").strip()
-        if suburb and suburb not in suburb_map:
-            suburb_map[suburb] = postcode
-    
-    # Return as sorted list of objects
-    suburbs = [{"suburb": s, "postcode": p} for s, p in suburb_map.items()]
-    suburbs.sort(key=lambda x: x["suburb"].lower())
-    return suburbs
+    return await suburb_index.suggest("")
+
+@api_router.get("/members/suburbs/suggest")
+async def suggest_suburbs(
+    prefix: str = "",
+    limit: int = Query(10, ge=1, le=100),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the first suburb/postcode matches for a typed prefix"""
+    return await suburb_index.suggest(prefix, limit)
 
 @api_router.get("/stats/dashboard")
-async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
+async def get_dashboard_stats(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["report"])
+):
     """Get comprehensive dashboard statistics"""
     
-    # Get all members and vehicles
-    members = await db.members.find({}, {"_id": 0}).to_list(10000)
-    vehicles = await db.vehicles.find({"archived": False}, {"_id": 0, "member_id": 1, "status": 1}).to_list(10000)
+    etag = await data_etag(request, ["members", "vehicles"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
     
-    # Create set of member_ids that have vehicles
-    members_with_vehicles = set(v["member_id"] for v in vehicles)
+    return await single_flight.do("dashboard", etag, compute_dashboard_stats)
+
+metrics.register_cache("single_flight_dashboard", lambda: single_flight_cache_stats("dashboard"))
+
+async def compute_dashboard_stats() -> dict:
+    # Get all members; vehicle ownership comes from each member's vehicle summary
+    members = await db.members.find({}, {
+        "_id": 0, "inactive": 1, "financial": 1, "life_member": 1,
+        "interest": 1, "membership_type": 1, "vehicle_count": 1
+    }).to_list(10000)
+    total_vehicles = await db.vehicles.count_documents({"archived": False})
     
     # Count only active vehicles
-    active_vehicles = sum(1 for v in vehicles if v.get("status") == "Active")
+    active_vehicles = await db.vehicles.count_documents({"archived": False, "status": "Active"})
     
     # Separate active and inactive members
     active_members = [m for m in members if not m.get("inactive")]
@@ -609,8 +1120,8 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
     life_members_unfinancial = sum(1 for m in active_members if m.get("life_member") and not m.get("financial"))
     
     # Members with vehicles stats (excluding inactive)
-    members_with_vehicle_financial = sum(1 for m in active_members if m.get("member_id") in members_with_vehicles and m.get("financial"))
-    members_with_vehicle_unfinancial = sum(1 for m in active_members if m.get("member_id") in members_with_vehicles and not m.get("financial"))
+    members_with_vehicle_financial = sum(1 for m in active_members if m.get("vehicle_count") and m.get("financial"))
+    members_with_vehicle_unfinancial = sum(1 for m in active_members if m.get("vehicle_count") and not m.get("financial"))
     
     # Interest breakdown (all members)
     interest_drag_racing = sum(1 for m in members if m.get("interest") == "Drag Racing")
@@ -631,7 +1142,7 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         "life_members_unfinancial": life_members_unfinancial,
         "members_with_vehicle_financial": members_with_vehicle_financial,
         "members_with_vehicle_unfinancial": members_with_vehicle_unfinancial,
-        "total_vehicles": len(vehicles),
+        "total_vehicles": total_vehicles,
         "active_vehicles": active_vehicles,
         "interest": {
             "drag_racing": interest_drag_racing,
@@ -646,49 +1157,86 @@ async def get_dashboard_stats(current_user: User = Depends(get_current_user)):
         }
     }
 
+# Member fields each report column is built from
+REPORT_FIELD_SOURCES = {
+    "member_id": ["member_id"],
+    "member_number": ["member_number"],
+    "name": ["name"],
+    "phone": ["phone1", "phone2"],
+    "email": ["email1", "email2"],
+    "financial": ["financial"],
+    "inactive": ["inactive"],
+    "has_vehicle": ["vehicle_count"],
+    "expiry_date": ["expiry_date"],
+}
+
 @api_router.get("/reports/members")
 async def get_member_report(
+    request: Request,
     filter_type: str = "all",
-    current_user: User = Depends(get_current_user)
+    fields: Optional[str] = None,
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["report"])
 ):
     """
     Get member report with filters.
     filter_type: all, unfinancial, with_vehicle, unfinancial_with_vehicle, 
                  expiring_soon, vehicles_expiring_soon, expired_vehicles
     Note: "all" shows everyone including inactive. All other filters exclude inactive members.
+    fields: optional comma-separated report columns to return (member_id is always included)
     """
     
-    # Get all members
-    members = await db.members.find({}, {"_id": 0}).to_list(10000)
-    
-    # For any filter OTHER than "all", exclude inactive members
-    if filter_type != "all":
-        members = [m for m in members if not m.get("inactive")]
+    # The expiry filters depend on today's date as well as the data
+    etag = await data_etag(request, ["members", "vehicles"], extra=datetime.now(timezone.utc).date().isoformat())
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
-    # Get vehicles and create lookups
-    vehicles = await db.vehicles.find({"archived": False}, {"_id": 0}).to_list(10000)
-    members_with_vehicles = set(v["member_id"] for v in vehicles)
+    field_list = parse_fields(fields, REPORT_FIELD_SOURCES, always=("member_id",))
+    report = await single_flight.do("member_report", etag, lambda: build_member_report(filter_type, field_list))
+    return FastJSONResponse(report, headers=etag_headers(etag))
+
+metrics.register_cache("single_flight_member_report", lambda: single_flight_cache_stats("member_report"))
+
+async def build_member_report(filter_type: str, field_list: Optional[List[str]]) -> List[dict]:
+    projection = {"_id": 0}
+    if field_list:
+        # Only load what the requested columns and the filters need
+        needed = {"member_id", "inactive", "financial", "expiry_date", "vehicle_count"}
+        for f in field_list:
+            needed.update(REPORT_FIELD_SOURCES[f])
+        projection.update({f: 1 for f in needed})
     
     # Calculate date thresholds
     today = datetime.now(timezone.utc)
     two_months_ahead = today + timedelta(days=60)
     
-    # Create lookup for vehicles by member
-    vehicles_by_member = {}
-    for v in vehicles:
-        mid = v.get("member_id")
-        if mid not in vehicles_by_member:
-            vehicles_by_member[mid] = []
-        vehicles_by_member[mid].append(v)
+    # For any filter OTHER than "all", exclude inactive members
+    query = {}
+    if filter_type != "all":
+        query["inactive"] = {"$ne": True}
     
-    # Apply filters
+    # Vehicle filters use the vehicle summary kept on each member
     if filter_type == "unfinancial":
-        members = [m for m in members if not m.get("financial")]
+        query["financial"] = {"$ne": True}
     elif filter_type == "with_vehicle":
-        members = [m for m in members if m.get("member_id") in members_with_vehicles]
+        query["vehicle_count"] = {"$gt": 0}
     elif filter_type == "unfinancial_with_vehicle":
-        members = [m for m in members if not m.get("financial") and m.get("member_id") in members_with_vehicles]
-    elif filter_type == "expiring_soon":
+        query["financial"] = {"$ne": True}
+        query["vehicle_count"] = {"$gt": 0}
+    elif filter_type == "vehicles_expiring_soon":
+        # Members with at least one active vehicle expiring within 2 months
+        query["active_vehicle_expiries"] = {"$elemMatch": {
+            "$gte": today.isoformat(timespec="seconds"),
+            "$lte": two_months_ahead.isoformat(timespec="seconds"),
+        }}
+    elif filter_type == "expired_vehicles":
+        # Members with at least one expired vehicle (only active status vehicles)
+        query["next_vehicle_expiry"] = {"$lt": today.isoformat(timespec="seconds")}
+    
+    # Matching members, already in member number order
+    members = await db.members.find(query, projection).sort(MEMBER_NUMBER_SORT).to_list(10000)
+    
+    if filter_type == "expiring_soon":
         # Members whose expiry date is within 2 months
         filtered = []
         for m in members:
@@ -707,155 +1255,229 @@ async def get_member_report(
                 except:
                     pass
         members = filtered
-    elif filter_type == "vehicles_expiring_soon":
-        # Members with at least one active vehicle expiring within 2 months
-        members_with_expiring = set()
-        for v in vehicles:
-            # Only check vehicles with Active status
-            if v.get("status") != "Active":
-                continue
-            expiry = v.get("expiry_date")
-            if expiry:
-                try:
-                    if isinstance(expiry, str):
-                        expiry_date = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
-                    else:
-                        expiry_date = expiry
-                    if expiry_date.tzinfo is None:
-                        expiry_date = expiry_date.replace(tzinfo=timezone.utc)
-                    if today <= expiry_date <= two_months_ahead:
-                        members_with_expiring.add(v.get("member_id"))
-                except:
-                    pass
-        members = [m for m in members if m.get("member_id") in members_with_expiring]
-    elif filter_type == "expired_vehicles":
-        # Members with at least one expired vehicle (only active status vehicles)
-        members_with_expired = set()
-        for v in vehicles:
-            # Only check vehicles with Active status
-            if v.get("status") != "Active":
-                continue
-            expiry = v.get("expiry_date")
-            if expiry:
-                try:
-                    if isinstance(expiry, str):
-                        expiry_date = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
-                    else:
-                        expiry_date = expiry
-                    if expiry_date.tzinfo is None:
-                        expiry_date = expiry_date.replace(tzinfo=timezone.utc)
-                    if expiry_date < today:
-                        members_with_expired.add(v.get("member_id"))
-                except:
-                    pass
-        members = [m for m in members if m.get("member_id") in members_with_expired]
     
     # Build report data
     report = []
     for m in members:
-        has_vehicle = m.get("member_id") in members_with_vehicles
-        
-        # Concatenate phones with ; separator if both exist
-        phone1 = m.get("phone1") or ""
-        phone2 = m.get("phone2") or ""
-        if phone1 and phone2:
-            phone = f"{phone1}; {phone2}"
-        else:
-            phone = phone1 or phone2
-        
-        # Concatenate emails with ; separator if both exist
-        email1 = m.get("email1") or ""
-        email2 = m.get("email2") or ""
-        if email1 and email2:
-            email = f"{email1}; {email2}"
-        else:
-            email = email1 or email2
-        
-        # Get expiry date for display
-        expiry = m.get("expiry_date")
-        expiry_str = ""
-        if expiry:
-            try:
-                if isinstance(expiry, str):
-                    expiry_str = expiry.split('T')[0]
-                else:
-                    expiry_str = expiry.strftime('%Y-%m-%d')
-            except:
-                expiry_str = str(expiry)
-        
-        report.append({
-            "member_id": m.get("member_id"),
-            "member_number": m.get("member_number"),
-            "name": m.get("name"),
-            "phone": phone,
-            "email": email,
-            "financial": m.get("financial", False),
-            "inactive": m.get("inactive", False),
-            "has_vehicle": has_vehicle,
-            "expiry_date": expiry_str
-        })
-    
-    # Sort by member number
-    report = sorted(report, key=lambda x: sort_member_number_key(x))
+        row = report_row(m)
+        if field_list:
+            row = {f: row[f] for f in field_list}
+        report.append(row)
     
     return report
 
+def report_row(m: dict) -> dict:
+    """One member report row: joined phones and emails, expiry as a date"""
+    has_vehicle = bool(m.get("vehicle_count"))
+    
+    # Concatenate phones with ; separator if both exist
+    phone1 = m.get("phone1") or ""
+    phone2 = m.get("phone2") or ""
+    if phone1 and phone2:
+        phone = f"{phone1}; {phone2}"
+    else:
+        phone = phone1 or phone2
+    
+    # Concatenate emails with ; separator if both exist
+    email1 = m.get("email1") or ""
+    email2 = m.get("email2") or ""
+    if email1 and email2:
+        email = f"{email1}; {email2}"
+    else:
+        email = email1 or email2
+    
+    # Get expiry date for display
+    expiry = m.get("expiry_date")
+    expiry_str = ""
+    if expiry:
+        try:
+            if isinstance(expiry, str):
+                expiry_str = expiry.split('T')[0]
+            else:
+                expiry_str = expiry.strftime('%Y-%m-%d')
+        except:
+            expiry_str = str(expiry)
+    
+    return {
+        "member_id": m.get("member_id"),
+        "member_number": m.get("member_number"),
+        "name": m.get("name"),
+        "phone": phone,
+        "email": email,
+        "financial": m.get("financial", False),
+        "inactive": m.get("inactive", False),
+        "has_vehicle": has_vehicle,
+        "expiry_date": expiry_str
+    }
+
 
 @api_router.get("/contact-lists")
 async def get_contact_lists(
+    request: Request,
+    response: Response,
     list_type: str = "email",
     interest: Optional[str] = None,
-    current_user: User = Depends(get_current_user)
+    format: Literal['json', 'text'] = 'json',
+    current_user: User = Depends(get_current_user),
+    admitted: AdmissionSlot = Depends(admission["report"])
 ):
     """
     Get contact lists for email or SMS campaigns.
     list_type: 'email' or 'sms'
     interest: None (all), 'Both', 'Drag Racing', 'Car Enthusiast'
+    format: 'json' ({"contacts", "count"}) or 'text' (the semicolon-separated list, streamed)
     Returns only active members (not inactive) who have opted in.
     """
     
-    # Build query - exclude inactive members
-    query = {"inactive": {"$ne": True}}
-    
-    # Filter by opt-in preference
-    if list_type == "email":
-        query["receive_emails"] = True
-    else:  # sms
-        query["receive_sms"] = True
-    
-    # Filter by interest if specified
-    if interest and interest in ['Both', 'Drag Racing', 'Car Enthusiast']:
-        query["interest"] = interest
-    
-    # Get matching members
-    members = await db.members.find(query, {"_id": 0, "email1": 1, "email2": 1, "phone1": 1, "phone2": 1}).to_list(10000)
-    
-    if list_type == "email":
-        # Collect all non-empty emails
-        emails = []
-        for m in members:
-            if m.get("email1") and m["email1"].strip():
-                emails.append(m["email1"].strip())
-            if m.get("email2") and m["email2"].strip():
-                emails.append(m["email2"].strip())
-        # Remove duplicates and join with semicolon
-        unique_emails = list(dict.fromkeys(emails))  # Preserves order, removes duplicates
-        return {"contacts": ";".join(unique_emails), "count": len(unique_emails)}
-    else:
-        # Collect all non-empty phone numbers
-        phones = []
-        for m in members:
-            if m.get("phone1") and m["phone1"].strip():
-                phones.append(m["phone1"].strip())
-            if m.get("phone2") and m["phone2"].strip():
-                phones.append(m["phone2"].strip())
-        # Remove duplicates and join with semicolon
-        unique_phones = list(dict.fromkeys(phones))
-        return {"contacts": ";".join(unique_phones), "count": len(unique_phones)}
+    etag = await data_etag(request, ["members"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+    
+    # Served from the materialized lists (active, opted-in members), kept
+    # current by every member write
+    if interest not in CONTACT_LIST_INTERESTS:
+        interest = None
+    list_key = contact_list_key("email" if list_type == "email" else "sms", interest)
+    cursor = db.contact_list_entries.find({"list": list_key}, {"_id": 0, "contact": 1}).sort(CONTACT_LIST_ORDER)
+    
+    if format == "text":
+        async def stream_contacts():
+            separator = ""
+            async for doc in cursor:
+                yield f"{separator}{doc['contact']}"
+                separator = ";"
+        return admitted.hold(StreamingResponse(stream_contacts(), media_type="text/plain", headers=etag_headers(etag)))
+    
+    contacts = [doc["contact"] async for doc in cursor]
+    return {"contacts": ";".join(contacts), "count": len(contacts)}
+
+CONTACT_FIELDS = {True: ["email1", "email2"], False: ["phone1", "phone2"]}
+
+# Materialized contact lists
+# db.contact_list_entries holds one document per (list, contact), e.g.
+# {"list": "email:Both", "contact": "a@b.com", "refs": 2, "n": 10, "s": "A", "slot": 0}.
+# refs counts the members contributing the contact, so an email shared by a
+# family stays listed until the last of them opts out. n/s/slot record where
+# the contact first appeared, in member number order. Member writes apply the
+# difference between a member's entries before and after the write; positions
+# are only set when an entry is created, and a rebuild recomputes them.
+CONTACT_LIST_TYPES = {"email": "receive_emails", "sms": "receive_sms"}
+CONTACT_LIST_INTERESTS = ['Drag Racing', 'Car Enthusiast', 'Both']
+CONTACT_LIST_ORDER = [("n", 1), ("s", 1), ("slot", 1)]
+
+def contact_list_key(list_type: str, interest: Optional[str] = None) -> str:
+    return f"{list_type}:{interest or 'all'}"
+
+def member_contact_entries(member: Optional[dict]) -> dict:
+    """{(list key, contact): (n, s, slot)} for every list this member appears on"""
+    entries = {}
+    if not member or member.get("inactive") is True:
+        return entries
+    order = (member.get("member_number_num"), member.get("member_number_suffix"))
+    for list_type, opt_in in CONTACT_LIST_TYPES.items():
+        if member.get(opt_in) is not True:
+            continue
+        keys = [contact_list_key(list_type)]
+        if member.get("interest") in CONTACT_LIST_INTERESTS:
+            keys.append(contact_list_key(list_type, member["interest"]))
+        for slot, field in enumerate(CONTACT_FIELDS[list_type == "email"]):
+            value = member.get(field)
+            if isinstance(value, str) and value.strip():
+                for key in keys:
+                    entries.setdefault((key, value.strip()), (*order, slot))
+    return entries
+
+def contact_list_changes(before: Optional[dict], after: Optional[dict], changes: Optional[dict] = None) -> dict:
+    """Accumulate {(list key, contact): [delta, order]} for one member write"""
+    changes = {} if changes is None else changes
+    old = member_contact_entries(before)
+    new = member_contact_entries(after)
+    for entry in old.keys() - new.keys():
+        changes.setdefault(entry, [0, old[entry]])[0] -= 1
+    for entry in new.keys() - old.keys():
+        changes.setdefault(entry, [0, new[entry]])[0] += 1
+    return changes
+
+async def apply_contact_list_changes(changes: dict):
+    ops = []
+    for (key, contact), (delta, (n, s, slot)) in changes.items():
+        if delta > 0:
+            ops.append(UpdateOne(
+                {"list": key, "contact": contact},
+                {"$inc": {"refs": delta}, "$setOnInsert": {"n": n, "s": s, "slot": slot}},
+                upsert=True
+            ))
+        elif delta < 0:
+            ops.append(UpdateOne({"list": key, "contact": contact}, {"$inc": {"refs": delta}}))
+    if not ops:
+        return
+    await db.contact_list_entries.bulk_write(ops, ordered=False)
+    if any(delta < 0 for delta, _ in changes.values()):
+        await db.contact_list_entries.delete_many({"refs": {"$lte": 0}})
+
+async def update_contact_lists(before: Optional[dict], after: Optional[dict]):
+    """Call after a member is created, updated or deleted"""
+    await apply_contact_list_changes(contact_list_changes(before, after))
+
+async def rebuild_contact_lists() -> int:
+    """Recompute every materialized list from the members collection"""
+    entries = []
+    for list_type, opt_in in CONTACT_LIST_TYPES.items():
+        for interest in [None, *CONTACT_LIST_INTERESTS]:
+            query = {"inactive": {"$ne": True}, opt_in: True}
+            if interest:
+                query["interest"] = interest
+            key = contact_list_key(list_type, interest)
+            pipeline = contact_list_pipeline(query, CONTACT_FIELDS[list_type == "email"])
+            async for doc in db.members.aggregate(pipeline, allowDiskUse=True):
+                entries.append({
+                    "list": key, "contact": doc["_id"], "refs": len(doc["members"]),
+                    "n": doc["n"], "s": doc["s"], "slot": doc["slot"]
+                })
+    await db.contact_list_entries.delete_many({})
+    if entries:
+        await db.contact_list_entries.insert_many(entries, ordered=False)
+    await bump_data_version("contact_lists")
+    return len(entries)
+
+def contact_list_pipeline(query: dict, fields: List[str]) -> List[dict]:
+    """
+    Trimmed, de-duplicated contacts for the members matching query, one document per
+    contact with the ids of the members that list it. Each contact keeps the position
+    it first appears at (member number order, then email1/phone1 before email2/phone2),
+    so the list reads like the member list.
+    """
+    return [
+        {"$match": query},
+        {"$project": {
+            "_id": 0,
+            "member_id": 1,
+            "n": "$member_number_num",
+            "s": "$member_number_suffix",
+            "contacts": [f"${f}" for f in fields],
+        }},
+        {"$unwind": {"path": "$contacts", "includeArrayIndex": "slot"}},
+        {"$match": {"contacts": {"$type": "string"}}},
+        {"$project": {"member_id": 1, "n": 1, "s": 1, "slot": 1, "contact": {"$trim": {"input": "$contacts"}}}},
+        {"$match": {"contact": {"$ne": ""}}},
+        {"$sort": {"n": 1, "s": 1, "slot": 1}},
+        {"$group": {
+            "_id": "$contact",
+            "n": {"$first": "$n"},
+            "s": {"$first": "$s"},
+            "slot": {"$first": "$slot"},
+            "members": {"$addToSet": "$member_id"},
+        }},
+        {"$sort": {"n": 1, "s": 1, "slot": 1}},
+    ]
 
 
 @api_router.post("/admin/mark-expired-unfinancial")
-async def mark_expired_members_unfinancial(current_user: User = Depends(get_current_user)):
+async def mark_expired_members_unfinancial(
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["maintenance"])
+):
     """
     Mark all members whose expiry date has passed as unfinancial.
     Any authenticated user can run this.
@@ -865,7 +1487,7 @@ async def mark_expired_members_unfinancial(current_user: User = Depends(get_curr
     # Get all financial members
     members = await db.members.find({"financial": True}, {"_id": 0}).to_list(10000)
     
-    updated_count = 0
+    updated_ids = []
     for m in members:
         expiry = m.get("expiry_date")
         if expiry:
@@ -884,12 +1506,16 @@ async def mark_expired_members_unfinancial(current_user: User = Depends(get_curr
                         {"member_id": m.get("member_id")},
                         {"$set": {"financial": False, "updated_at": datetime.now(timezone.utc).isoformat()}}
                     )
-                    updated_count += 1
+                    updated_ids.append(m.get("member_id"))
             except Exception as e:
                 logging.error(f"Error processing member {m.get('member_id')}: {e}")
                 continue
     
-    return {"message": f"Marked {updated_count} expired members as unfinancial"}
+    if updated_ids:
+        await stamp_sync("members", updated_ids)
+        await data_changed("members")
+    
+    return {"message": f"Marked {len(updated_ids)} expired members as unfinancial"}
 
 @api_router.get("/members/printable-list")
 async def get_printable_member_list(current_user: User = Depends(get_current_user)):
@@ -898,12 +1524,10 @@ async def get_printable_member_list(current_user: User = Depends(get_current_use
     Returns member_number and name in two columns.
     Any authenticated user can access this endpoint.
     """
-    members = await db.members.find({}, {"_id": 0, "member_number": 1, "name": 1}).to_list(10000)
+    # Sorted by the stored member number key so alphanumeric numbers order properly
+    members = await db.members.find({}, {"_id": 0, "member_number": 1, "name": 1}).sort(MEMBER_NUMBER_SORT).to_list(10000)
     
-    # Sort by member number treating alphanumeric properly
-    sorted_members = sorted(members, key=sort_member_number_key)
-    
-    return sorted_members
+    return FastJSONResponse(members)
 
 @api_router.get("/members/{member_id}", response_model=Member)
 async def get_member(member_id: str, current_user: User = Depends(get_current_user)):
@@ -926,14 +1550,7 @@ async def get_member(member_id: str, current_user: User = Depends(get_current_us
 async def create_member(member_data: MemberCreate, current_user: User = Depends(get_current_user)):
     
     # Get the highest numeric member number for auto-generation
-    all_members = await db.members.find({}, {"_id": 0, "member_number": 1}).to_list(10000)
-    numeric_numbers = []
-    for m in all_members:
-        try:
-            numeric_numbers.append(int(m.get("member_number", 0)))
-        except (ValueError, TypeError):
-            pass
-    next_number = str(max(numeric_numbers) + 1) if numeric_numbers else "1"
+    next_number = str(await get_next_member_number())
     
     member_id = f"member_{uuid.uuid4().hex[:12]}"
     now = datetime.now(timezone.utc)
@@ -947,11 +1564,17 @@ async def create_member(member_data: MemberCreate, current_user: User = Depends(
     new_member = {
         "member_id": member_id,
         "member_number": next_number,
+        **member_number_sort_fields(next_number),
+        **EMPTY_VEHICLE_SUMMARY,
         **member_dict,
         "created_at": now.isoformat(),
         "updated_at": now.isoformat()
     }
     await db.members.insert_one(new_member)
+    await stamp_sync("members", [member_id])
+    await data_changed("members")
+    await update_contact_lists(None, new_member)
+    await suburb_index.add(new_member.get("suburb"), new_member.get("postcode"))
     
     return await get_member(member_id)
 
@@ -987,13 +1610,21 @@ async def update_member(member_id: str, member_data: MemberUpdate, current_user:
     
     logging.info(f"Final update dict for {member_id}: {update_dict}")
     
-    result = await db.members.update_one(
+    before = await db.members.find_one_and_update(
         {"member_id": member_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
     )
-    if result.matched_count == 0:
+    if before is None:
         raise HTTPException(status_code=404, detail="Member not found")
     
+    await stamp_sync("members", [member_id])
+    await data_changed("members")
+    await update_contact_lists(before, {**before, **update_dict})
+    if 'suburb' in update_dict or 'postcode' in update_dict:
+        await suburb_index.changed()
+    
     return await get_member(member_id)
 
 @api_router.delete("/members/{member_id}")
@@ -1001,21 +1632,35 @@ async def delete_member(member_id: str, current_user: User = Depends(get_current
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    vehicle_ids = await db.vehicles.distinct("vehicle_id", {"member_id": member_id})
     await db.vehicles.delete_many({"member_id": member_id})
+    await record_tombstones("vehicles", vehicle_ids)
     
-    result = await db.members.delete_one({"member_id": member_id})
-    if result.deleted_count == 0:
+    deleted = await db.members.find_one_and_delete({"member_id": member_id}, projection={"_id": 0})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Member not found")
+    await record_tombstones("members", [member_id])
+    await data_changed("members", "vehicles")
+    await update_contact_lists(deleted, None)
+    await suburb_index.changed()
     return {"message": "Member deleted"}
 
 @api_router.get("/vehicles", response_model=List[Vehicle])
 async def get_vehicles(
+    request: Request,
     member_id: Optional[str] = None,
     registration: Optional[str] = None,
     include_archived: bool = False,
+    fields: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     
+    etag = await data_etag(request, ["vehicles"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    field_list = parse_fields(fields, Vehicle.model_fields, always=("vehicle_id",))
+    
     query = {}
     if member_id:
         query["member_id"] = member_id
@@ -1024,12 +1669,12 @@ async def get_vehicles(
     if not include_archived:
         query["archived"] = False
     
+    if field_list:
+        vehicles = await db.vehicles.find(query, {"_id": 0, **{f: 1 for f in field_list}}).to_list(1000)
+        return FastJSONResponse(vehicles, headers=etag_headers(etag))
+    
     vehicles = await db.vehicles.find(query, {"_id": 0}).to_list(1000)
-    for v in vehicles:
-        for field in ['created_at', 'updated_at', 'entry_date', 'expiry_date']:
-            if field in v and isinstance(v[field], str):
-                v[field] = datetime.fromisoformat(v[field])
-    return vehicles
+    return FastJSONResponse(response_documents(vehicles, Vehicle), headers=etag_headers(etag))
 
 @api_router.post("/vehicles", response_model=Vehicle)
 async def create_vehicle(vehicle_data: VehicleCreate, current_user: User = Depends(get_current_user)):
@@ -1053,6 +1698,9 @@ async def create_vehicle(vehicle_data: VehicleCreate, current_user: User = Depen
         "updated_at": now.isoformat()
     }
     await db.vehicles.insert_one(new_vehicle)
+    await stamp_sync("vehicles", [vehicle_id])
+    await data_changed("vehicles")
+    await refresh_vehicle_summaries([new_vehicle["member_id"]])
     
     vehicle = await db.vehicles.find_one({"vehicle_id": vehicle_id}, {"_id": 0})
     for field in ['created_at', 'updated_at', 'entry_date', 'expiry_date']:
@@ -1082,8 +1730,11 @@ async def update_vehicle(vehicle_id: str, vehicle_data: VehicleUpdate, current_u
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Vehicle not found")
+    await stamp_sync("vehicles", [vehicle_id])
+    await data_changed("vehicles")
     
     vehicle = await db.vehicles.find_one({"vehicle_id": vehicle_id}, {"_id": 0})
+    await refresh_vehicle_summaries([vehicle["member_id"]])
     for field in ['created_at', 'updated_at', 'entry_date', 'expiry_date']:
         if field in vehicle and isinstance(vehicle[field], str):
             vehicle[field] = datetime.fromisoformat(vehicle[field])
@@ -1094,12 +1745,16 @@ async def archive_vehicle(vehicle_id: str, current_user: User = Depends(get_curr
     if current_user.role == "member_editor":
         raise HTTPException(status_code=403, detail="Full editor or admin access required")
     
-    result = await db.vehicles.update_one(
+    vehicle = await db.vehicles.find_one_and_update(
         {"vehicle_id": vehicle_id},
-        {"$set": {"archived": True, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"archived": True, "updated_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"_id": 0, "member_id": 1}
     )
-    if result.matched_count == 0:
+    if vehicle is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
+    await stamp_sync("vehicles", [vehicle_id])
+    await data_changed("vehicles")
+    await refresh_vehicle_summaries([vehicle["member_id"]])
     return {"message": "Vehicle archived"}
 
 @api_router.post("/vehicles/{vehicle_id}/restore")
@@ -1107,12 +1762,16 @@ async def restore_vehicle(vehicle_id: str, current_user: User = Depends(get_curr
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    result = await db.vehicles.update_one(
+    vehicle = await db.vehicles.find_one_and_update(
         {"vehicle_id": vehicle_id},
-        {"$set": {"archived": False, "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": {"archived": False, "updated_at": datetime.now(timezone.utc).isoformat()}},
+        projection={"_id": 0, "member_id": 1}
     )
-    if result.matched_count == 0:
+    if vehicle is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
+    await stamp_sync("vehicles", [vehicle_id])
+    await data_changed("vehicles")
+    await refresh_vehicle_summaries([vehicle["member_id"]])
     return {"message": "Vehicle restored"}
 
 @api_router.delete("/vehicles/{vehicle_id}/permanent")
@@ -1120,22 +1779,166 @@ async def delete_vehicle_permanent(vehicle_id: str, current_user: User = Depends
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    result = await db.vehicles.delete_one({"vehicle_id": vehicle_id})
-    if result.deleted_count == 0:
+    deleted = await db.vehicles.find_one_and_delete({"vehicle_id": vehicle_id}, projection={"_id": 0, "member_id": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
+    await record_tombstones("vehicles", [vehicle_id])
+    await data_changed("vehicles")
+    await refresh_vehicle_summaries([deleted["member_id"]])
     return {"message": "Vehicle permanently deleted"}
 
+# Vehicle summaries on members
+# Each member document carries a summary of its non-archived vehicles so the
+# reports and dashboard can filter members without reading the vehicles
+# collection: vehicle_count, active_vehicle_count, next_vehicle_expiry (the
+# earliest expiry of an Active vehicle) and active_vehicle_expiries (all of
+# them, sorted). Expiries are normalised to UTC ISO strings so they compare
+# correctly as strings. Every vehicle write refreshes its member's summary.
+EMPTY_VEHICLE_SUMMARY = {
+    "vehicle_count": 0,
+    "active_vehicle_count": 0,
+    "next_vehicle_expiry": None,
+    "active_vehicle_expiries": [],
+}
+VEHICLE_SUMMARY_FIELDS = list(EMPTY_VEHICLE_SUMMARY)
+
+def vehicle_expiry_key(expiry) -> Optional[str]:
+    """UTC ISO string for a stored expiry date, None if missing or unparseable"""
+    if not expiry:
+        return None
+    try:
+        if isinstance(expiry, str):
+            expiry = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
+        if expiry.tzinfo is None:
+            expiry = expiry.replace(tzinfo=timezone.utc)
+        return expiry.astimezone(timezone.utc).isoformat(timespec="seconds")
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def vehicle_summary(vehicles: List[dict]) -> dict:
+    active = [v for v in vehicles if v.get("status") == "Active"]
+    expiries = sorted(filter(None, (vehicle_expiry_key(v.get("expiry_date")) for v in active)))
+    return {
+        "vehicle_count": len(vehicles),
+        "active_vehicle_count": len(active),
+        "next_vehicle_expiry": expiries[0] if expiries else None,
+        "active_vehicle_expiries": expiries,
+    }
+
+async def vehicles_by_member(query: dict) -> dict:
+    grouped = {}
+    cursor = db.vehicles.find({**query, "archived": False}, {"_id": 0, "member_id": 1, "status": 1, "expiry_date": 1})
+    async for v in cursor:
+        grouped.setdefault(v.get("member_id"), []).append(v)
+    return grouped
+
+async def refresh_vehicle_summaries(member_ids):
+    """Recompute the vehicle summary of the given members; call after a vehicle write"""
+    member_ids = [m for m in set(member_ids) if m]
+    if not member_ids:
+        return
+    grouped = await vehicles_by_member({"member_id": {"$in": member_ids}})
+    await db.members.bulk_write([
+        UpdateOne({"member_id": mid}, {"$set": vehicle_summary(grouped.get(mid, []))})
+        for mid in member_ids
+    ], ordered=False)
+
+async def rebuild_vehicle_summaries() -> int:
+    """Recompute every member's vehicle summary from the vehicles collection"""
+    grouped = await vehicles_by_member({})
+    ops = []
+    # Members that no longer have vehicles, or have never been summarised
+    cursor = db.members.find(
+        {"$or": [{"vehicle_count": {"$ne": 0}}, {"active_vehicle_expiries": {"$exists": False}}]},
+        {"_id": 0, "member_id": 1}
+    )
+    async for m in cursor:
+        if m.get("member_id") not in grouped:
+            ops.append(UpdateOne({"member_id": m.get("member_id")}, {"$set": EMPTY_VEHICLE_SUMMARY}))
+    for mid, vehicles in grouped.items():
+        ops.append(UpdateOne({"member_id": mid}, {"$set": vehicle_summary(vehicles)}))
+    for start in range(0, len(ops), 1000):
+        await db.members.bulk_write(ops[start:start + 1000], ordered=False)
+    return len(ops)
+
+# Vehicle options cache
+# Options only change through the admin endpoints below, so they are held in
+# process and grouped by type. The shared version counter is re-read at most
+# every VEHICLE_OPTIONS_VERSION_CHECK_SECONDS to pick up writes from other workers.
+VEHICLE_OPTIONS_VERSION_CHECK_SECONDS = float(os.environ.get('VEHICLE_OPTIONS_VERSION_CHECK_SECONDS', '5'))
+
+class VehicleOptionsCache:
+    def __init__(self):
+        self.version = None
+        self.by_type = None
+        self.etags = {}
+        self.checked_at = 0.0
+        self.generation = 0
+        self.lock = asyncio.Lock()
+        self.lookups = 0
+        self.loads = 0
+
+    def invalidate(self):
+        self.by_type = None
+        self.checked_at = 0.0
+        self.generation += 1
+
+    def _is_fresh(self) -> bool:
+        return self.by_type is not None and time.monotonic() - self.checked_at < VEHICLE_OPTIONS_VERSION_CHECK_SECONDS
+
+    async def get(self, type: Optional[str] = None):
+        """Return (options, etag) for one type, or for all types when type is None"""
+        self.lookups += 1
+        if not self._is_fresh():
+            async with self.lock:
+                if not self._is_fresh():
+                    await self._refresh()
+        key = type or "*"
+        if key not in self.by_type:
+            return [], self._etag([])
+        return self.by_type[key], self.etags[key]
+
+    @staticmethod
+    def _etag(options) -> str:
+        digest = hashlib.sha1(json.dumps(options, default=str, sort_keys=True).encode()).hexdigest()
+        return f'W/"{digest[:16]}"'
+
+    async def _refresh(self):
+        # Read the version before the documents so a concurrent write is seen on the next check
+        generation = self.generation
+        version = await get_data_version("vehicle_options")
+        if self.by_type is None or version != self.version:
+            self.loads += 1
+            options = await db.vehicle_options.find({}, {"_id": 0}).to_list(1000)
+            by_type = {"*": []}
+            for opt in options:
+                if isinstance(opt.get('created_at'), str):
+                    opt['created_at'] = datetime.fromisoformat(opt['created_at'])
+                by_type["*"].append(opt)
+                by_type.setdefault(opt.get("type"), []).append(opt)
+            self.etags = {key: self._etag(opts) for key, opts in by_type.items()}
+            self.by_type = by_type
+            self.version = version
+        # A local write during the refresh leaves the cache due for another check
+        self.checked_at = time.monotonic() if generation == self.generation else 0.0
+
+vehicle_options_cache = VehicleOptionsCache()
+metrics.register_cache("vehicle_options", lambda: (vehicle_options_cache.lookups, vehicle_options_cache.loads))
+
+async def vehicle_options_changed():
+    """Call after any write to db.vehicle_options"""
+    await bump_data_version("vehicle_options")
+    vehicle_options_cache.invalidate()
+
 @api_router.get("/vehicle-options", response_model=List[VehicleOption])
-async def get_vehicle_options(type: Optional[str] = None, current_user: User = Depends(get_current_user)):
+async def get_vehicle_options(request: Request, response: Response, type: Optional[str] = None, current_user: User = Depends(get_current_user)):
     
-    query = {}
-    if type:
-        query["type"] = type
+    options, etag = await vehicle_options_cache.get(type)
     
-    options = await db.vehicle_options.find(query, {"_id": 0}).to_list(1000)
-    for opt in options:
-        if isinstance(opt['created_at'], str):
-            opt['created_at'] = datetime.fromisoformat(opt['created_at'])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    response.headers.update(etag_headers(etag))
     return options
 
 @api_router.post("/vehicle-options/init-defaults")
@@ -1153,6 +1956,7 @@ async def init_default_vehicle_options(current_user: User = Depends(get_current_
     default_body_styles = ["Coupe", "ICV", "Sedan", "Solo", "Station Wagon", "Truck", "Utility", "Van"]
     
     created = 0
+    option_ids = []
     for style in default_body_styles:
         option_id = f"option_{uuid.uuid4().hex[:12]}"
         await db.vehicle_options.insert_one({
@@ -1161,8 +1965,12 @@ async def init_default_vehicle_options(current_user: User = Depends(get_current_
             "value": style,
             "created_at": datetime.now(timezone.utc).isoformat()
         })
+        option_ids.append(option_id)
         created += 1
     
+    await stamp_sync("vehicle_options", option_ids)
+    await vehicle_options_changed()
+    
     return {"message": f"Created {created} default body style options", "created": created}
 
 @api_router.post("/vehicle-options", response_model=VehicleOption)
@@ -1178,6 +1986,8 @@ async def create_vehicle_option(option_data: VehicleOptionCreate, current_user:
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.vehicle_options.insert_one(new_option)
+    await stamp_sync("vehicle_options", [option_id])
+    await vehicle_options_changed()
     
     option = await db.vehicle_options.find_one({"option_id": option_id}, {"_id": 0})
     if isinstance(option['created_at'], str):
@@ -1192,10 +2002,243 @@ async def delete_vehicle_option(option_id: str, current_user: User = Depends(get
     result = await db.vehicle_options.delete_one({"option_id": option_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Option not found")
+    await record_tombstones("vehicle_options", [option_id])
+    await vehicle_options_changed()
     return {"message": "Option deleted"}
 
+# Delta sync
+# Every write to members, vehicles and vehicle_options stamps the documents it
+# touched with sync_seq, the next value of the "sync" counter in data_versions,
+# and sync_at. Deletions leave a tombstone in sync_tombstones under their own
+# sequence number; clear-all-data leaves one "*" tombstone, which sends every
+# client back to a full sync. GET /api/sync?since=<token> returns what changed
+# after the token, oldest first, with the token to send next time. Tokens are
+# opaque to clients: the sequence number reached, prefixed with "r" while a
+# full sync is still being paged.
+#
+# Two writes can complete out of sequence order, and a token must never move
+# past a sequence number whose write is still in flight. sync_at (and a
+# tombstone's deleted_at) is taken after the sequence number was reserved, so
+# a stamp older than SYNC_SETTLE_SECONDS shows that every lower number was
+# reserved at least that long ago; each page is cut at the highest such
+# number, on the assumption that no write takes longer than SYNC_SETTLE_SECONDS
+# to stamp. Documents are not filtered by their own sync_at: a lower number
+# can carry a later sync_at than a higher one. Tombstones older than
+# SYNC_TOMBSTONE_DAYS are pruned; a token older than the newest pruned
+# tombstone gets a full sync.
+SYNC_SETTLE_SECONDS = float(os.environ.get('SYNC_SETTLE_SECONDS', '2'))
+SYNC_TOMBSTONE_DAYS = float(os.environ.get('SYNC_TOMBSTONE_DAYS', '90'))
+
+# Synced collection -> (id field, response model)
+SYNC_COLLECTIONS = {
+    "members": ("member_id", Member),
+    "vehicles": ("vehicle_id", Vehicle),
+    "vehicle_options": ("option_id", VehicleOption),
+}
+SYNC_RESET = "*"
+
+async def reserve_sync_seqs(count: int) -> int:
+    """Reserve count consecutive sync sequence numbers; returns the first"""
+    return await bump_data_version("sync", count) - count + 1
+
+async def stamp_sync(collection: str, ids) -> None:
+    """Call after writing the documents with these ids, once the write has completed"""
+    ids = [i for i in dict.fromkeys(ids) if i]
+    if not ids:
+        return
+    key = SYNC_COLLECTIONS[collection][0]
+    first = await reserve_sync_seqs(len(ids))
+    now = datetime.now(timezone.utc).isoformat()
+    for start in range(0, len(ids), 1000):
+        await db[collection].bulk_write([
+            UpdateOne({key: doc_id}, {"$set": {"sync_seq": first + start + i, "sync_at": now}})
+            for i, doc_id in enumerate(ids[start:start + 1000])
+        ], ordered=False)
+
+async def record_tombstones(collection: str, ids) -> None:
+    """Call after deleting the documents with these ids"""
+    ids = [i for i in dict.fromkeys(ids) if i]
+    if not ids:
+        return
+    first = await reserve_sync_seqs(len(ids))
+    now = datetime.now(timezone.utc).isoformat()
+    await db.sync_tombstones.insert_many([
+        {"seq": first + i, "collection": collection, "id": doc_id, "deleted_at": now}
+        for i, doc_id in enumerate(ids)
+    ])
+    await prune_tombstones()
+
+async def settled_sync_seq(settled: str) -> int:
+    """The highest sequence number below which every write has been stamped, by the settle window"""
+    latest = [await db.sync_tombstones.find_one(
+        {"deleted_at": {"$lte": settled}}, {"_id": 0, "seq": 1}, sort=[("seq", -1)])]
+    for collection in SYNC_COLLECTIONS:
+        doc = await db[collection].find_one(
+            {"sync_at": {"$lte": settled}}, {"_id": 0, "sync_seq": 1}, sort=[("sync_seq", -1)])
+        latest.append(doc and {"seq": doc["sync_seq"]})
+    return max((d["seq"] for d in latest if d), default=0)
+
+async def record_sync_reset() -> None:
+    """Call after clearing all data: clients drop their copy and sync from scratch"""
+    await db.sync_tombstones.delete_many({})
+    await record_tombstones(SYNC_RESET, [SYNC_RESET])
+    # Whatever survived is restamped after the reset, so a full sync can start there
+    await backfill_sync_stamps({})
+
+async def prune_tombstones() -> None:
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=SYNC_TOMBSTONE_DAYS)).isoformat()
+    newest = await db.sync_tombstones.find_one({"deleted_at": {"$lt": cutoff}}, {"_id": 0, "seq": 1}, sort=[("seq", -1)])
+    if newest:
+        # Tokens before this point may have missed a pruned deletion
+        await db.data_versions.update_one({"_id": "sync_horizon"}, {"$max": {"version": newest["seq"]}}, upsert=True)
+        await db.sync_tombstones.delete_many({"seq": {"$lte": newest["seq"]}})
+
+async def backfill_sync_stamps(query: Optional[dict] = None) -> int:
+    """Stamp documents written before delta sync existed, or loaded around the API"""
+    if query is None:
+        query = {"sync_seq": {"$exists": False}}
+    stamped = 0
+    for collection, (key, _) in SYNC_COLLECTIONS.items():
+        cursor = db[collection].find(query, {"_id": 0, key: 1})
+        ids = [doc.get(key) async for doc in cursor]
+        await stamp_sync(collection, ids)
+        stamped += len(ids)
+    return stamped
+
+@api_router.get("/sync")
+async def sync_changes(
+    since: str = "0",
+    limit: int = Query(1000, ge=1, le=10000),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Members, vehicles and vehicle options changed after the since token, oldest first:
+    {"token", "reset", "has_more", "members", "vehicles", "vehicle_options",
+     "deleted": {"members": [ids], "vehicles": [ids], "vehicle_options": [ids]}}
+    Documents are returned as they are now. With reset true (since=0, or a token the
+    server can no longer serve), the client replaces its copy with what follows.
+    Call again with the returned token; while has_more is true there is more to fetch.
+    """
+    resuming = since.startswith("r")
+    digits = since[1:] if resuming else since
+    if not digits.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    since_seq = int(digits)
+    
+    versions = await get_data_versions(["sync", "sync_horizon"])
+    last_reset = await db.sync_tombstones.find_one({"collection": SYNC_RESET}, {"_id": 0, "seq": 1})
+    reset_seq = last_reset["seq"] if last_reset else 0
+    reset = (
+        since_seq == 0 or since_seq > versions["sync"] or since_seq < reset_seq
+        # A full sync being paged holds only documents that still existed, so pruned deletions cannot matter
+        or (since_seq < versions["sync_horizon"] and not resuming)
+    )
+    if reset:
+        # Every document that survived the last reset was restamped after it
+        since_seq = reset_seq
+    settled = (datetime.now(timezone.utc) - timedelta(seconds=SYNC_SETTLE_SECONDS)).isoformat()
+    window = {"$gt": since_seq, "$lte": await settled_sync_seq(settled)}
+    
+    # (seq, collection, id, document or None for a deletion), limit + 1 from each source
+    events = []
+    for collection, (key, _) in SYNC_COLLECTIONS.items():
+        docs = await db[collection].find(
+            {"sync_seq": window}, {"_id": 0}
+        ).sort("sync_seq", 1).limit(limit + 1).to_list(limit + 1)
+        events.extend((d["sync_seq"], collection, d.get(key), d) for d in docs)
+    if not reset:
+        tombstones = await db.sync_tombstones.find(
+            {"seq": window}, {"_id": 0}
+        ).sort("seq", 1).limit(limit + 1).to_list(limit + 1)
+        events.extend((t["seq"], t["collection"], t["id"], None) for t in tombstones if t["collection"] in SYNC_COLLECTIONS)
+    events.sort(key=lambda e: e[0])
+    page = events[:limit]
+    
+    # Only the latest event for a document counts (e.g. an id deleted and written again)
+    latest = {}
+    for seq, collection, doc_id, doc in page:
+        latest.pop((collection, doc_id), None)
+        latest[(collection, doc_id)] = doc
+    changed = {collection: [] for collection in SYNC_COLLECTIONS}
+    deleted = {collection: [] for collection in SYNC_COLLECTIONS}
+    for (collection, doc_id), doc in latest.items():
+        if doc is None:
+            deleted[collection].append(doc_id)
+        else:
+            changed[collection].append(doc)
+    
+    has_more = len(events) > limit
+    token = page[-1][0] if page else since_seq
+    if not has_more:
+        # Nothing up to the horizon can still be in flight: its writes finished a retention period ago
+        token = max(token, versions["sync_horizon"])
+    return FastJSONResponse({
+        "token": f"r{token}" if has_more and (reset or resuming) else str(token),
+        "reset": reset,
+        "has_more": has_more,
+        **{collection: response_documents(docs, SYNC_COLLECTIONS[collection][1]) for collection, docs in changed.items()},
+        "deleted": deleted,
+    })
+
+def member_document_from_row(row: dict, member_id: str, member_number: str, now: datetime) -> dict:
+    """The member document a bulk upload CSV row is stored as"""
+    # Parse family members if present
+    family_members = None
+    if row.get('family_members'):
+        family_members = [m.strip() for m in row.get('family_members').split(';') if m.strip()]
+
+    # Clean up email fields - convert empty strings to None
+    email1 = row.get('email1', '').strip() if row.get('email1') else None
+    email1 = email1 if email1 and '@' in email1 else None
+
+    email2 = row.get('email2', '').strip() if row.get('email2') else None
+    email2 = email2 if email2 and '@' in email2 else None
+
+    # Clean up membership_type - default to 'Full' if empty
+    membership_type = row.get('membership_type', '').strip()
+    if membership_type not in ['Full', 'Family', 'Junior']:
+        membership_type = 'Full'
+
+    # Clean up interest - default to 'Both' if empty
+    interest = row.get('interest', '').strip()
+    if interest not in ['Drag Racing', 'Car Enthusiast', 'Both']:
+        interest = 'Both'
+
+    return {
+        "member_id": member_id,
+        "member_number": member_number,
+        **member_number_sort_fields(member_number),
+        **EMPTY_VEHICLE_SUMMARY,
+        "name": row.get('name', ''),
+        "address": row.get('address', ''),
+        "suburb": row.get('suburb', ''),
+        "postcode": row.get('postcode', ''),
+        "state": row.get('state', ''),
+        "phone1": row.get('phone1', '').strip() if row.get('phone1') else None,
+        "phone2": row.get('phone2', '').strip() if row.get('phone2') else None,
+        "email1": email1,
+        "email2": email2,
+        "life_member": row.get('life_member', '').lower() in ['true', 'yes', '1'],
+        "financial": row.get('financial', '').lower() in ['true', 'yes', '1'],
+        "inactive": row.get('inactive', '').lower() in ['true', 'yes', '1'],
+        "membership_type": membership_type,
+        "family_members": family_members,
+        "interest": interest,
+        "date_paid": datetime.fromisoformat(row['date_paid']).isoformat() if row.get('date_paid') and row.get('date_paid').strip() else None,
+        "expiry_date": datetime.fromisoformat(row['expiry_date']).isoformat() if row.get('expiry_date') and row.get('expiry_date').strip() else None,
+        "comments": row.get('comments', '').strip() if row.get('comments') else None,
+        "receive_emails": row.get('receive_emails', '').lower() not in ['false', 'no', '0'],
+        "receive_sms": row.get('receive_sms', '').lower() not in ['false', 'no', '0'],
+        "created_at": now.isoformat(),
+        "updated_at": now.isoformat()
+    }
+
 @api_router.post("/members/bulk-upload")
-async def bulk_upload_members(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def bulk_upload_members(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["bulk"])
+):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files allowed")
     
@@ -1216,18 +2259,13 @@ async def bulk_upload_members(file: UploadFile = File(...), current_user: User =
     reader = csv.DictReader(io.StringIO(csv_data))
     
     # Get the highest numeric member number for auto-generation
-    all_members = await db.members.find({}, {"_id": 0, "member_number": 1}).to_list(10000)
-    numeric_numbers = []
-    for m in all_members:
-        try:
-            numeric_numbers.append(int(m.get("member_number", 0)))
-        except (ValueError, TypeError):
-            pass
-    next_auto_number = max(numeric_numbers) + 1 if numeric_numbers else 1
+    next_auto_number = await get_next_member_number()
     
     count = 0
     skipped = 0
     errors = []
+    contact_changes = {}
+    member_ids = []
     for idx, row in enumerate(reader, start=2):
         try:
             member_id = f"member_{uuid.uuid4().hex[:12]}"
@@ -1247,55 +2285,10 @@ async def bulk_upload_members(file: UploadFile = File(...), current_user: User =
                 print(f"Skipping duplicate member_number: {member_number}")
                 continue
             
-            # Parse family members if present
-            family_members = None
-            if row.get('family_members'):
-                family_members = [m.strip() for m in row.get('family_members').split(';') if m.strip()]
-            
-            # Clean up email fields - convert empty strings to None
-            email1 = row.get('email1', '').strip() if row.get('email1') else None
-            email1 = email1 if email1 and '@' in email1 else None
-            
-            email2 = row.get('email2', '').strip() if row.get('email2') else None
-            email2 = email2 if email2 and '@' in email2 else None
-            
-            # Clean up membership_type - default to 'Full' if empty
-            membership_type = row.get('membership_type', '').strip()
-            if membership_type not in ['Full', 'Family', 'Junior']:
-                membership_type = 'Full'
-            
-            # Clean up interest - default to 'Both' if empty
-            interest = row.get('interest', '').strip()
-            if interest not in ['Drag Racing', 'Car Enthusiast', 'Both']:
-                interest = 'Both'
-            
-            new_member = {
-                "member_id": member_id,
-                "member_number": member_number,
-                "name": row.get('name', ''),
-                "address": row.get('address', ''),
-                "suburb": row.get('suburb', ''),
-                "postcode": row.get('postcode', ''),
-                "state": row.get('state', ''),
-                "phone1": row.get('phone1', '').strip() if row.get('phone1') else None,
-                "phone2": row.get('phone2', '').strip() if row.get('phone2') else None,
-                "email1": email1,
-                "email2": email2,
-                "life_member": row.get('life_member', '').lower() in ['true', 'yes', '1'],
-                "financial": row.get('financial', '').lower() in ['true', 'yes', '1'],
-                "inactive": row.get('inactive', '').lower() in ['true', 'yes', '1'],
-                "membership_type": membership_type,
-                "family_members": family_members,
-                "interest": interest,
-                "date_paid": datetime.fromisoformat(row['date_paid']).isoformat() if row.get('date_paid') and row.get('date_paid').strip() else None,
-                "expiry_date": datetime.fromisoformat(row['expiry_date']).isoformat() if row.get('expiry_date') and row.get('expiry_date').strip() else None,
-                "comments": row.get('comments', '').strip() if row.get('comments') else None,
-                "receive_emails": row.get('receive_emails', '').lower() not in ['false', 'no', '0'],
-                "receive_sms": row.get('receive_sms', '').lower() not in ['false', 'no', '0'],
-                "created_at": now.isoformat(),
-                "updated_at": now.isoformat()
-            }
+            new_member = member_document_from_row(row, member_id, member_number, now)
             await db.members.insert_one(new_member)
+            member_ids.append(member_id)
+            contact_list_changes(None, new_member, contact_changes)
             count += 1
         except Exception as e:
             member_name = row.get('name', 'Unknown')
@@ -1308,6 +2301,12 @@ async def bulk_upload_members(file: UploadFile = File(...), current_user: User =
                 errors.append(f"Row {idx} ({member_num} - {member_name}): {error_msg[:100]}")
             continue
     
+    if count > 0:
+        await stamp_sync("members", member_ids)
+        await data_changed("members")
+        await apply_contact_list_changes(contact_changes)
+        await suburb_index.changed()
+    
     message_parts = [f"{count} members uploaded"]
     if skipped > 0:
         message_parts.append(f"{skipped} duplicates skipped")
@@ -1321,7 +2320,11 @@ async def bulk_upload_members(file: UploadFile = File(...), current_user: User =
     return {"message": ", ".join(message_parts) if skipped > 0 else f"{count} members uploaded successfully"}
 
 @api_router.post("/vehicles/bulk-upload")
-async def bulk_upload_vehicles(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def bulk_upload_vehicles(
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["bulk"])
+):
     if current_user.role == "member_editor":
         raise HTTPException(status_code=403, detail="Full editor or admin access required")
     
@@ -1347,6 +2350,8 @@ async def bulk_upload_vehicles(file: UploadFile = File(...), current_user: User
     count = 0
     skipped = 0
     errors = []
+    member_ids = set()
+    vehicle_ids = []
     
     for idx, row in enumerate(reader, start=2):
         try:
@@ -1381,11 +2386,18 @@ async def bulk_upload_vehicles(file: UploadFile = File(...), current_user: User
                 "updated_at": now.isoformat()
             }
             await db.vehicles.insert_one(new_vehicle)
+            vehicle_ids.append(vehicle_id)
+            member_ids.add(new_vehicle["member_id"])
             count += 1
         except Exception as e:
             errors.append(f"Row {idx}: {str(e)}")
             continue
     
+    if count > 0:
+        await stamp_sync("vehicles", vehicle_ids)
+        await data_changed("vehicles")
+        await refresh_vehicle_summaries(member_ids)
+    
     message_parts = [f"{count} vehicles uploaded"]
     if skipped > 0:
         message_parts.append(f"{skipped} duplicates skipped")
@@ -1398,8 +2410,15 @@ async def bulk_upload_vehicles(file: UploadFile = File(...), current_user: User
     
     return {"message": ", ".join(message_parts) if skipped > 0 else f"{count} vehicles uploaded successfully"}
 
+# The API's member fields; sort keys, vehicle summaries and sync stamps stay out of the CSV
+MEMBER_EXPORT_COLUMNS = list(Member.model_fields)
+
 @api_router.post("/members/export")
-async def export_members(filters: ExportFilters, current_user: User = Depends(get_current_user)):
+async def export_members(
+    filters: ExportFilters,
+    current_user: User = Depends(get_current_user),
+    admitted: AdmissionSlot = Depends(admission["export"])
+):
     
     query = {}
     if filters.receive_emails is not None:
@@ -1409,11 +2428,11 @@ async def export_members(filters: ExportFilters, current_user: User = Depends(ge
     if filters.interest:
         query["interest"] = filters.interest
     
-    members = await db.members.find(query, {"_id": 0}).to_list(10000)
+    members = await db.members.find(query, {"_id": 0, **{f: 1 for f in MEMBER_EXPORT_COLUMNS}}).to_list(10000)
     
     output = io.StringIO()
     if members:
-        writer = csv.DictWriter(output, fieldnames=members[0].keys())
+        writer = csv.DictWriter(output, fieldnames=MEMBER_EXPORT_COLUMNS)
         writer.writeheader()
         for member in members:
             for key, value in member.items():
@@ -1422,11 +2441,11 @@ async def export_members(filters: ExportFilters, current_user: User = Depends(ge
             writer.writerow(member)
     
     output.seek(0)
-    return StreamingResponse(
+    return admitted.hold(StreamingResponse(
         iter([output.getvalue()]),
         media_type="text/csv",
         headers={"Content-Disposition": "attachment; filename=members_export.csv"}
-    )
+    ))
 
 import re
 
@@ -1445,14 +2464,190 @@ def sort_member_number_key(member):
     # Fallback for non-standard formats
     return (float('inf'), str(num_str))
 
+# Stored form of sort_member_number_key, written on every member insert so list
+# endpoints can sort in MongoDB using the (member_number_num, member_number_suffix) index.
+# Non-standard numbers get a numeric part larger than any real one, like float('inf') above.
+MEMBER_NUMBER_FALLBACK_NUM = 2 ** 62
+MEMBER_NUMBER_SORT = [("member_number_num", 1), ("member_number_suffix", 1)]
+MEMBER_NUMBER_SORT_DESC = [("member_number_num", -1), ("member_number_suffix", -1)]
+
+def member_number_sort_fields(member_number) -> dict:
+    num_part, suffix = sort_member_number_key({"member_number": member_number})
+    if num_part >= MEMBER_NUMBER_FALLBACK_NUM:
+        num_part, suffix = MEMBER_NUMBER_FALLBACK_NUM, str(member_number)
+    return {"member_number_num": num_part, "member_number_suffix": suffix}
+
+async def get_next_member_number() -> int:
+    """Next auto-generated member number: one above the highest purely numeric number"""
+    top = await db.members.find_one(
+        {"member_number_suffix": "", "member_number_num": {"$lt": MEMBER_NUMBER_FALLBACK_NUM}},
+        {"_id": 0, "member_number_num": 1},
+        sort=MEMBER_NUMBER_SORT_DESC
+    )
+    return top["member_number_num"] + 1 if top else 1
+
+async def backfill_member_number_keys() -> int:
+    """Add member number sort fields to members written before they existed"""
+    updated = 0
+    cursor = db.members.find({"member_number_num": {"$exists": False}}, {"_id": 0, "member_id": 1, "member_number": 1})
+    async for m in cursor:
+        await db.members.update_one(
+            {"member_id": m["member_id"]},
+            {"$set": member_number_sort_fields(m.get("member_number", "0"))}
+        )
+        updated += 1
+    return updated
+
+@api_router.get("/metrics")
+async def get_metrics(request: Request, authorization: Optional[str] = Header(None)):
+    """Prometheus text format; needs METRICS_TOKEN as a bearer token or an admin session, unless METRICS_PUBLIC"""
+    allowed = (
+        metrics.METRICS_PUBLIC
+        or (metrics.METRICS_TOKEN and secrets.compare_digest(authorization or "", f"Bearer {metrics.METRICS_TOKEN}"))
+        or await is_admin_request(request)
+    )
+    if not allowed:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+async def is_admin_request(request: Request) -> bool:
+    """Authorization check for middleware, outside FastAPI's dependency injection"""
+    try:
+        user = await get_current_user(request, request.cookies.get("session_token"))
+    except HTTPException:
+        return False
+    return user.role == "admin"
+
+@api_router.get("/admin/profiles")
+async def get_profiles(current_user: User = Depends(get_current_user)):
+    """Stored request profiles, newest first (add X-Profile: 1 or ?profile=1 to a request to make one)"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return profiling.list_profiles()
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, current_user: User = Depends(get_current_user)):
+    """The raw cProfile output, for snakeviz or pstats"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    path = profiling.profile_path(profile_id, ".prof")
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+
+@api_router.get("/admin/profiles/{profile_id}/summary")
+async def get_profile_summary(
+    profile_id: str,
+    sort: Literal['cumulative', 'tottime', 'calls'] = 'cumulative',
+    limit: int = Query(50, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """The top functions of a profile as a pstats text report"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    summary = profiling.profile_summary(profile_id, sort, limit)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(summary)
+
+@api_router.get("/admin/memory")
+async def get_memory_status(current_user: User = Depends(get_current_user)):
+    """RSS, per-route memory growth (MEMORY_TRACKING) and tracemalloc state of this worker"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return memory.memory_status()
+
+def require_tracemalloc():
+    if not memory.tracemalloc.is_tracing():
+        raise HTTPException(status_code=409, detail="tracemalloc is not running; start the server with TRACEMALLOC_FRAMES set")
+
+@api_router.get("/admin/memory/top")
+async def get_top_allocations(
+    key_type: Literal['lineno', 'filename', 'traceback'] = 'lineno',
+    limit: int = Query(25, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """Allocation sites holding the most memory right now"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    require_tracemalloc()
+    return await asyncio.to_thread(memory.top_allocations, key_type, limit)
+
+@api_router.post("/admin/memory/snapshots")
+async def take_memory_snapshot(current_user: User = Depends(get_current_user)):
+    """Keep a tracemalloc snapshot to diff against later ones"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    require_tracemalloc()
+    return await asyncio.to_thread(memory.take_snapshot)
+
+@api_router.get("/admin/memory/snapshots/{snapshot_id}/diff")
+async def diff_memory_snapshots(
+    snapshot_id: int,
+    base: int,
+    key_type: Literal['lineno', 'filename', 'traceback'] = 'lineno',
+    limit: int = Query(25, ge=1, le=500),
+    current_user: User = Depends(get_current_user)
+):
+    """Allocation sites that grew the most between snapshot base and snapshot_id"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    diff = await asyncio.to_thread(memory.diff_snapshots, snapshot_id, base, key_type, limit)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return diff
+
+@api_router.get("/admin/single-flight")
+async def get_single_flight_stats(current_user: User = Depends(get_current_user)):
+    """Per-endpoint counts of computations run and callers that shared one"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return single_flight.stats
+
+@api_router.post("/admin/rebuild-contact-lists")
+async def rebuild_contact_lists_endpoint(
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["maintenance"])
+):
+    """Recompute the materialized contact lists, e.g. after editing members outside the app"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    entries = await rebuild_contact_lists()
+    await data_changed("members")
+    return {"message": f"Rebuilt contact lists ({entries} entries)"}
+
+@api_router.post("/admin/rebuild-vehicle-summaries")
+async def rebuild_vehicle_summaries_endpoint(
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["maintenance"])
+):
+    """Recompute every member's vehicle summary, e.g. after editing vehicles outside the app"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    updated = await rebuild_vehicle_summaries()
+    await data_changed("vehicles")
+    return {"message": f"Rebuilt vehicle summaries ({updated} members updated)"}
+
+@api_router.get("/admin/indexes")
+async def get_index_report(current_user: User = Depends(get_current_user)):
+    """Declared indexes that are missing, undeclared ones, and ones unused since startup"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await index_report(db)
+
+@api_router.get("/admin/admission")
+async def get_admission_stats(current_user: User = Depends(get_current_user)):
+    """Concurrency, queue depth and wait time for each heavy endpoint class"""
+    if current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {name: gate.stats() for name, gate in admission.items()}
+
 @api_router.post("/admin/clear-all-data")
 async def clear_all_data(
-    request: Request,
     confirm: str = Query(...),
-    session_token: Optional[str] = Cookie(None)
+    current_user: User = Depends(get_current_user),
+    admitted: None = Depends(admission["maintenance"])
 ):
-    current_user = await get_current_user(request, session_token)
-    
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
@@ -1466,6 +2661,10 @@ async def clear_all_data(
     # Delete all members and vehicles
     await db.members.delete_many({})
     await db.vehicles.delete_many({})
+    await db.contact_list_entries.delete_many({})
+    await record_sync_reset()
+    await data_changed("members", "vehicles")
+    await suburb_index.changed()
     
     return {
         "message": "All data cleared successfully",
@@ -1475,6 +2674,12 @@ async def clear_all_data(
 
 app.include_router(api_router)
 
+# Admins can profile any request with X-Profile: 1 or ?profile=1
+app.add_middleware(profiling.ProfilingMiddleware, authorize=is_admin_request)
+
+# Member lists, reports and CSV exports compress very well; transfer time dominates on the Pi
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1483,6 +2688,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Opt-in: per-request RSS accounting
+if memory.MEMORY_TRACKING:
+    app.add_middleware(memory.MemoryMiddleware)
+
+# Opt-in: logs the stack and route whenever the event loop stalls past LOOP_WATCHDOG_MS
+loop_watchdog = LoopWatchdog(LOOP_WATCHDOG_MS) if LOOP_WATCHDOG_MS > 0 else None
+if loop_watchdog:
+    app.add_middleware(WatchdogMiddleware, watchdog=loop_watchdog)
+
+# Added last, so it is the outermost layer and the app duration covers the whole request
+app.add_middleware(ServerTimingMiddleware)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -1493,6 +2712,54 @@ logger = logging.getLogger(__name__)
 async def shutdown_db_client():
     client.close()
 
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    app.state.loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+
+@app.on_event("shutdown")
+async def stop_event_loop_monitor():
+    app.state.loop_monitor.cancel()
+    if loop_watchdog:
+        loop_watchdog.stop()
+
+@app.on_event("startup")
+async def start_tracemalloc():
+    memory.start_tracemalloc()
+
+@app.on_event("startup")
+async def start_loop_watchdog():
+    if loop_watchdog:
+        loop_watchdog.start()
+
+@app.on_event("startup")
+async def init_indexes():
+    if INDEX_APPLY_ON_STARTUP:
+        created = await apply_indexes(db)
+        for collection, names in created.items():
+            logger.info(f"Created indexes on {collection}: {', '.join(names)}")
+    report = await index_report(db)
+    for collection, drift in report.items():
+        if drift["missing"]:
+            logger.warning(f"Missing indexes on {collection}: {', '.join(drift['missing'])}")
+        if drift["extra"]:
+            logger.info(f"Undeclared indexes on {collection}: {', '.join(drift['extra'])}")
+
+@app.on_event("startup")
+async def backfill_member_fields():
+    updated = await backfill_member_number_keys()
+    if updated:
+        logger.info(f"Backfilled member number sort keys on {updated} members")
+    if await db.members.find_one({"active_vehicle_expiries": {"$exists": False}}, {"_id": 1}):
+        updated = await rebuild_vehicle_summaries()
+        logger.info(f"Built vehicle summaries on {updated} members")
+
+@app.on_event("startup")
+async def init_contact_lists():
+    # Build the lists once; after that member writes keep them current
+    if await get_data_version("contact_lists") == 0:
+        entries = await rebuild_contact_lists()
+        logger.info(f"Built materialized contact lists ({entries} entries)")
+
 @app.on_event("startup")
 async def init_default_options():
     existing_statuses = await db.vehicle_options.count_documents({"type": "status"})
@@ -1516,3 +2783,13 @@ async def init_default_options():
                 "value": reason,
                 "created_at": datetime.now(timezone.utc).isoformat()
             })
+    
+    if existing_statuses == 0 or existing_reasons == 0:
+        await vehicle_options_changed()
+
+@app.on_event("startup")
+async def init_sync_stamps():
+    # Runs after the default options are created so they are stamped too
+    stamped = await backfill_sync_stamps()
+    if stamped:
+        logger.info(f"Stamped {stamped} documents for delta sync")
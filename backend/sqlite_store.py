@@ -0,0 +1,1190 @@
+"""
+SQLite storage backend.
+
+DB_BACKEND=sqlite keeps the database in one SQLite file instead of MongoDB, for
+small installs where running mongod is the largest cost (a 2 GB board, no
+separate database service). SQLiteClient, SQLiteDatabase and SQLiteCollection
+implement the part of the Motor API that server.py and indexes.py use, so the
+collections (db.members, db.vehicles, ...) remain the one storage interface and
+every endpoint runs unchanged on either backend.
+
+Each collection is a table of JSON documents (_id, doc). A filter is translated
+to SQL over json_extract(doc, '$."field"'), the same expression the indexes in
+indexes.INDEXES are created on, so SQLite's planner uses them for filters and
+sorts. Query operators SQLite cannot evaluate, and every aggregation stage after
+a leading $match, run in Python over the rows SQL returned.
+
+The file runs in WAL mode: readers do not block the writer, and several uvicorn
+workers can share it. Each process has one connection, used from one thread,
+so a process runs one operation at a time; read-modify-write operations
+(find_one_and_update, $inc, upserts) run in a single write transaction.
+
+Operations are timed into the request's Server-Timing header and the slow query
+log, as Mongo commands are (instrumentation.py).
+
+Settings (environment):
+    DB_BACKEND       mongo (default) or sqlite
+    SQLITE_DIR       Directory holding <DB_NAME>.sqlite3 (default backend/data)
+    SQLITE_CACHE_MB  Page cache per connection (default 16)
+"""
+
+import asyncio
+import functools
+import json
+import operator
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+import instrumentation
+
+SQLITE_CACHE_MB = int(os.environ.get('SQLITE_CACHE_MB', '16'))
+
+# Rows fetched per step while iterating a cursor
+FETCH_SIZE = 500
+
+_MISSING = object()
+
+
+class _Untranslatable(Exception):
+    """A filter clause with no SQL translation; it is evaluated in Python instead"""
+
+
+# Documents
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dump(doc: dict) -> str:
+    return json.dumps({k: v for k, v in doc.items() if k != "_id"}, default=_json_default,
+                      separators=(",", ":"), ensure_ascii=False)
+
+
+def _load(row) -> dict:
+    return {"_id": row[0], **json.loads(row[1])}
+
+
+def _id_value(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+def _get(doc, field: str):
+    for part in field.split("."):
+        if isinstance(doc, dict) and part in doc:
+            doc = doc[part]
+        else:
+            return _MISSING
+    return doc
+
+
+def _set_path(doc: dict, field: str, value):
+    parts = field.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset_path(doc: dict, field: str):
+    parts = field.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(parts[-1], None)
+
+
+# Filters in Python
+
+def _sort_value(value):
+    """Key ordering values of any type as MongoDB does: null < numbers < strings < objects < arrays < bool < dates"""
+    if value is _MISSING or value is None:
+        return (1, 0)
+    if isinstance(value, bool):
+        return (8, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, str):
+        return (3, value)
+    if isinstance(value, dict):
+        return (4, json.dumps(value, sort_keys=True, default=str))
+    if isinstance(value, list):
+        return (5, json.dumps(value, sort_keys=True, default=str))
+    if isinstance(value, datetime):
+        return (9, value.isoformat())
+    return (10, str(value))
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, bool) != isinstance(b, bool):
+        return False
+    return _id_value(a) == _id_value(b)
+
+
+def _equals(value, target) -> bool:
+    if value is _MISSING:
+        return target is None
+    if isinstance(value, list) and not isinstance(target, list):
+        return any(_same(v, target) for v in value)
+    return _same(value, target)
+
+
+COMPARISONS = {"$gt": operator.gt, "$gte": operator.ge, "$lt": operator.lt, "$lte": operator.le}
+
+TYPES = {
+    "string": lambda v: isinstance(v, str),
+    "bool": lambda v: isinstance(v, bool),
+    "int": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "long": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "double": lambda v: isinstance(v, float),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+    "date": lambda v: isinstance(v, datetime),
+}
+
+
+def _compare(value, op: str, target) -> bool:
+    if isinstance(value, list):
+        return any(_compare(v, op, target) for v in value)
+    a, b = _sort_value(value), _sort_value(target)
+    # Only values of the same type compare, as in MongoDB
+    return a[0] == b[0] and COMPARISONS[op](a[1], b[1])
+
+
+@functools.lru_cache(maxsize=256)
+def _regex(pattern: str, options: str = ""):
+    flags = 0
+    for option, flag in (("i", re.IGNORECASE), ("m", re.MULTILINE), ("s", re.DOTALL), ("x", re.VERBOSE)):
+        if option in options:
+            flags |= flag
+    return re.compile(pattern, flags)
+
+
+def _regex_args(pattern, options: str):
+    if isinstance(pattern, re.Pattern):
+        return pattern.pattern, options + ("i" if pattern.flags & re.IGNORECASE else "")
+    return pattern, options or ""
+
+
+def _is_operator_doc(cond) -> bool:
+    return isinstance(cond, dict) and bool(cond) and all(k.startswith("$") for k in cond)
+
+
+def _operator_matches(value, op: str, arg, options: str) -> bool:
+    if op == "$eq":
+        return _equals(value, arg)
+    if op == "$ne":
+        return not _equals(value, arg)
+    if op in COMPARISONS:
+        return _compare(None if value is _MISSING else value, op, arg)
+    if op == "$in":
+        return any(_equals(value, a) for a in arg)
+    if op == "$nin":
+        return not any(_equals(value, a) for a in arg)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if op == "$regex":
+        regex = _regex(*_regex_args(arg, options))
+        values = value if isinstance(value, list) else [value]
+        return any(isinstance(v, str) and regex.search(v) is not None for v in values)
+    if op == "$type":
+        check = TYPES.get(arg)
+        if check is None:
+            raise OperationFailure(f"unsupported $type {arg!r}")
+        return value is not _MISSING and check(value)
+    if op == "$elemMatch":
+        if not isinstance(value, list):
+            return False
+        if _is_operator_doc(arg):
+            return any(_field_matches(v, arg) for v in value)
+        return any(isinstance(v, dict) and matches(v, arg) for v in value)
+    if op == "$size":
+        return isinstance(value, list) and len(value) == arg
+    if op == "$not":
+        return not _field_matches(value, arg)
+    raise OperationFailure(f"unknown operator: {op}")
+
+
+def _field_matches(value, cond) -> bool:
+    if isinstance(cond, re.Pattern):
+        return _operator_matches(value, "$regex", cond, "")
+    if _is_operator_doc(cond):
+        options = cond.get("$options", "")
+        return all(_operator_matches(value, op, arg, options) for op, arg in cond.items() if op != "$options")
+    return _equals(value, cond)
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in (query or {}).items():
+        if key == "$and":
+            if not all(matches(doc, q) for q in cond):
+                return False
+        elif key == "$or":
+            if not any(matches(doc, q) for q in cond):
+                return False
+        elif key == "$nor":
+            if any(matches(doc, q) for q in cond):
+                return False
+        elif key.startswith("$"):
+            raise OperationFailure(f"unknown top level operator: {key}")
+        elif not _field_matches(_get(doc, key), cond):
+            return False
+    return True
+
+
+# Filters in SQL
+
+def _path(field: str) -> str:
+    return "$." + ".".join('"' + part.replace('"', '\\"') + '"' for part in field.split("."))
+
+
+def _value_sql(field: str) -> str:
+    """The expression indexes are created on; filters must use exactly the same text"""
+    if field == "_id":
+        return "_id"
+    return "json_extract(doc, '" + _path(field).replace("'", "''") + "')"
+
+
+def _type_sql(field: str) -> str:
+    if field == "_id":
+        return "'text'"
+    return "json_type(doc, '" + _path(field).replace("'", "''") + "')"
+
+
+SQL_TYPES = {
+    "string": ("text",), "bool": ("true", "false"), "int": ("integer",), "long": ("integer",),
+    "double": ("real",), "number": ("integer", "real"), "array": ("array",), "object": ("object",),
+    "null": ("null",),
+}
+
+
+def _param(value):
+    if isinstance(value, (dict, list, re.Pattern)):
+        raise _Untranslatable(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return _id_value(value)
+
+
+def _type_guard(type_sql: str, value) -> str:
+    # SQLite orders integers before text; MongoDB only compares within a type
+    if isinstance(value, str):
+        return f"{type_sql} = 'text'"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{type_sql} IN ('integer', 'real')"
+    raise _Untranslatable(value)
+
+
+def _operator_sql(value_sql: str, type_sql: str, op: str, arg, options: str, field: str = None):
+    if op == "$eq":
+        if arg is None:
+            return f"{value_sql} IS NULL", []
+        return f"{value_sql} = ?", [_param(arg)]
+    if op == "$ne":
+        # IS NOT, unlike !=, also matches documents where the field is missing
+        if arg is None:
+            return f"{value_sql} IS NOT NULL", []
+        return f"{value_sql} IS NOT ?", [_param(arg)]
+    if op in COMPARISONS:
+        sql_op = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[op]
+        return f"({_type_guard(type_sql, arg)} AND {value_sql} {sql_op} ?)", [_param(arg)]
+    if op in ("$in", "$nin"):
+        values = [_param(a) for a in arg if a is not None]
+        clauses = []
+        if values:
+            clauses.append(f"{value_sql} IN ({', '.join('?' * len(values))})")
+        if any(a is None for a in arg):
+            clauses.append(f"{value_sql} IS NULL")
+        if op == "$in":
+            return "(" + " OR ".join(clauses) + ")" if clauses else "0", values
+        if not clauses:
+            return "1", values
+        # NOT IN alone would leave out documents missing the field
+        sql = f"NOT ({' OR '.join(clauses)})"
+        return (sql if None in arg else f"({value_sql} IS NULL OR {sql})"), values
+    if op == "$exists":
+        if arg:
+            return f"{type_sql} IS NOT NULL", []
+        # The value test narrows to null or missing through the index; the type test drops null
+        return f"({value_sql} IS NULL AND {type_sql} IS NULL)", []
+    if op == "$regex":
+        pattern, flags = _regex_args(arg, options)
+        return f"({type_sql} = 'text' AND regexp_search(?, ?, {value_sql}))", [pattern, flags]
+    if op == "$type" and arg in SQL_TYPES:
+        types = SQL_TYPES[arg]
+        return f"{type_sql} IN ({', '.join(repr(t) for t in types)})", []
+    if op == "$elemMatch" and _is_operator_doc(arg) and field not in (None, "_id"):
+        inner, params = _conditions_sql("e.value", "e.type", arg)
+        path = _path(field).replace("'", "''")
+        return f"EXISTS (SELECT 1 FROM json_each(doc, '{path}') AS e WHERE {inner})", params
+    raise _Untranslatable(op)
+
+
+def _conditions_sql(value_sql: str, type_sql: str, cond: dict, field: str = None):
+    clauses, params = [], []
+    options = cond.get("$options", "")
+    for op, arg in cond.items():
+        if op == "$options":
+            continue
+        sql, p = _operator_sql(value_sql, type_sql, op, arg, options, field)
+        clauses.append(sql)
+        params.extend(p)
+    return " AND ".join(clauses) or "1", params
+
+
+def _clause_sql(field: str, cond):
+    if field in ("$and", "$or", "$nor"):
+        parts = [_where_sql(q) for q in cond]
+        if not parts:
+            return "1", []
+        joined = (" OR " if field != "$and" else " AND ").join(f"({sql})" for sql, _ in parts)
+        params = [p for _, ps in parts for p in ps]
+        return (f"NOT ({joined})" if field == "$nor" else f"({joined})"), params
+    if field.startswith("$"):
+        raise _Untranslatable(field)
+    if _is_operator_doc(cond):
+        return _conditions_sql(_value_sql(field), _type_sql(field), cond, field)
+    if isinstance(cond, re.Pattern):
+        return _operator_sql(_value_sql(field), _type_sql(field), "$regex", cond, "")
+    return _operator_sql(_value_sql(field), _type_sql(field), "$eq", cond, "")
+
+
+def _where_sql(query: dict):
+    """The whole query as SQL, or _Untranslatable"""
+    clauses, params = [], []
+    for field, cond in query.items():
+        sql, p = _clause_sql(field, cond)
+        clauses.append(sql)
+        params.extend(p)
+    return " AND ".join(clauses) or "1", params
+
+
+def translate(query: dict):
+    """(where, params, residual): SQL for the clauses SQLite can evaluate, the rest as a filter for matches()"""
+    clauses, params, residual = [], [], {}
+    for field, cond in (query or {}).items():
+        try:
+            sql, p = _clause_sql(field, cond)
+        except _Untranslatable:
+            residual[field] = cond
+            continue
+        clauses.append(sql)
+        params.extend(p)
+    return " AND ".join(clauses) or "1", params, residual or None
+
+
+def _sort_spec(key_or_list, direction=None) -> list:
+    if key_or_list is None:
+        return []
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [(k, 1) if isinstance(k, str) else tuple(k) for k in key_or_list]
+
+
+def sort_documents(docs: list, spec: list) -> list:
+    for field, direction in reversed(spec):
+        docs.sort(key=lambda d: _sort_value(_get(d, field)), reverse=direction < 0)
+    return docs
+
+
+def _regexp_search(pattern, options, value) -> bool:
+    return isinstance(value, str) and _regex(pattern, options or "").search(value) is not None
+
+
+# Projections and aggregation expressions
+
+def _is_flag(value) -> bool:
+    return isinstance(value, (bool, int)) and not isinstance(value, float)
+
+
+def project(doc: dict, spec) -> dict:
+    if not spec:
+        return doc
+    if not isinstance(spec, dict):
+        spec = {field: 1 for field in spec}
+    id_spec = spec.get("_id", 1)
+    fields = {k: v for k, v in spec.items() if k != "_id"}
+    # {"_id": 0} alone excludes _id; {"_id": 1} alone keeps only _id
+    if all(_is_flag(v) and not v for v in (fields.values() if fields else [id_spec])):
+        out = dict(doc)
+        for field in fields:
+            _unset_path(out, field)
+        if _is_flag(id_spec) and not id_spec:
+            out.pop("_id", None)
+        return out
+    out = {}
+    if _is_flag(id_spec):
+        if id_spec and "_id" in doc:
+            out["_id"] = doc["_id"]
+    else:
+        value = evaluate(id_spec, doc)
+        if value is not _MISSING:
+            out["_id"] = value
+    for field, value in fields.items():
+        value = _get(doc, field) if _is_flag(value) else evaluate(value, doc)
+        if value is not _MISSING:
+            _set_path(out, field, value)
+    return out
+
+
+def _arg(value):
+    return None if value is _MISSING else value
+
+
+def _trim(method: str, arg: dict, doc: dict):
+    value = _arg(evaluate(arg["input"], doc))
+    if value is None:
+        return None
+    chars = arg.get("chars")
+    return getattr(value, method)(None if chars is None else evaluate(chars, doc))
+
+
+def _operator_value(op: str, arg, doc: dict):
+    if op == "$literal":
+        return arg
+    args = arg if isinstance(arg, list) else [arg]
+    if op in ("$eq", "$ne"):
+        a, b = (_arg(evaluate(x, doc)) for x in args)
+        return _same(a, b) if op == "$eq" else not _same(a, b)
+    if op in COMPARISONS:
+        a, b = (_sort_value(_arg(evaluate(x, doc))) for x in args)
+        return COMPARISONS[op](a, b)
+    if op in ("$trim", "$ltrim", "$rtrim"):
+        return _trim({"$trim": "strip", "$ltrim": "lstrip", "$rtrim": "rstrip"}[op], arg, doc)
+    if op in ("$toLower", "$toUpper"):
+        value = _arg(evaluate(args[0], doc))
+        value = "" if value is None else str(value)
+        return value.lower() if op == "$toLower" else value.upper()
+    if op == "$ifNull":
+        for x in args:
+            value = _arg(evaluate(x, doc))
+            if value is not None:
+                return value
+        return None
+    if op == "$concat":
+        values = [_arg(evaluate(x, doc)) for x in args]
+        return None if any(v is None for v in values) else "".join(values)
+    if op == "$size":
+        return len(_arg(evaluate(args[0], doc)) or [])
+    if op == "$in":
+        value, array = (_arg(evaluate(x, doc)) for x in args)
+        return any(_same(value, v) for v in array or [])
+    if op == "$and":
+        return all(_arg(evaluate(x, doc)) for x in args)
+    if op == "$or":
+        return any(_arg(evaluate(x, doc)) for x in args)
+    if op == "$not":
+        return not _arg(evaluate(args[0], doc))
+    if op == "$cond":
+        if isinstance(arg, dict):
+            args = [arg["if"], arg["then"], arg["else"]]
+        return _arg(evaluate(args[1] if _arg(evaluate(args[0], doc)) else args[2], doc))
+    raise OperationFailure(f"unsupported expression operator: {op}")
+
+
+def evaluate(expr, doc: dict):
+    """An aggregation expression against doc; _MISSING for a field path that is not there"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if isinstance(expr, list):
+        return [_arg(evaluate(e, doc)) for e in expr]
+    if isinstance(expr, dict):
+        if len(expr) == 1:
+            op, arg = next(iter(expr.items()))
+            if op.startswith("$"):
+                return _operator_value(op, arg, doc)
+        out = {}
+        for key, e in expr.items():
+            value = evaluate(e, doc)
+            if value is not _MISSING:
+                out[key] = value
+        return out
+    return expr
+
+
+# Aggregation
+
+def _group_key(value) -> str:
+    return json.dumps(_sort_value(value), default=str)
+
+
+def _group(docs: list, spec: dict) -> list:
+    groups = {}
+    for doc in docs:
+        key = _arg(evaluate(spec["_id"], doc))
+        group = groups.setdefault(_group_key(key), {"_id": key, "values": {f: [] for f in spec if f != "_id"}})
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            (op, arg), = accumulator.items()
+            group["values"][field].append(1 if op == "$count" else evaluate(arg, doc))
+    results = []
+    for group in groups.values():
+        out = {"_id": group["_id"]}
+        for field, accumulator in spec.items():
+            if field == "_id":
+                continue
+            op = next(iter(accumulator))
+            values = group["values"][field]
+            present = [v for v in values if v is not _MISSING]
+            if op in ("$sum", "$count"):
+                out[field] = sum(v for v in present if isinstance(v, (int, float)) and not isinstance(v, bool))
+            elif op == "$avg":
+                numbers = [v for v in present if isinstance(v, (int, float)) and not isinstance(v, bool)]
+                out[field] = sum(numbers) / len(numbers) if numbers else None
+            elif op == "$first":
+                out[field] = _arg(values[0])
+            elif op == "$last":
+                out[field] = _arg(values[-1])
+            elif op == "$push":
+                out[field] = present
+            elif op == "$addToSet":
+                seen = {}
+                for v in present:
+                    seen.setdefault(_group_key(v), v)
+                out[field] = list(seen.values())
+            elif op in ("$min", "$max"):
+                present = [v for v in present if v is not None]
+                pick = min if op == "$min" else max
+                out[field] = pick(present, key=_sort_value) if present else None
+            else:
+                raise OperationFailure(f"unsupported accumulator: {op}")
+        results.append(out)
+    return results
+
+
+def _unwind(docs: list, spec) -> list:
+    if isinstance(spec, str):
+        spec = {"path": spec}
+    field = spec["path"][1:]
+    index_field = spec.get("includeArrayIndex")
+    preserve = spec.get("preserveNullAndEmptyArrays", False)
+    out = []
+    for doc in docs:
+        value = _get(doc, field)
+        if isinstance(value, list) and value:
+            for i, element in enumerate(value):
+                copy = dict(doc)
+                _set_path(copy, field, element)
+                if index_field:
+                    copy[index_field] = i
+                out.append(copy)
+        elif value is not _MISSING and value is not None and not isinstance(value, list):
+            copy = dict(doc)
+            if index_field:
+                copy[index_field] = None
+            out.append(copy)
+        elif preserve:
+            copy = dict(doc)
+            if isinstance(value, list):
+                _unset_path(copy, field)
+            if index_field:
+                copy[index_field] = None
+            out.append(copy)
+    return out
+
+
+def run_pipeline(docs: list, pipeline: list) -> list:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [d for d in docs if matches(d, spec)]
+        elif name == "$project":
+            docs = [project(d, spec) for d in docs]
+        elif name in ("$addFields", "$set"):
+            docs = [{**d, **evaluate(spec, d)} for d in docs]
+        elif name == "$unset":
+            docs = [project(d, {f: 0 for f in ([spec] if isinstance(spec, str) else spec)}) for d in docs]
+        elif name == "$replaceRoot":
+            docs = [evaluate(spec["newRoot"], d) for d in docs]
+        elif name == "$unwind":
+            docs = _unwind(docs, spec)
+        elif name == "$sort":
+            docs = sort_documents(list(docs), list(spec.items()))
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        elif name == "$count":
+            docs = [{spec: len(docs)}] if docs else []
+        elif name == "$facet":
+            docs = [{facet: run_pipeline(list(docs), sub) for facet, sub in spec.items()}]
+        else:
+            raise OperationFailure(f"{name} is not supported by the SQLite backend")
+    return docs
+
+
+# Updates
+
+def _apply_update(doc: dict, update: dict, inserting: bool) -> dict:
+    if not any(k.startswith("$") for k in update):
+        # A replacement document
+        return {"_id": doc["_id"], **{k: v for k, v in update.items() if k != "_id"}}
+    doc = json.loads(json.dumps(doc, default=_json_default))
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            for field, value in fields.items():
+                _set_path(doc, field, json.loads(json.dumps(value, default=_json_default)))
+        elif op == "$setOnInsert":
+            continue
+        elif op == "$unset":
+            for field in fields:
+                _unset_path(doc, field)
+        elif op == "$inc":
+            for field, amount in fields.items():
+                current = _get(doc, field)
+                _set_path(doc, field, (0 if current is _MISSING or current is None else current) + amount)
+        elif op in ("$min", "$max"):
+            pick = min if op == "$min" else max
+            for field, value in fields.items():
+                current = _get(doc, field)
+                value = json.loads(json.dumps(value, default=_json_default))
+                _set_path(doc, field, value if current is _MISSING else pick(current, value, key=_sort_value))
+        else:
+            raise OperationFailure(f"update operator {op} is not supported by the SQLite backend")
+    return doc
+
+
+def _upsert_base(query: dict) -> dict:
+    """The equality fields of a filter, the starting point of an upserted document"""
+    doc = {}
+    for field, cond in (query or {}).items():
+        if field.startswith("$"):
+            continue
+        if _is_operator_doc(cond):
+            if "$eq" in cond:
+                _set_path(doc, field, cond["$eq"])
+        elif not isinstance(cond, re.Pattern):
+            _set_path(doc, field, cond)
+    return doc
+
+
+def _duplicate_key(error: sqlite3.IntegrityError, collection: str) -> DuplicateKeyError:
+    return DuplicateKeyError(f"E11000 duplicate key error collection: {collection} ({error})", 11000)
+
+
+class SQLiteCursor:
+    def __init__(self, collection, filter=None, projection=None, sort=None, skip=0, limit=0):
+        self.collection = collection
+        self.filter = filter or {}
+        self.projection = projection
+        self.sort_spec = _sort_spec(sort)
+        self.skip_count = skip
+        self.limit_count = limit
+
+    def sort(self, key_or_list, direction=None):
+        self.sort_spec = _sort_spec(key_or_list, direction)
+        return self
+
+    def skip(self, count: int):
+        self.skip_count = count
+        return self
+
+    def limit(self, count: int):
+        self.limit_count = count
+        return self
+
+    async def to_list(self, length=None):
+        docs = await self.collection._run("find", self.filter, self.collection._find, self.filter, self.sort_spec,
+                                          self.skip_count, length if length and not self.limit_count else self.limit_count)
+        docs = [project(d, self.projection) for d in docs]
+        return docs[:length] if length else docs
+
+    async def __aiter__(self):
+        # Rows are fetched a step at a time, so a large export is never all in memory
+        collection = self.collection
+        rows = await collection._run("find", self.filter, collection._open, self.filter, self.sort_spec,
+                                     self.skip_count, self.limit_count)
+        try:
+            while True:
+                batch = await collection._run("getMore", None, rows.fetch)
+                if not batch:
+                    break
+                for doc in batch:
+                    yield project(doc, self.projection)
+        finally:
+            await collection.database.execute(rows.close)
+
+
+class _Rows:
+    """An open SELECT, or a list already filtered in Python, handed out FETCH_SIZE documents at a time"""
+
+    def __init__(self, cursor=None, docs=None):
+        self.cursor = cursor
+        self.docs = docs
+
+    def fetch(self, conn) -> list:
+        if self.cursor is not None:
+            return [_load(row) for row in self.cursor.fetchmany(FETCH_SIZE)]
+        batch, self.docs = self.docs[:FETCH_SIZE], self.docs[FETCH_SIZE:]
+        return batch
+
+    def close(self, conn):
+        if self.cursor is not None:
+            self.cursor.close()
+
+
+class SQLiteAggregateCursor:
+    def __init__(self, collection, pipeline: list):
+        self.collection = collection
+        self.pipeline = list(pipeline)
+
+    async def to_list(self, length=None):
+        docs = await self.collection._run("aggregate", self.pipeline, self.collection._aggregate, self.pipeline)
+        return docs[:length] if length else docs
+
+    async def __aiter__(self):
+        for doc in await self.to_list(None):
+            yield doc
+
+
+class SQLiteCollection:
+    def __init__(self, database, name: str):
+        self.database = database
+        self.name = name
+        self.table = '"' + name.replace('"', '""') + '"'
+
+    # Runs on the database thread
+
+    def _exists(self, conn) -> bool:
+        return self.database._table_exists(conn, self.name)
+
+    def _ensure(self, conn):
+        if not self._exists(conn):
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (_id TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+            self.database.tables.add(self.name)
+
+    def _select_sql(self, query: dict, sort: list, skip: int, limit: int):
+        """(sql, params, residual); with a residual filter, sorting and paging are left to Python"""
+        where, params, residual = translate(query)
+        sql = f"SELECT _id, doc FROM {self.table} WHERE {where}"
+        if residual is None:
+            if sort:
+                sql += " ORDER BY " + ", ".join(f"{_value_sql(f)} {'DESC' if d < 0 else 'ASC'}" for f, d in sort)
+            if limit or skip:
+                sql += " LIMIT ? OFFSET ?"
+                params = params + [limit or -1, skip or 0]
+        return sql, params, residual
+
+    def _filtered(self, rows, residual, sort, skip, limit) -> list:
+        docs = [d for d in map(_load, rows) if matches(d, residual)]
+        if sort:
+            sort_documents(docs, sort)
+        return docs[skip:skip + limit if limit else None]
+
+    def _find(self, conn, query, sort=None, skip=0, limit=0) -> list:
+        if not self._exists(conn):
+            return []
+        sql, params, residual = self._select_sql(query, sort, skip, limit)
+        rows = conn.execute(sql, params)
+        if residual is None:
+            return [_load(row) for row in rows]
+        return self._filtered(rows, residual, sort, skip, limit)
+
+    def _open(self, conn, query, sort, skip, limit) -> _Rows:
+        if not self._exists(conn):
+            return _Rows(docs=[])
+        sql, params, residual = self._select_sql(query, sort, skip, limit)
+        if residual is None:
+            return _Rows(cursor=conn.execute(sql, params))
+        return _Rows(docs=self._filtered(conn.execute(sql, params), residual, sort, skip, limit))
+
+    def _count(self, conn, query, skip=0, limit=0) -> int:
+        if not self._exists(conn):
+            return 0
+        where, params, residual = translate(query)
+        if residual is None and not skip and not limit:
+            return conn.execute(f"SELECT COUNT(*) FROM {self.table} WHERE {where}", params).fetchone()[0]
+        return len(self._find(conn, query, None, skip, limit))
+
+    def _aggregate(self, conn, pipeline: list) -> list:
+        if pipeline and "$indexStats" in pipeline[0]:
+            raise OperationFailure("$indexStats is not supported by the SQLite backend")
+        query = {}
+        if pipeline and "$match" in pipeline[0]:
+            query, pipeline = pipeline[0]["$match"], pipeline[1:]
+        return run_pipeline(self._find(conn, query), pipeline)
+
+    def _insert(self, conn, doc: dict):
+        try:
+            conn.execute(f"INSERT INTO {self.table} (_id, doc) VALUES (?, ?)", (_id_value(doc["_id"]), _dump(doc)))
+        except sqlite3.IntegrityError as e:
+            raise _duplicate_key(e, self.name)
+
+    def _replace(self, conn, doc: dict):
+        try:
+            conn.execute(f"UPDATE {self.table} SET doc = ? WHERE _id = ?", (_dump(doc), doc["_id"]))
+        except sqlite3.IntegrityError as e:
+            raise _duplicate_key(e, self.name)
+
+    def _update(self, conn, query, update, upsert=False, many=False, sort=None):
+        """(matched, modified, upserted_id, document before, document after)"""
+        self._ensure(conn)
+        docs = self._find(conn, query, sort, 0, 0 if many else 1)
+        if not docs:
+            if not upsert:
+                return 0, 0, None, None, None
+            base = _upsert_base(query)
+            base.setdefault("_id", str(ObjectId()))
+            after = _apply_update({**base, "_id": _id_value(base["_id"])}, update, inserting=True)
+            self._insert(conn, after)
+            return 0, 0, after["_id"], None, after
+        modified = 0
+        for doc in docs:
+            after = _apply_update(doc, update, inserting=False)
+            if after != doc:
+                self._replace(conn, after)
+                modified += 1
+        return len(docs), modified, None, docs[0], after
+
+    def _delete(self, conn, query, many=False, sort=None) -> list:
+        if not self._exists(conn):
+            return []
+        docs = self._find(conn, query, sort, 0, 0 if many else 1)
+        conn.executemany(f"DELETE FROM {self.table} WHERE _id = ?", [(d["_id"],) for d in docs])
+        return docs
+
+    def _insert_many(self, conn, docs: list, ordered: bool) -> int:
+        self._ensure(conn)
+        inserted, errors = 0, []
+        for i, doc in enumerate(docs):
+            try:
+                self._insert(conn, doc)
+                inserted += 1
+            except DuplicateKeyError as e:
+                errors.append({"index": i, "code": 11000, "errmsg": str(e), "op": doc})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": [], "nInserted": inserted,
+                                  "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []})
+        return inserted
+
+    def _bulk_write(self, conn, requests: list, ordered: bool) -> dict:
+        result = {"writeErrors": [], "writeConcernErrors": [], "nInserted": 0, "nUpserted": 0,
+                  "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": []}
+        self._ensure(conn)
+        for i, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(conn, self._with_id(request._doc))
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                    matched, modified, upserted_id, _, _ = self._update(
+                        conn, request._filter, request._doc, request._upsert, isinstance(request, UpdateMany))
+                    result["nMatched"] += matched
+                    result["nModified"] += modified
+                    if upserted_id is not None:
+                        result["nUpserted"] += 1
+                        result["upserted"].append({"index": i, "_id": upserted_id})
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    result["nRemoved"] += len(self._delete(conn, request._filter, isinstance(request, DeleteMany)))
+                else:
+                    raise OperationFailure(f"unsupported bulk operation {type(request).__name__}")
+            except DuplicateKeyError as e:
+                result["writeErrors"].append({"index": i, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return result
+
+    def _index_information(self, conn) -> dict:
+        if not self._exists(conn):
+            return {}
+        info = {"_id_": {"v": 2, "key": [("_id", 1)]}}
+        rows = conn.execute(
+            "SELECT m.name, m.key, m.is_unique FROM _indexes m "
+            "JOIN sqlite_master s ON s.type = 'index' AND s.name = m.collection || '.' || m.name "
+            "WHERE m.collection = ? ORDER BY s.rowid", (self.name,))
+        for name, key, unique in rows:
+            info[name] = {"v": 2, "key": [tuple(k) for k in json.loads(key)]}
+            if unique:
+                info[name]["unique"] = True
+        return info
+
+    def _create_index(self, conn, key: list, unique: bool, name: str) -> str:
+        self._ensure(conn)
+        columns = ", ".join(f"{_value_sql(field)} {'DESC' if direction == -1 else 'ASC'}" for field, direction in key)
+        index = '"' + f"{self.name}.{name}".replace('"', '""') + '"'
+        try:
+            conn.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index} ON {self.table} ({columns})")
+        except sqlite3.Error as e:
+            raise OperationFailure(f"Index build failed: {e}", 11000 if isinstance(e, sqlite3.IntegrityError) else None)
+        conn.execute("INSERT OR REPLACE INTO _indexes (collection, name, key, is_unique) VALUES (?, ?, ?, ?)",
+                     (self.name, name, json.dumps(key), int(bool(unique))))
+        return name
+
+    def _drop_index(self, conn, name: str):
+        index = '"' + f"{self.name}.{name}".replace('"', '""') + '"'
+        conn.execute(f"DROP INDEX IF EXISTS {index}")
+        conn.execute("DELETE FROM _indexes WHERE collection = ? AND name = ?", (self.name, name))
+
+    def _drop(self, conn):
+        conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+        conn.execute("DELETE FROM _indexes WHERE collection = ?", (self.name,))
+        self.database.tables.discard(self.name)
+
+    @staticmethod
+    def _with_id(doc: dict) -> dict:
+        # As pymongo does, the caller's document gets the generated _id
+        if "_id" not in doc:
+            doc["_id"] = ObjectId()
+        return {**doc, "_id": _id_value(doc["_id"])}
+
+    # The Motor interface
+
+    async def _run(self, command: str, query, fn, *args, write: bool = False):
+        started = time.perf_counter()
+        try:
+            return await self.database.execute(fn, *args, write=write)
+        finally:
+            seconds = time.perf_counter() - started
+            stats = instrumentation.request_stats.get()
+            if stats is not None:
+                stats.record(command, seconds)
+            if 0 < instrumentation.SLOW_QUERY_MS <= seconds * 1000:
+                instrumentation.logger.warning(
+                    f"{seconds * 1000:.1f}ms {command} {self.database.name}.{self.name} "
+                    f"from {stats.route if stats else '-'}: {instrumentation.query_shape(query)}"
+                )
+
+    def find(self, filter=None, projection=None, sort=None, skip=0, limit=0, **kwargs) -> SQLiteCursor:
+        return SQLiteCursor(self, filter, projection, sort, skip, limit)
+
+    async def find_one(self, filter=None, projection=None, sort=None, **kwargs):
+        docs = await self.find(filter, projection, sort).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, filter: dict, skip: int = 0, limit: int = 0, **kwargs) -> int:
+        return await self._run("count", filter, self._count, filter, skip, limit)
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        return await self.count_documents({})
+
+    async def distinct(self, key: str, filter=None, **kwargs) -> list:
+        values = {}
+        for doc in await self.find(filter).to_list(None):
+            value = _get(doc, key)
+            for v in value if isinstance(value, list) else [value]:
+                if v is not _MISSING:
+                    values.setdefault(_group_key(v), v)
+        return list(values.values())
+
+    async def insert_one(self, document: dict, **kwargs) -> InsertOneResult:
+        doc = self._with_id(document)
+
+        def insert(conn):
+            self._ensure(conn)
+            self._insert(conn, doc)
+
+        await self._run("insert", None, insert, write=True)
+        return InsertOneResult(doc["_id"], True)
+
+    async def insert_many(self, documents, ordered: bool = True, **kwargs) -> InsertManyResult:
+        docs = [self._with_id(d) for d in documents]
+        await self._run("insert", None, self._insert_many, docs, ordered, write=True)
+        return InsertManyResult([d["_id"] for d in docs], True)
+
+    async def _update_result(self, filter, update, upsert, many) -> UpdateResult:
+        matched, modified, upserted_id, _, _ = await self._run(
+            "update", filter, self._update, filter, update, upsert, many, write=True)
+        raw = {"n": matched + (upserted_id is not None), "nModified": modified, "updatedExisting": bool(matched)}
+        if upserted_id is not None:
+            raw["upserted"] = upserted_id
+        return UpdateResult(raw, True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return await self._update_result(filter, update, upsert, False)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return await self._update_result(filter, update, upsert, True)
+
+    async def replace_one(self, filter: dict, replacement: dict, upsert: bool = False, **kwargs) -> UpdateResult:
+        return await self._update_result(filter, replacement, upsert, False)
+
+    async def delete_one(self, filter: dict, **kwargs) -> DeleteResult:
+        docs = await self._run("delete", filter, self._delete, filter, False, write=True)
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def delete_many(self, filter: dict, **kwargs) -> DeleteResult:
+        docs = await self._run("delete", filter, self._delete, filter, True, write=True)
+        return DeleteResult({"n": len(docs)}, True)
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection=None, sort=None, upsert: bool = False,
+                                  return_document: bool = False, **kwargs):
+        _, _, _, before, after = await self._run(
+            "findAndModify", filter, self._update, filter, update, upsert, False, _sort_spec(sort), write=True)
+        doc = after if return_document else before
+        return project(doc, projection) if doc is not None else None
+
+    async def find_one_and_delete(self, filter: dict, projection=None, sort=None, **kwargs):
+        docs = await self._run("findAndModify", filter, self._delete, filter, False, _sort_spec(sort), write=True)
+        return project(docs[0], projection) if docs else None
+
+    async def bulk_write(self, requests, ordered: bool = True, **kwargs) -> BulkWriteResult:
+        result = await self._run("bulkWrite", None, self._bulk_write, list(requests), ordered, write=True)
+        return BulkWriteResult(result, True)
+
+    def aggregate(self, pipeline, **kwargs) -> SQLiteAggregateCursor:
+        return SQLiteAggregateCursor(self, pipeline)
+
+    async def create_index(self, keys, unique: bool = False, name: str = None, **kwargs) -> str:
+        key = _sort_spec(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in key)
+        return await self._run("createIndexes", None, self._create_index, key, unique, name, write=True)
+
+    async def index_information(self) -> dict:
+        return await self._run("listIndexes", None, self._index_information)
+
+    async def drop_index(self, name: str):
+        await self._run("dropIndexes", None, self._drop_index, name, write=True)
+
+    async def drop(self):
+        await self._run("drop", None, self._drop, write=True)
+
+
+class SQLiteDatabase:
+    def __init__(self, client, name: str, path: str):
+        self.client = client
+        self.name = name
+        self.path = path
+        self.collections = {}
+        self.tables = set()
+        self.conn = None
+        # One thread owns the connection; operations queue for it
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"sqlite-{name}")
+
+    def __getitem__(self, name: str) -> SQLiteCollection:
+        collection = self.collections.get(name)
+        if collection is None:
+            collection = self.collections[name] = SQLiteCollection(self, name)
+        return collection
+
+    def __getattr__(self, name: str) -> SQLiteCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at each checkpoint rather than each commit: a power cut loses at most the last commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        conn.create_function("regexp_search", 3, _regexp_search, deterministic=True)
+        conn.execute("CREATE TABLE IF NOT EXISTS _indexes "
+                     "(collection TEXT, name TEXT, key TEXT, is_unique INTEGER, PRIMARY KEY (collection, name))")
+        self.tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return conn
+
+    def _table_exists(self, conn, name: str) -> bool:
+        if name not in self.tables:
+            # Another worker may have created it since
+            found = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone()
+            if found:
+                self.tables.add(name)
+        return name in self.tables
+
+    def _call(self, fn, args, write: bool):
+        if self.conn is None:
+            self.conn = self._connect()
+        if not write:
+            return fn(self.conn, *args)
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(self.conn, *args)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        return result
+
+    async def execute(self, fn, *args, write: bool = False):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, fn, args, write)
+
+    async def list_collection_names(self, **kwargs) -> list:
+        def names(conn):
+            rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite%' "
+                                "AND name != '_indexes' ORDER BY name")
+            return [row[0] for row in rows]
+        return await self.execute(names)
+
+    async def create_collection(self, name: str, **kwargs) -> SQLiteCollection:
+        await self.execute(self[name]._ensure, write=True)
+        return self[name]
+
+    async def drop_collection(self, name: str):
+        await self[name].drop()
+
+    async def command(self, command, **kwargs) -> dict:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        raise OperationFailure(f"command {name} is not supported by the SQLite backend")
+
+    def close(self):
+        def close():
+            if self.conn is not None:
+                # Refreshes the planner's statistics where they went stale, as SQLite recommends on close
+                self.conn.execute("PRAGMA optimize")
+                self.conn.close()
+                self.conn = None
+        self.executor.submit(close).result()
+
+
+class SQLiteClient:
+    """Databases are files in directory: client["dragclub_db"] is <directory>/dragclub_db.sqlite3"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.databases = {}
+
+    def __getitem__(self, name: str) -> SQLiteDatabase:
+        database = self.databases.get(name)
+        if database is None:
+            database = self.databases[name] = SQLiteDatabase(self, name, os.path.join(self.directory, f"{name}.sqlite3"))
+        return database
+
+    def __getattr__(self, name: str) -> SQLiteDatabase:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_database_names(self) -> list:
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(f[:-len(".sqlite3")] for f in os.listdir(self.directory) if f.endswith(".sqlite3"))
+
+    async def drop_database(self, name: str):
+        database = self.databases.pop(name, None)
+        if database is not None:
+            database.close()
+        for suffix in ("", "-wal", "-shm"):
+            path = os.path.join(self.directory, f"{name}.sqlite3{suffix}")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def close(self):
+        for database in self.databases.values():
+            database.close()
@@ -0,0 +1,42 @@
+"""
+Query-plan regression tests.
+
+Every query shape the API issues (backend/benchmarks/query_plans.py) is run
+through explain("executionStats") against a seeded scratch database. A shape
+fails if its plan uses a COLLSCAN or examines too many documents per document
+returned, so a missing or unusable index shows up here rather than in production.
+
+Needs a local mongod (MONGO_URL, default mongodb://localhost:27017); skipped otherwise.
+
+    python -m pytest tests/test_query_plans.py
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import query_plans
+
+SHAPES = [shape["name"] for shape in query_plans.query_shapes()]
+
+
+@pytest.fixture(scope="module")
+def plans():
+    if not query_plans.mongod_available():
+        pytest.skip(f"no mongod at {os.environ['MONGO_URL']}")
+    return asyncio.run(query_plans.check_all(members=2000))
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_query_plan(plans, shape):
+    result = plans[shape]
+    assert not result["problems"], (
+        f"{shape}: {', '.join(result['problems'])} "
+        f"(plan {' > '.join(result['stages'])}, indexes {result['indexes']}, "
+        f"examined {result['docs_examined']}, returned {result['returned']})"
+    )
@@ -0,0 +1,129 @@
+"""
+SQLite backend tests (backend/sqlite_store.py).
+
+Every query shape the API issues (backend/benchmarks/query_plans.py) is run
+against a seeded SQLite database twice: through the store, where filters and
+sorts are translated to SQL, and through the store's Python evaluator over
+every document. The results must agree, and the SQL plan must use an index
+unless the shape is allowed a collection scan.
+
+Needs no database service.
+
+    python -m pytest tests/test_sqlite_store.py
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+import query_plans
+import server
+import sqlite_store
+
+SHAPES = {shape["name"]: shape for shape in query_plans.query_shapes()}
+
+# Shapes SQLite cannot serve from an index, with the reason
+SQLITE_SCANS = {
+    "report_vehicles_expiring_soon": "an $elemMatch range over array elements (SQLite has no multikey indexes)",
+}
+
+
+@pytest.fixture(scope="module")
+def seeded(tmp_path_factory):
+    client = sqlite_store.SQLiteClient(str(tmp_path_factory.mktemp("sqlite")))
+    db = client["query_plan_check"]
+    previous = server.db
+    server.db = db
+    try:
+        asyncio.run(query_plans.seed(db, 500))
+        yield db
+    finally:
+        server.db = previous
+        client.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def ids(docs) -> list:
+    return [d["_id"] for d in docs]
+
+
+@pytest.mark.parametrize("name", list(SHAPES))
+def test_sql_matches_python(seeded, name):
+    shape = SHAPES[name]
+    collection = seeded[shape["collection"]]
+    everything = run(collection.find({}).to_list(None))
+    if "pipeline" in shape:
+        expected = sqlite_store.run_pipeline(everything, shape["pipeline"])
+        assert run(collection.aggregate(shape["pipeline"]).to_list(None)) == expected
+        return
+    stages = [{"$match": shape["filter"]}]
+    if shape.get("sort"):
+        stages.append({"$sort": dict(shape["sort"])})
+    if shape.get("limit"):
+        stages.append({"$limit": shape["limit"]})
+    expected = sqlite_store.run_pipeline(everything, stages)
+    if shape.get("count"):
+        assert run(collection.count_documents(shape["filter"])) == len(expected)
+        return
+    found = run(collection.find(shape["filter"], sort=shape.get("sort"), limit=shape.get("limit", 0)).to_list(None))
+    if shape.get("sort"):
+        assert ids(found) == ids(expected)
+    else:
+        assert sorted(ids(found)) == sorted(ids(expected))
+
+
+@pytest.mark.parametrize("name", [
+    n for n, s in SHAPES.items() if "pipeline" not in s and not s.get("allow_collscan") and n not in SQLITE_SCANS
+])
+def test_query_uses_index(seeded, name):
+    shape = SHAPES[name]
+    collection = seeded[shape["collection"]]
+    sql, params, residual = collection._select_sql(shape["filter"], shape.get("sort") or [], 0, shape.get("limit", 0))
+    assert residual is None, f"{name}: not translated to SQL: {residual}"
+
+    def plan(conn):
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+    steps = run(seeded.execute(plan))
+    assert not [s for s in steps if s.startswith("SCAN ") and "USING" not in s], f"{name}: {steps}"
+
+
+def test_writes(seeded):
+    coll = seeded["store_test"]
+
+    async def scenario():
+        await coll.create_index("key", unique=True)
+        doc = {"key": "a", "n": 1}
+        await coll.insert_one(doc)
+        assert "_id" in doc
+        with pytest.raises(DuplicateKeyError):
+            await coll.insert_one({"key": "a"})
+
+        after = await coll.find_one_and_update(
+            {"key": "b"}, {"$inc": {"n": 2}, "$setOnInsert": {"created": True}},
+            upsert=True, return_document=ReturnDocument.AFTER)
+        assert (after["key"], after["n"], after["created"]) == ("b", 2, True)
+        before = await coll.find_one_and_update({"key": "b"}, {"$inc": {"n": 1}, "$setOnInsert": {"created": False}})
+        assert before["n"] == 2
+
+        result = await coll.bulk_write([UpdateOne({"key": "a"}, {"$set": {"flag": True}}),
+                                        UpdateOne({"key": "c"}, {"$set": {"flag": False}}, upsert=True)])
+        assert (result.matched_count, result.upserted_count) == (1, 1)
+
+        # $ne also matches documents without the field, in SQL as in MongoDB
+        assert sorted(d["key"] for d in await coll.find({"created": {"$ne": True}}).to_list(None)) == ["a", "c"]
+        assert await coll.find_one({"key": "b"}, {"_id": 0, "n": 1}) == {"n": 3}
+        assert (await coll.delete_many({"flag": {"$exists": True}})).deleted_count == 2
+        assert await coll.count_documents({}) == 1
+
+    run(scenario())
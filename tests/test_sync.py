@@ -0,0 +1,216 @@
+"""
+Delta sync tests (GET /api/sync).
+
+Drives the sync token protocol through the API on a scratch SQLite database
+(backend/sqlite_store.py): full syncs and resets, paging and resume tokens,
+tombstones, the pruning horizon, clear-all-data and the settle window.
+
+Needs no database service.
+
+    python -m pytest tests/test_sync.py
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+import server
+import sqlite_store
+
+MEMBER = {"address": "1 Main St", "suburb": "Town", "postcode": "4000", "membership_type": "Full", "interest": "Both"}
+# init_default_options creates 3 statuses and 4 reasons on startup
+DEFAULT_OPTIONS = 7
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    client = sqlite_store.SQLiteClient(str(tmp_path))
+    monkeypatch.setattr(server, "client", client)
+    monkeypatch.setattr(server, "db", client["sync_test"])
+    monkeypatch.setattr(server, "SYNC_SETTLE_SECONDS", 0)
+    with TestClient(server.app) as api:
+        now = datetime.now(timezone.utc)
+
+        async def admin():
+            await server.db.users.insert_one({"user_id": "user_admin", "email": "admin@example.com", "name": "Admin",
+                                              "role": "admin", "created_at": now.isoformat()})
+            await server.db.user_sessions.insert_one({"user_id": "user_admin", "session_token": "sync_test_token",
+                                                      "expires_at": (now + timedelta(days=1)).isoformat()})
+
+        api.portal.call(admin)
+        api.headers["Authorization"] = "Bearer sync_test_token"
+        yield api
+
+
+def sync(api, since, **params) -> dict:
+    response = api.get("/api/sync", params={"since": since, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def add_member(api, name: str) -> str:
+    response = api.post("/api/members", json={"name": name, **MEMBER})
+    assert response.status_code == 200, response.text
+    return response.json()["member_id"]
+
+
+def add_vehicle(api, member_id: str, registration: str) -> str:
+    response = api.post("/api/vehicles", json={
+        "member_id": member_id, "log_book_number": "LB1", "make": "Holden", "body_style": "Sedan",
+        "model": "Commodore", "year": 1990, "registration": registration, "status": "Active"})
+    assert response.status_code == 200, response.text
+    return response.json()["vehicle_id"]
+
+
+def drain(api, token: str, limit: int) -> tuple:
+    """Follow has_more to the end; returns (pages, final token)"""
+    pages = [sync(api, token, limit=limit)]
+    while pages[-1]["has_more"]:
+        pages.append(sync(api, pages[-1]["token"], limit=limit))
+    return pages, pages[-1]["token"]
+
+
+def test_full_sync_then_changes(api):
+    full = sync(api, "0")
+    assert full["reset"] and not full["has_more"]
+    assert len(full["vehicle_options"]) == DEFAULT_OPTIONS
+    token = full["token"]
+    assert sync(api, token) == {
+        "token": token, "reset": False, "has_more": False, "members": [], "vehicles": [], "vehicle_options": [],
+        "deleted": {"members": [], "vehicles": [], "vehicle_options": []},
+    }
+
+    member_id = add_member(api, "Ann")
+    vehicle_id = add_vehicle(api, member_id, "SYNC01")
+    changes = sync(api, token)
+    assert not changes["reset"]
+    assert [m["member_id"] for m in changes["members"]] == [member_id]
+    assert [v["vehicle_id"] for v in changes["vehicles"]] == [vehicle_id]
+    assert int(changes["token"]) > int(token)
+
+    assert api.put(f"/api/members/{member_id}", json={"name": "Ann Renamed"}).status_code == 200
+    changes = sync(api, changes["token"])
+    assert [m["name"] for m in changes["members"]] == ["Ann Renamed"]
+    # Internal fields stay out of the response
+    assert "sync_seq" not in changes["members"][0]
+
+
+def test_invalid_tokens(api):
+    for token in ["abc", "-3", "r", "1.5"]:
+        assert api.get("/api/sync", params={"since": token}).status_code == 400
+    assert sync(api, "999999999")["reset"]
+
+
+def test_tombstones_and_delete_then_rewrite(api):
+    token = sync(api, "0")["token"]
+    member_id = add_member(api, "Bob")
+    vehicle_id = add_vehicle(api, member_id, "SYNC02")
+    option_id = api.post("/api/vehicle-options", json={"type": "body_style", "value": "Gasser"}).json()["option_id"]
+    assert api.delete(f"/api/vehicle-options/{option_id}").status_code == 200
+    assert api.delete(f"/api/members/{member_id}").status_code == 200
+
+    changes = sync(api, token)
+    # Created and deleted since the token: only the deletion is reported
+    assert changes["members"] == changes["vehicles"] == changes["vehicle_options"] == []
+    assert changes["deleted"] == {"members": [member_id], "vehicles": [vehicle_id], "vehicle_options": [option_id]}
+
+
+def test_paging_matches_one_sync(api):
+    token = sync(api, "0")["token"]
+    members = [add_member(api, f"Member {i}") for i in range(5)]
+    assert api.delete(f"/api/members/{members[0]}").status_code == 200
+
+    pages, final = drain(api, token, limit=2)
+    assert len(pages) == 3 and all(not p["reset"] for p in pages)
+    assert all(not p["token"].startswith("r") for p in pages)
+    assert sorted(m["member_id"] for p in pages for m in p["members"]) == sorted(members[1:])
+    assert [d for p in pages for d in p["deleted"]["members"]] == [members[0]]
+    assert final == sync(api, token)["token"]
+
+
+def test_paged_full_sync_uses_resume_tokens(api):
+    members = [add_member(api, f"Member {i}") for i in range(4)]
+    first = sync(api, "0", limit=3)
+    assert first["reset"] and first["has_more"] and first["token"].startswith("r")
+
+    pages, final = drain(api, first["token"], limit=3)
+    assert not any(p["reset"] for p in pages)
+    assert not final.startswith("r")
+    seen = [m["member_id"] for p in [first, *pages] for m in p["members"]]
+    assert sorted(seen) == sorted(members)
+    assert sync(api, final)["members"] == []
+
+
+def test_pruned_tombstones_move_the_horizon(api, monkeypatch):
+    old_token = sync(api, "0")["token"]
+    member_id = add_member(api, "Carl")
+    add_member(api, "Dee")
+    # Every tombstone is past retention, so this deletion's is pruned as soon as it is written
+    monkeypatch.setattr(server, "SYNC_TOMBSTONE_DAYS", -1)
+    assert api.delete(f"/api/members/{member_id}").status_code == 200
+    monkeypatch.setattr(server, "SYNC_TOMBSTONE_DAYS", 90)
+
+    assert sync(api, old_token)["reset"]
+    # A paged full sync is not reset by the horizon, and ends at or past it
+    first = sync(api, "0", limit=2)
+    pages, final = drain(api, first["token"], limit=2)
+    assert not any(p["reset"] for p in pages)
+    assert not sync(api, final)["reset"]
+
+
+def test_clear_all_data_resets_clients(api):
+    add_member(api, "Eve")
+    token = sync(api, "0")["token"]
+    paging = sync(api, "0", limit=2)["token"]
+    assert paging.startswith("r")
+
+    response = api.post("/api/admin/clear-all-data", params={"confirm": "DELETE_ALL_DATA"})
+    assert response.status_code == 200, response.text
+    for stale in (token, paging):
+        changes = sync(api, stale)
+        assert changes["reset"] and changes["members"] == []
+        # Vehicle options survive the clear and are part of the new full sync
+        assert len(changes["vehicle_options"]) == DEFAULT_OPTIONS
+    assert not sync(api, changes["token"])["reset"]
+
+
+def test_settle_window_holds_back_fresh_changes(api, monkeypatch):
+    token = sync(api, "0")["token"]
+    monkeypatch.setattr(server, "SYNC_SETTLE_SECONDS", 60)
+    add_member(api, "Fay")
+    held = sync(api, token)
+    assert held["members"] == [] and held["token"] == token
+    monkeypatch.setattr(server, "SYNC_SETTLE_SECONDS", 0)
+    assert [m["name"] for m in sync(api, token)["members"]] == ["Fay"]
+
+
+def set_sync_at(api, member_id: str, seconds_ago: float):
+    at = (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).isoformat()
+    api.portal.call(lambda: server.db.members.update_one({"member_id": member_id}, {"$set": {"sync_at": at}}))
+
+
+def test_settle_cut_uses_sequence_order_not_stamp_times(api, monkeypatch):
+    token = sync(api, "0")["token"]
+    monkeypatch.setattr(server, "SYNC_SETTLE_SECONDS", 60)
+    lower, higher = add_member(api, "Gil"), add_member(api, "Hal")
+
+    # The lower number took its stamp time last: the higher one settling shows the lower was reserved first
+    set_sync_at(api, lower, 0)
+    set_sync_at(api, higher, 120)
+    changes = sync(api, token)
+    assert [m["member_id"] for m in changes["members"]] == [lower, higher]
+
+    # Only the lower number has settled: the page stops there, and the higher one follows later
+    token = changes["token"]
+    first, second = add_member(api, "Ida"), add_member(api, "Jo")
+    set_sync_at(api, first, 120)
+    changes = sync(api, token)
+    assert [m["member_id"] for m in changes["members"]] == [first]
+    set_sync_at(api, second, 120)
+    assert [m["member_id"] for m in sync(api, changes["token"])["members"]] == [second]